@@ -1,91 +1,81 @@
 import streamlit as st
-import pandas as pd
-from streamlit_echarts import st_echarts
-from utility import get_st_theme, global_data_selector
+import polars as pl
+from utility import get_st_theme, global_data_selector, show_load_errors
 from utility import datamanager as dm
+from utility.instrumentation import page_render, timed
 from utility import visualization as viz
+from utility.utils import format_rupiah, rupiah
 
 # ---------------------------
 # Section 2: UI Display Functions
 # ---------------------------
+@timed('section')
 def display_key_metrics(total_remaining, total_saved):
     st.subheader("📌 Key Metrics Overview")
     col1, col2 = st.columns(2)
 
     with col1:
-        st.metric("💸 Remaining Unallocated This Month", total_remaining)
+        st.metric("💸 Remaining Unallocated This Month", rupiah(total_remaining))
     with col2:
-        st.metric("💾 Saved This Month", total_saved)
+        st.metric("💾 Saved This Month", rupiah(total_saved))
 
+@timed('section')
 def display_bank_account_details(total_holding, account_data):
     st.subheader("📊 Detailed Bank Account")
-    st.metric("🏦 Total Holding", total_holding)
-    st.dataframe(account_data, use_container_width=True, hide_index=True)
+    st.metric("🏦 Total Holding", rupiah(total_holding))
+    account_table = account_data.with_columns(format_rupiah('Account Balance'))
+    st.dataframe(account_table, use_container_width=True, hide_index=True)
     
-def display_cashflow_overview(cashflow_data: pd.DataFrame):
+@timed('section')
+def display_cashflow_overview(cashflow_data: pl.DataFrame):
     st.subheader("📊 Cashflow Overview")
-    cashflow_data.set_index("Cash Flow", inplace=True)
-    st.table(cashflow_data)
+    # st.table has no hide_index, so the labels become the pandas index at the widget boundary
+    st.table(cashflow_data.to_pandas().set_index("Cash Flow"))
 
+@timed('section')
 def display_budgeting_chart(category_df, unallocated):
-
-    def gen_value_remark(category, dif_value, value_string):
-        # dif_value = Actual - Plan;
-        money = value_string
-        color_map = {
-            "green": "#2e7d32",
-            "red": "#c62828",
-            "neutral": "#D4D4D4"
-        }
-        if category == 'Income':
-            if dif_value > 0:
-                # dif_value > 0 --> Get more income as planned
-                return f"<div style='color:{color_map.get("green")}; font-weight: 500; margin:4px 0;'>You received <b>{money}</b> more income than planned!</div>"
-            if dif_value < 0:
-                # dif_value < 0 --> Get less income as planned
-                return f"<div style='color:{color_map.get("red")}; font-weight: 500; margin:4px 0;'>You received <b>{money}</b> less income than planned!</div>"
-            
-        if category == 'Expense':
-            if dif_value > 0:
-                # dif_value > 0 --> Overspending
-                return f"<div style='color:{color_map.get("red")}; font-weight: 500; margin:4px 0;'>You overspent <b>{money}</b> more than planned!</div>"
-            if dif_value < 0:
-                # dif_value < 0 --> Remaining to be allocated
-                state = 'remain to be used!' if unallocated != 0 else 'less than planned!'
-                return f"<div style='color:{color_map.get("green")}; font-weight: 500; margin:4px 0;'>You have <b>{money}</b> {state}</div>"
-            
-        if category == 'Savings':
-            if dif_value > 0:
-                # dif_value > 0 --> Saving more than planned
-                return f"<div style='color:{color_map.get("green")}; font-weight: 500; margin:4px 0;'>You saved <b>{money}</b> more than planned!</div>"
-            if dif_value < 0:
-                # dif_value < 0 --> Saving less than planned
-                return f"<div style='color:{color_map.get("red")}; font-weight: 500; margin:4px 0;'>You saved <b>{money}</b> less than planned!</div>"
+    from streamlit_echarts import st_echarts
 
     st.subheader("📊 Budget Breakdown by Category")
-    for _, row in category_df.iterrows():
-        if row['Diff'] == 0:
-            continue
-        st.subheader(f"📦 {row['Budget Category']}")
-        
-        st.markdown(
-            gen_value_remark(row['Cash Flow Type'], row['Diff'], row['Difference']), 
-            unsafe_allow_html=True
-        )
+    breakdown = category_df.filter(pl.col('Diff') != 0).with_columns(viz.budget_remarks(unallocated))
+    row_height = 110
 
-        chart = viz.create_horizontal_bar_chart(row["Planned"], row["Actual"])
-        
-        st.markdown(" <style>iframe{ height: 120px } ", unsafe_allow_html=True)
-        st_echarts(options=chart, height="100px", renderer="svg", theme=get_st_theme())
+    # One component for every category instead of one iframe each
+    chart = viz.create_budget_breakdown_chart(breakdown, row_height)
+    st_echarts(options=chart, height=f"{max(breakdown.height, 1) * row_height}px", renderer="svg", theme=get_st_theme())
     
     with st.expander("See Details in table"):
         st.dataframe(
-            category_df[['Budget Category', 'Planned', 'Actual', 'Difference']], 
+            category_df.select(
+                'Budget Category', format_rupiah(pl.col('Planned', 'Actual', 'Difference'))
+            ),
             use_container_width=True, 
             hide_index=True
         )
 
 
+@timed('section')
+def display_trends(year: int):
+    from streamlit_echarts import st_echarts
+
+    st.subheader("📈 Monthly Spending by Category")
+    spend = dm.category_spend_by_month()
+    if spend.is_empty():
+        st.info("No transactions yet.")
+        return
+    st_echarts(options=viz.create_trend_chart(spend), height="400px", theme=get_st_theme())
+
+    st.subheader("💾 Savings Rate by Year")
+    st.dataframe(
+        dm.savings_rate_by_year().with_columns(
+            format_rupiah(pl.col('Income', 'Savings', 'Expense')),
+            pl.format('{}%', (pl.col('Savings Rate') * 100).round(1)).alias('Savings Rate'),
+        ),
+        use_container_width=True,
+        hide_index=True
+    )
+
+
 # ---------------------------
 # Section 3: Main App Logic
 # ---------------------------
@@ -103,31 +93,39 @@ def main():
     year, month, worksheet = global_data_selector()
 
     # Load Data
-    account_data = dm.load_account_data()
-    cashflow_data = dm.load_cashflow_data()
-    category_df = dm.load_category_budget_data()
+    # Planned against actual is computed locally, so archived years have an overview too
+    data, errors = dm.prefetch(year, month, *dm.PAGE_DATASETS['home'])
+    show_load_errors(errors)
 
     # Calculations
-    overview_metrics = dm.load_overview_metrics()
-    total_saved = overview_metrics["total_saved"]
-    total_remaining = overview_metrics["total_remaining"]
-    total_holding = overview_metrics["total_holding"]
+    overview_metrics = data.get('overview_metrics')
 
     # UI Sections
-    Overview_tab, BudgetOverview_tab = st.tabs(["Account Balance", "Budget Overview"])
+    Overview_tab, BudgetOverview_tab, Trends_tab = st.tabs(["Account Balance", "Budget Overview", "Trends"])
 
     with Overview_tab:
-        display_key_metrics(total_remaining, total_saved)
-        display_cashflow_overview(cashflow_data)
-        display_bank_account_details(total_holding, account_data)
+        if overview_metrics is not None:
+            display_key_metrics(overview_metrics["total_remaining"], overview_metrics["total_saved"])
+        if 'cashflow_data' in data:
+            display_cashflow_overview(data['cashflow_data'])
+        if overview_metrics is not None and 'account_data' in data:
+            display_bank_account_details(overview_metrics["total_holding"], data['account_data'])
         
     with BudgetOverview_tab:
-        unallocated_number = float(total_remaining.replace('Rp', '').replace('.', '').replace(',00', ''))
-        display_budgeting_chart(category_df, unallocated_number)
+        if overview_metrics is not None and 'category_budget' in data:
+            display_budgeting_chart(data['category_budget'], overview_metrics["total_remaining"])
+
+    with Trends_tab:
+        if 'transactions' in data:
+            display_trends(year)
+
+    # Warm the neighbouring months and the other pages while this one is read
+    dm.schedule_prefetch(year, month)
 
 
 # ---------------------------
 # Run App
 # ---------------------------
 if __name__ == "__main__":
-    main()
+    with page_render("home"):
+        main()
@@ -0,0 +1,299 @@
+"""Serve the pages to N concurrent simulated users and report what one process sustains
+
+    python -m benchmarks.bench_load --users 1 5 20
+    python -m benchmarks.bench_load --users 10 --views 12 --baseline load_results.json
+
+Every user is an AppTest session driven from its own thread. All of them
+run in this process, so they share the process-wide caches, backend and
+background workers the way the sessions of one container do. A user walks
+Home, Category Drilldown, Financial Goals and Input Transaction in turn and
+moves to the next month after each round. The sheets are a LocalBackend
+replica of synthetic data, so nothing reaches Google. Caches start cold for
+every user count.
+
+Reported per user count and page:
+
+- throughput:    page views per second, all users together
+- p50/p95/p99:   render time of one page view
+- backend calls: reads and writes per page view, the quota a view costs; the
+                 total for all pages also counts background prefetching
+- payload:       bytes sent to the browser per page view, charts and grids included
+- memory:        resident memory gained per session
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from pathlib import Path
+import polars as pl
+import streamlit as st
+from streamlit.runtime import Runtime
+from streamlit.runtime.scriptrunner_utils.script_run_context import ScriptRunContext
+from streamlit.runtime.secrets import Secrets
+from streamlit.testing.v1 import AppTest
+from benchmarks import synthetic
+from utility import instrumentation
+from utility.backend import LocalBackend
+from utility.utils import MONTH_LIST
+
+ROOT = Path(__file__).resolve().parent.parent
+PAGES = {
+    'home': '0_Home.py',
+    'category_drilldown': 'pages/1_Category_Drilldown.py',
+    'financial_goals': 'pages/2_Financial_Goals.py',
+    'input_transaction': 'pages/3_Input_Transaction.py',
+}
+SHEET_IDS = {'money_tracker': 1, 'monthly_planning': 2, 'anual_planning': 3, 'accounts_state': 4}
+
+def build_replica(path: Path, n_rows: int, year: int):
+    """Local copy of the spreadsheet with `n_rows` synthetic transactions over two years"""
+    budget_plan = synthetic.generate_budget_plan()
+    sheets = {
+        'money_tracker': ('Money Tracker', synthetic.generate_transactions(n_rows, budget_plan, year=year, n_years=2)),
+        'monthly_planning': ('Monthly Planning', budget_plan),
+        'anual_planning': ('Annual Planning', synthetic.generate_anual_budget(budget_plan, year=year)),
+        'accounts_state': ('Accounts State', synthetic.generate_accounts()),
+    }
+    backend = LocalBackend(str(path))
+    for sheet_key, (title, frame) in sheets.items():
+        backend.import_sheet(SHEET_IDS[sheet_key], title, synthetic.to_values(frame))
+
+def use_secrets(workdir: Path, replica: Path):
+    """Point the app at the replica and at empty local state in `workdir`
+
+    AppTest swaps the module-level `st.secrets` around every run, which
+    races between concurrent users, so the secrets are set once for the
+    whole process and AppTest is given none.
+    """
+    secrets = Secrets()
+    secrets._secrets = {
+        'data_backend': 'local',
+        'local_backend_path': str(replica),
+        'snapshot_dir': str(workdir / 'snapshot'),
+        'outbox_path': str(workdir / 'outbox.db'),
+        # Backend calls are counted from the in-memory metrics
+        'instrumentation': True,
+        'metrics_log': '',
+        'insert_url': '',
+        'sheets_id': SHEET_IDS,
+    }
+    st.secrets = secrets
+
+def resident_bytes() -> int:
+    """Current resident set size of this process"""
+    try:
+        with open('/proc/self/statm') as statm:
+            return int(statm.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except OSError:
+        import resource
+
+        # Peak rather than current outside Linux; kilobytes on Linux, bytes on macOS
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == 'darwin' else peak * 1024
+
+def share_runtime():
+    """Let concurrent AppTest runs share one Runtime
+
+    Every run installs its own mock Runtime and removes it when done, which
+    would pull it from under the users still running. Once one was
+    installed, the latest one is kept for everybody.
+    """
+    latest = []
+
+    def instance(cls) -> Runtime:
+        if cls._instance is not None:
+            latest[:] = [cls._instance]
+        if not latest:
+            raise RuntimeError("Runtime hasn't been created!")
+        return latest[0]
+
+    Runtime.instance = classmethod(instance)
+    Runtime.exists = classmethod(lambda cls: cls._instance is not None or bool(latest))
+
+# ---------------------------
+# Payload accounting
+# ---------------------------
+_payload = defaultdict(int)
+_payload_lock = threading.Lock()
+_enqueue = ScriptRunContext.enqueue
+
+def _counting_enqueue(self, msg):
+    # Every AppTest reports the same session id, so sessions are told apart by their state
+    with _payload_lock:
+        _payload[id(self.session_state._state)] += msg.ByteSize()
+    _enqueue(self, msg)
+
+def payload_bytes(app: AppTest) -> int:
+    """Bytes this session has sent to the browser so far"""
+    with _payload_lock:
+        return _payload[id(app._session_state._state)]
+
+# ---------------------------
+# Simulated users
+# ---------------------------
+def view(app: AppTest, page: str, year: int, month: str) -> dict:
+    """Render one page for a user; returns its timing and what it cost"""
+    app.session_state['selected_year'] = year
+    app.session_state['global_selected_month'] = month
+    sent = payload_bytes(app)
+    start = time.perf_counter()
+    app.switch_page(PAGES[page]).run()
+    seconds = time.perf_counter() - start
+    events = app.session_state['_render_metrics'] if '_render_metrics' in app.session_state else []
+    return {
+        'page': page,
+        'seconds': seconds,
+        'backend_calls': sum(1 for event in events if event['kind'] in ('backend', 'api')),
+        'payload_bytes': payload_bytes(app) - sent,
+        'errors': [str(exception.value) for exception in app.exception],
+    }
+
+def simulate_user(user: int, app: AppTest, views: int, year: int, start: threading.Barrier, results: list):
+    # Users start a month apart, so their neighbouring months overlap
+    start.wait()
+    for index in range(views):
+        month = MONTH_LIST[(user + index // len(PAGES)) % 12]
+        results.append(view(app, list(PAGES)[index % len(PAGES)], year, month))
+
+def new_session(timeout: float) -> AppTest:
+    app = AppTest.from_file(str(ROOT / PAGES['home']), default_timeout=timeout)
+    # The theme component only answers in a browser
+    app.session_state['base_theme'] = 'light'
+    return app
+
+def warm_up(year: int, timeout: float):
+    """Render every page once, so modules imported on first use are not counted as session memory"""
+    app = new_session(timeout)
+    for page in PAGES:
+        view(app, page, year, MONTH_LIST[0])
+
+def run_users(n_users: int, views: int, year: int, timeout: float) -> list[dict]:
+    """Cold-start the app and serve `views` page views to each of `n_users` users at once"""
+    st.cache_data.clear()
+    st.cache_resource.clear()
+
+    apps = [new_session(timeout) for _ in range(n_users)]
+    rss_before = resident_bytes()
+    results = [[] for _ in apps]
+    start = threading.Barrier(n_users + 1)
+    threads = [
+        threading.Thread(target=simulate_user, args=(user, app, views, year, start, results[user]), daemon=True)
+        for user, app in enumerate(apps)
+    ]
+    for thread in threads:
+        thread.start()
+    start.wait()
+    began = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - began
+    rss_per_session = (resident_bytes() - rss_before) / n_users
+    # Calls made by background work (prefetch, outbox) belong to no page view
+    calls = [event for event in instrumentation.get_metrics_store().snapshot() if event['kind'] in ('backend', 'api')]
+
+    page_views = pl.DataFrame([result for user_results in results for result in user_results])
+    summary = page_views.group_by('page', maintain_order=True).agg(
+        pl.len().alias('views'),
+        *(pl.col('seconds').quantile(q, 'linear').alias(f'p{int(q * 100)}') for q in (0.5, 0.95, 0.99)),
+        pl.col('backend_calls').mean(),
+        pl.col('payload_bytes').mean(),
+        pl.col('errors').list.explode().drop_nulls().unique().alias('errors'),
+    )
+    records = [{'users': n_users, **row} for row in summary.iter_rows(named=True)]
+    records.append({
+        'users': n_users,
+        'page': 'all',
+        'views': page_views.height,
+        'throughput': page_views.height / elapsed,
+        'p50': page_views['seconds'].quantile(0.5, 'linear'),
+        'p95': page_views['seconds'].quantile(0.95, 'linear'),
+        'p99': page_views['seconds'].quantile(0.99, 'linear'),
+        'backend_calls': len(calls) / page_views.height,
+        'background_calls': sum(1 for event in calls if event['page'] is None),
+        'payload_bytes': page_views['payload_bytes'].mean(),
+        'rss_per_session': rss_per_session,
+        'errors': [],
+    })
+    return records
+
+def print_records(records: list[dict]):
+    for record in records:
+        throughput = f"{record['throughput']:7.1f} views/s" if 'throughput' in record else ' ' * 15
+        memory = f"  {record['rss_per_session'] / 2 ** 20:7.1f} MiB/session" if 'rss_per_session' in record else ''
+        print(
+            f"{record['users']:4d} users  {record['page']:20s} {throughput}"
+            f"  p50 {record['p50'] * 1000:7.0f} ms  p95 {record['p95'] * 1000:7.0f} ms  p99 {record['p99'] * 1000:7.0f} ms"
+            f"  {record['backend_calls']:6.2f} calls/view  {record['payload_bytes'] / 1024:7.1f} KiB/view{memory}"
+        )
+        for error in record['errors']:
+            print(f"{'':11s}! {error}")
+
+def find_regressions(results: list[dict], baseline: list[dict], tolerance: float) -> list[str]:
+    """Pages that got slower at p95 or make more backend calls per view than the baseline"""
+    previous = {(r["users"], r["page"]): r for r in baseline}
+    regressions = []
+    for result in results:
+        before = previous.get((result["users"], result["page"]))
+        if before is None:
+            continue
+        if result["p95"] > before["p95"] * (1 + tolerance):
+            regressions.append(
+                f"{result['page']} @ {result['users']} users: p95 {before['p95'] * 1000:.0f} ms -> {result['p95'] * 1000:.0f} ms"
+            )
+        if result["backend_calls"] > before["backend_calls"] * (1 + tolerance):
+            regressions.append(
+                f"{result['page']} @ {result['users']} users: "
+                f"{before['backend_calls']:.1f} -> {result['backend_calls']:.1f} backend calls per view"
+            )
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, nargs='+', default=[1, 5, 20])
+    parser.add_argument('--views', type=int, default=8, help="page views per user")
+    parser.add_argument('--rows', type=int, default=20_000, help="transactions in the synthetic Money Tracker")
+    parser.add_argument('--year', type=int, default=2025)
+    parser.add_argument('--timeout', type=float, default=120)
+    parser.add_argument('--output', default='load_results.json')
+    parser.add_argument('--baseline')
+    parser.add_argument('--tolerance', type=float, default=0.25)
+    args = parser.parse_args()
+
+    ScriptRunContext.enqueue = _counting_enqueue
+    share_runtime()
+    results = []
+    with tempfile.TemporaryDirectory(prefix='bench_load_') as workdir:
+        replica = Path(workdir) / 'sheets.db'
+        build_replica(replica, args.rows, args.year)
+        use_secrets(Path(workdir), replica)
+        warm_up(args.year, args.timeout)
+        for n_users in args.users:
+            run_dir = Path(workdir) / f"users_{n_users}"
+            run_dir.mkdir()
+            use_secrets(run_dir, replica)
+            records = run_users(n_users, args.views, args.year, args.timeout)
+            print_records(records)
+            results.extend(records)
+
+    Path(args.output).write_text(json.dumps({
+        "python": platform.python_version(),
+        "streamlit": st.__version__,
+        "created_at": time.strftime('%Y-%m-%dT%H:%M:%S'),
+        "rows": args.rows,
+        "views": args.views,
+        "results": results,
+    }, indent=2))
+
+    if args.baseline:
+        regressions = find_regressions(results, json.loads(Path(args.baseline).read_text())["results"], args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        sys.exit(1 if regressions else 0)
+
+if __name__ == "__main__":
+    main()
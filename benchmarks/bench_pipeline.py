@@ -0,0 +1,158 @@
+"""Time the data pipeline behind every page on synthetic datasets
+
+    python -m benchmarks.bench_pipeline --sizes 1000 100000 1000000
+    python -m benchmarks.bench_pipeline --baseline bench_results.json
+
+Results are written as JSON, one record per (page, stage, rows). With
+`--baseline` the run exits non-zero when a stage got slower than the
+baseline by more than `--tolerance`.
+"""
+import argparse
+import datetime
+import json
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+import polars as pl
+from benchmarks import synthetic
+from utility import archive, budget, goals
+from utility import datamanager as dm
+from utility import snapshot
+from utility import visualization as viz
+from utility.aggregates import AggregateCube
+from utility.schema import SHEET_SCHEMAS, values_to_frame
+from utility.utils import MONTH_LIST, currency_to_number, format_rupiah
+
+def measure(func, repeat: int) -> dict:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return {"median": statistics.median(timings), "min": min(timings), "repeat": repeat}
+
+def build_stages(n_rows: int, month: str, year: int, workdir: Path) -> list[tuple[str, str, callable]]:
+    """(page, stage, callable) triples, each timing one step a page performs on render"""
+    budget_plan = synthetic.generate_budget_plan()
+    transactions = synthetic.generate_transactions(n_rows, budget_plan, year=year)
+    overview = synthetic.generate_category_overview(transactions, budget_plan, month, year)
+
+    # Grids as the backend returns them
+    transaction_values = synthetic.to_values(transactions)
+    formatted_transactions = pl.DataFrame(
+        synthetic.to_values(transactions, unformatted=False)[1:], schema=transactions.columns, orient='row'
+    )
+    overview_values = synthetic.to_values(overview)
+    anual_budget = synthetic.generate_anual_budget(budget_plan, year=year)
+    goal_values = synthetic.to_values(anual_budget)
+    account_values = synthetic.to_values(synthetic.generate_accounts())
+
+    partitions = workdir / f"money_tracker_{n_rows}"
+    snapshot.write_partitions(transactions, partitions, 'Transaction Date')
+    category_df = dm.parse_category_overview(overview)
+    filtered = dm.filter_transactions(snapshot.scan_partitions(partitions), year, month, ['Kebutuhan Harian']).collect()
+    cube = AggregateCube.from_transactions(snapshot.scan_partitions(partitions))
+    month_number = MONTH_LIST.index(month) + 1
+    categories = budget_plan['Budget Category'].unique(maintain_order=True).to_list()
+    as_of = datetime.date(year, MONTH_LIST.index(month) + 1, 15)
+    rollups = archive.monthly_rollup(transactions)
+    scenarios = goals.scenario_frame([0.5, 0.75, 1.0, 1.25, 1.5, 2.0], extra=100_000)
+    breakdown = category_df.filter(pl.col('Diff') != 0).with_columns(viz.budget_remarks(0))
+    item_activity = cube.item_activity(year, month_number, 'Kebutuhan Harian')
+    # The *_spec stages build the spec every time; *_spec_memo_hit is a rerun with unchanged data
+    viz.create_budget_breakdown_chart(breakdown)
+    viz.create_stacked_bar_chart(item_activity)
+
+    return [
+        ('home', 'parse_accounts', lambda: dm.parse_account_data(
+            values_to_frame(account_values, SHEET_SCHEMAS["accounts_state"])
+        )),
+        ('home', 'parse_category_overview', lambda: dm.parse_category_overview(
+            values_to_frame(overview_values, SHEET_SCHEMAS["category_overview"])
+        )),
+        ('home', 'budget_vs_actual_all_months', lambda: budget.category_overview(
+            budget.budget_vs_actual(budget_plan, rollups)
+        )),
+        ('home', 'budget_breakdown_spec', lambda: viz.create_budget_breakdown_chart.__wrapped__(breakdown)),
+        ('home', 'budget_breakdown_spec_memo_hit', lambda: viz.create_budget_breakdown_chart(breakdown)),
+        ('drilldown', 'parse_transactions', lambda: values_to_frame(transaction_values, SHEET_SCHEMAS["money_tracker"])),
+        ('drilldown', 'currency_to_number_formatted', lambda: formatted_transactions.with_columns(
+            currency_to_number('Transasction Amount'), currency_to_number('Cashflow')
+        )),
+        ('drilldown', 'format_rupiah', lambda: filtered.with_columns(format_rupiah(pl.col(pl.Float64)))),
+        ('drilldown', 'write_partitions', lambda: snapshot.write_partitions(transactions, partitions, 'Transaction Date')),
+        ('drilldown', 'query_month_category', lambda: dm.filter_transactions(
+            snapshot.scan_partitions(partitions), year, month, ['Kebutuhan Harian']
+        ).collect()),
+        ('drilldown', 'build_aggregate_cube', lambda: AggregateCube.from_transactions(snapshot.scan_partitions(partitions))),
+        ('drilldown', 'stacked_chart_spec', lambda: viz.create_stacked_bar_chart.__wrapped__(item_activity)),
+        ('drilldown', 'stacked_chart_spec_memo_hit', lambda: viz.create_stacked_bar_chart(item_activity)),
+        ('drilldown', 'grid_to_pandas', lambda: filtered.to_pandas()),
+        ('drilldown', 'grid_first_page', lambda: dm.transaction_page(
+            snapshot.scan_partitions(partitions), 'Timestamp', page_size=100
+        ).to_pandas()),
+        ('drilldown', 'full_to_pandas', lambda: transactions.to_pandas()),
+        ('goals', 'parse_anual_budget', lambda: dm.parse_anual_budget(
+            values_to_frame(goal_values, SHEET_SCHEMAS["anual_planning"])
+        )),
+        ('goals', 'project_goals', lambda: goals.project_goals(
+            anual_budget, goals.observed_contributions(rollups, as_of), as_of, scenarios
+        )),
+        ('input', 'budget_item_lookup', lambda: [
+            budget_plan.filter(pl.col('Budget Category').eq(category))['Budget Item'].to_list()
+            for category in categories
+        ]),
+    ]
+
+def run(sizes: list[int], repeat: int, month: str, year: int) -> list[dict]:
+    results = []
+    with tempfile.TemporaryDirectory(prefix='bench_pipeline_') as workdir:
+        for n_rows in sizes:
+            for page, stage, func in build_stages(n_rows, month, year, Path(workdir)):
+                result = {"page": page, "stage": stage, "rows": n_rows, **measure(func, repeat)}
+                print(f"{page:10s} {stage:30s} {n_rows:>9,d} rows  {result['median'] * 1000:10.2f} ms")
+                results.append(result)
+    return results
+
+def find_regressions(results: list[dict], baseline: list[dict], tolerance: float) -> list[str]:
+    previous = {(r["page"], r["stage"], r["rows"]): r["median"] for r in baseline}
+    regressions = []
+    for result in results:
+        before = previous.get((result["page"], result["stage"], result["rows"]))
+        if before and result["median"] > before * (1 + tolerance):
+            regressions.append(
+                f"{result['page']}/{result['stage']} @ {result['rows']:,d} rows: "
+                f"{before * 1000:.2f} ms -> {result['median'] * 1000:.2f} ms"
+            )
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1_000, 100_000, 1_000_000])
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--month', default='Maret')
+    parser.add_argument('--year', type=int, default=2025)
+    parser.add_argument('--output', default='bench_results.json')
+    parser.add_argument('--baseline')
+    parser.add_argument('--tolerance', type=float, default=0.25)
+    args = parser.parse_args()
+
+    results = run(args.sizes, args.repeat, args.month, args.year)
+    Path(args.output).write_text(json.dumps({
+        "python": platform.python_version(),
+        "polars": pl.__version__,
+        "created_at": time.strftime('%Y-%m-%dT%H:%M:%S'),
+        "results": results,
+    }, indent=2))
+
+    if args.baseline:
+        regressions = find_regressions(results, json.loads(Path(args.baseline).read_text())["results"], args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        sys.exit(1 if regressions else 0)
+
+if __name__ == "__main__":
+    main()
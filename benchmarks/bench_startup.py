@@ -0,0 +1,146 @@
+"""Time a cold start of every page: module imports and time to first paint
+
+    python -m benchmarks.bench_startup
+    python -m benchmarks.bench_startup --baseline startup_results.json
+
+Each measurement runs in a fresh interpreter, like the first request after
+the container scaled from zero:
+
+- import:      loading the page module (its imports and definitions) without running it
+- first_paint: from interpreter start until the page sends its first element
+- render:      from interpreter start until the page finished rendering
+
+Pages are rendered with Streamlit's AppTest, using the secrets of the
+working directory; run it next to a `.streamlit/secrets.toml` with
+`data_backend = "local"` to keep Google Sheets out of the numbers.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+PAGES = {
+    'home': '0_Home.py',
+    'category_drilldown': 'pages/1_Category_Drilldown.py',
+    'financial_goals': 'pages/2_Financial_Goals.py',
+    'input_transaction': 'pages/3_Input_Transaction.py',
+}
+
+# Run in the child interpreter; prints one JSON object
+IMPORT_PROBE = """
+import importlib.util, json, sys, time
+start = time.perf_counter()
+spec = importlib.util.spec_from_file_location("page", sys.argv[1])
+try:
+    spec.loader.exec_module(importlib.util.module_from_spec(spec))
+    errors = []
+except Exception as error:
+    errors = [f"import: {error!r}"]
+print(json.dumps({"import": time.perf_counter() - start, "errors": errors}))
+"""
+
+RENDER_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+from streamlit.runtime.scriptrunner_utils.script_run_context import ScriptRunContext
+from streamlit.testing.v1 import AppTest
+
+first_paint = []
+enqueue = ScriptRunContext.enqueue
+
+def timed_enqueue(self, msg):
+    if not first_paint and msg.HasField("delta"):
+        first_paint.append(time.perf_counter() - start)
+    enqueue(self, msg)
+
+ScriptRunContext.enqueue = timed_enqueue
+app = AppTest.from_file(sys.argv[1], default_timeout=float(sys.argv[2]))
+app.run()
+print(json.dumps({
+    "first_paint": first_paint[0] if first_paint else None,
+    "render": time.perf_counter() - start,
+    "errors": [str(exception.value) for exception in app.exception],
+}))
+"""
+
+def probe(code: str, *args: str) -> dict:
+    env = {**os.environ, "PYTHONPATH": os.pathsep.join(filter(None, [str(ROOT), os.environ.get("PYTHONPATH")]))}
+    completed = subprocess.run(
+        [sys.executable, "-c", code, *args], capture_output=True, text=True, env=env, check=True
+    )
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+def measure_page(page: str, repeat: int, timeout: float) -> list[dict]:
+    path = str(ROOT / PAGES[page])
+    timings = {"import": [], "first_paint": [], "render": []}
+    errors = []
+    for _ in range(repeat):
+        imported = probe(IMPORT_PROBE, path)
+        timings["import"].append(imported["import"])
+        rendered = probe(RENDER_PROBE, path, str(timeout))
+        errors = imported["errors"] + rendered["errors"]
+        for stage in ("first_paint", "render"):
+            if rendered[stage] is not None:
+                timings[stage].append(rendered[stage])
+    return [
+        {
+            "page": page,
+            "stage": stage,
+            "median": statistics.median(values),
+            "min": min(values),
+            "repeat": len(values),
+            "errors": errors,
+        }
+        for stage, values in timings.items() if values
+    ]
+
+def find_regressions(results: list[dict], baseline: list[dict], tolerance: float) -> list[str]:
+    previous = {(r["page"], r["stage"]): r["median"] for r in baseline}
+    regressions = []
+    for result in results:
+        before = previous.get((result["page"], result["stage"]))
+        if before and result["median"] > before * (1 + tolerance):
+            regressions.append(
+                f"{result['page']}/{result['stage']}: {before * 1000:.0f} ms -> {result['median'] * 1000:.0f} ms"
+            )
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--pages', nargs='+', choices=list(PAGES), default=list(PAGES))
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--timeout', type=float, default=120)
+    parser.add_argument('--output', default='startup_results.json')
+    parser.add_argument('--baseline')
+    parser.add_argument('--tolerance', type=float, default=0.25)
+    args = parser.parse_args()
+
+    results = []
+    for page in args.pages:
+        page_results = measure_page(page, args.repeat, args.timeout)
+        for result in page_results:
+            print(f"{page:20s} {result['stage']:12s} {result['median'] * 1000:10.0f} ms")
+        for error in page_results[-1]["errors"] if page_results else []:
+            print(f"{'':20s} ! {error}")
+        results.extend(page_results)
+
+    Path(args.output).write_text(json.dumps({
+        "python": platform.python_version(),
+        "created_at": time.strftime('%Y-%m-%dT%H:%M:%S'),
+        "results": results,
+    }, indent=2))
+
+    if args.baseline:
+        regressions = find_regressions(results, json.loads(Path(args.baseline).read_text())["results"], args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        sys.exit(1 if regressions else 0)
+
+if __name__ == "__main__":
+    main()
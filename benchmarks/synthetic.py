@@ -0,0 +1,133 @@
+"""Synthetic family-finance datasets shaped like the Google Sheets worksheets
+
+The generators return typed frames. `to_values` renders them as the grid a
+backend returns: unformatted (numbers and serial dates, as the loaders
+request them) or formatted the way the sheet displays them, with
+Rupiah amounts (`Rp 1.234.567,00`) and `%d/%m/%Y` dates.
+"""
+import datetime
+import numpy as np
+import polars as pl
+from utility.schema import SERIAL_EPOCH
+from utility.utils import MONTH_LIST, format_rupiah
+
+MONEY_TRACKER_COLUMNS = [
+    'Timestamp', 'Transaction Date', 'Cash Flow Type', 'Transasction Amount', 'Cashflow',
+    'Account', 'Budget Category', 'Budget Item', 'Notes',
+]
+OWNERS = ['Abi', 'Nisa']
+ACCOUNTS = ['BCA', 'Mandiri', 'BSI', 'Jago', 'GoPay', 'Cash']
+
+def generate_budget_plan(n_categories: int = 24, items_per_category: int = 8, seed: int = 0) -> pl.DataFrame:
+    """Monthly Planning: one planned amount per (category, item)"""
+    rng = np.random.default_rng(seed)
+    categories = ['Gaji', 'Tabungan', 'Kebutuhan Harian'] + [f'Kategori {i:02d}' for i in range(3, n_categories)]
+    flow_types = {'Gaji': 'Income', 'Tabungan': 'Savings'}
+
+    rows = []
+    for category in categories[:n_categories]:
+        items = [f'{category} - Item {i:02d}' for i in range(items_per_category)]
+        if category == 'Tabungan':
+            items[0] = 'Tabungan Haji'
+        for item in items:
+            rows.append((flow_types.get(category, 'Expense'), category, item))
+
+    return pl.DataFrame(
+        {
+            'Cash Flow Type': [row[0] for row in rows],
+            'Budget Category': [row[1] for row in rows],
+            'Budget Item': [row[2] for row in rows],
+            'Planned Amount': rng.integers(5, 500, len(rows)) * 10_000.0,
+        }
+    )
+
+def generate_transactions(n_rows: int, budget_plan: pl.DataFrame, year: int = 2025, n_years: int = 1, seed: int = 0) -> pl.DataFrame:
+    """Money Tracker: `n_rows` transactions in insertion order, spread over `n_years` ending in `year`"""
+    rng = np.random.default_rng(seed)
+    first_day = datetime.datetime(year - n_years + 1, 1, 1)
+    n_seconds = (datetime.datetime(year + 1, 1, 1) - first_day).days * 86_400
+
+    offsets = np.sort(rng.integers(0, n_seconds, n_rows))
+    plan_index = rng.integers(0, budget_plan.height, n_rows)
+    amounts = np.round(rng.lognormal(11, 1.2, n_rows), -2)
+
+    plan = budget_plan[plan_index]
+    signs = plan['Cash Flow Type'].replace_strict({'Income': 1, 'Expense': -1, 'Savings': -1}).to_numpy()
+    owners = rng.choice(OWNERS, n_rows)
+    accounts = rng.choice(ACCOUNTS, n_rows)
+
+    timestamps = pl.select(pl.lit(first_day) + pl.duration(seconds=pl.Series(offsets))).to_series()
+    return pl.DataFrame(
+        {
+            'Timestamp': timestamps,
+            'Transaction Date': timestamps.dt.date(),
+            'Cash Flow Type': plan['Cash Flow Type'],
+            'Transasction Amount': amounts,
+            'Cashflow': amounts * signs,
+            'Account': [f'{owner} - {account}' for owner, account in zip(owners, accounts)],
+            'Budget Category': plan['Budget Category'],
+            'Budget Item': plan['Budget Item'],
+            'Notes': '',
+        }
+    ).select(MONEY_TRACKER_COLUMNS)
+
+def generate_anual_budget(budget_plan: pl.DataFrame, year: int = 2025, seed: int = 0) -> pl.DataFrame:
+    """Annual Planning: one financial goal per savings item"""
+    rng = np.random.default_rng(seed)
+    goals = budget_plan.filter(pl.col('Cash Flow Type').eq('Savings'))['Budget Item'].to_list()
+    targets = rng.integers(10, 500, len(goals)) * 1_000_000.0
+    achieved = np.round(targets * rng.uniform(0, 1, len(goals)), -3)
+    due_dates = [
+        datetime.date(year + int(offset), int(month), 1)
+        for offset, month in zip(rng.integers(1, 10, len(goals)), rng.integers(1, 13, len(goals)))
+    ]
+    return pl.DataFrame(
+        {
+            'Budget Item': goals,
+            'Financial Goal': targets,
+            'Currenlty Achieved': achieved,
+            'Remaining': targets - achieved,
+            'Due Date': due_dates,
+            'Funds Achieved': achieved >= targets,
+        }
+    )
+
+def generate_accounts(seed: int = 0) -> pl.DataFrame:
+    """Accounts State: one balance per owner and account"""
+    rng = np.random.default_rng(seed)
+    aliases = [f'{owner} - {account}' for owner in OWNERS for account in ACCOUNTS]
+    return pl.DataFrame(
+        {
+            'Alias': aliases,
+            'Account Balance': np.round(rng.lognormal(15, 1, len(aliases)), -3),
+        }
+    )
+
+def generate_category_overview(transactions: pl.DataFrame, budget_plan: pl.DataFrame, month: str, year: int = 2025) -> pl.DataFrame:
+    """Monthly overview category table, as the sheet formulas would compute it for `month`"""
+    planned = budget_plan.group_by('Cash Flow Type', 'Budget Category', maintain_order=True).agg(
+        pl.col('Planned Amount').sum().alias('Planned')
+    )
+    actual = transactions.filter(
+        pl.col('Transaction Date').dt.year().eq(year),
+        pl.col('Transaction Date').dt.month().eq(MONTH_LIST.index(month) + 1),
+    ).group_by('Budget Category').agg(pl.col('Transasction Amount').sum().alias('Actual'))
+
+    return planned.join(actual, on='Budget Category', how='left').fill_null(0).with_columns(
+        (pl.col('Actual') - pl.col('Planned')).alias('Difference')
+    )
+
+def to_values(frame: pl.DataFrame, unformatted: bool = True) -> list[list]:
+    """Header row plus data rows, the grid returned by `SheetsBackend.get_values`"""
+    if unformatted:
+        rendered = frame.with_columns(
+            (pl.col(pl.Date, pl.Datetime).cast(pl.Datetime) - pl.lit(SERIAL_EPOCH)).dt.total_milliseconds() / 86_400_000
+        )
+    else:
+        rendered = frame.with_columns(
+            format_rupiah(pl.col(pl.Float64)),
+            pl.col(pl.Date).dt.strftime('%d/%m/%Y'),
+            pl.col(pl.Datetime).dt.strftime('%d/%m/%Y %H:%M:%S'),
+            pl.col(pl.Boolean).replace_strict({True: 'TRUE', False: 'FALSE'}, return_dtype=pl.Utf8),
+        )
+    return [rendered.columns] + [list(row) for row in rendered.iter_rows()]
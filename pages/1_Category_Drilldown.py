@@ -1,93 +1,103 @@
-import datetime
-from st_aggrid import AgGrid, GridOptionsBuilder
 import streamlit as st
-import pandas as pd
 import polars as pl
-from utility import get_st_theme, global_data_selector
+from utility import get_st_theme, global_data_selector, show_load_errors
 from utility import datamanager as dm
+from utility.instrumentation import page_render, timed
 from utility import visualization as viz
-from streamlit_echarts import st_echarts
+from utility.aggregates import ZOOM_LEVELS
+from utility.utils import MONTH_LIST, format_rupiah, rupiah
 
 # ---------------------------
 # Section 1: Data Functions
 # ---------------------------
-def get_category_dropdown(category_df: pd.DataFrame):
+def get_category_dropdown(category_df: pl.DataFrame):
     return category_df['Budget Category'].to_list()
 
-def filter_month_transaction_by_category(df: pl.DataFrame, category: str, month: str, year: int):
-    month_list = ['Januari', 'Februari', 'Maret', 'April', 'Mei', 'Juni', 'Juli', 'Agustus', 'September', 'Oktober', 'November', 'Desember']
-    return df.filter(
-        pl.col('Budget Category').eq(category),
-        pl.col('Transaction Date').ge(datetime.date(year, month_list.index(month) + 1, 1)),
-        pl.col('Transaction Date').lt(datetime.date(year, month_list.index(month) + 2, 1))
-    )
+def filter_month_transaction_by_category(category: str, month: str, year: int) -> pl.LazyFrame:
+    # Only the partition holding `month` is read, and only when the grid asks for a page
+    return dm.query_transactions(year, month, categories=[category]).select(pl.exclude(['']))
 
 # ---------------------------
 # Section 2: UI Display Functions
 # ---------------------------
+@timed('section')
 def display_budget_category_selectbox(category: list):
     return st.selectbox(
         "Select a Budget Category", 
         category,
-        index=category.index('Kebutuhan Harian')
+        index=category.index('Kebutuhan Harian') if 'Kebutuhan Harian' in category else 0
     )
 
-def display_category_metrics(category_df: pd.DataFrame, selected_category: str, unallocated: int):
+@timed('section')
+def display_category_metrics(category_df: pl.DataFrame, selected_category: str, unallocated: int):
+    from streamlit_echarts import st_echarts
+
     # Show metrics
     st.markdown(f"### 💼 {selected_category}")
     col1, col2, col3 = st.columns(3)
-    row = category_df[category_df['Budget Category'] == selected_category].iloc[0]
+    row = category_df.row(by_predicate=pl.col('Budget Category').eq(selected_category), named=True)
 
-    planned = f"Rp {row["Planned"]:,.0f}"
-    actual = f"Rp {row["Actual"]:,.0f}"
-    col1.metric("Planned", planned.replace(',','.') + ',00')
-    col2.metric("Actual", actual.replace(',','.') + ',00')
-    col3.metric("Difference", row["Difference"])
+    col1.metric("Planned", rupiah(row["Planned"]))
+    col2.metric("Actual", rupiah(row["Actual"]))
+    col3.metric("Difference", rupiah(row["Difference"]))
 
     chart = viz.create_horizontal_bar_chart(row["Planned"], row["Actual"])
     st_echarts(options=chart, height="200px", renderer="svg", theme=get_st_theme())
 
-def display_stacked_chart(filtered_df: pl.DataFrame):
-    dxd_activity = filtered_df.pivot(
-        on='Budget Item',
-        index=['Transaction Date'],
-        values='Transasction Amount',
-        aggregate_function='sum'
-    ).with_columns(
-        pl.col('Transaction Date').dt.to_string()
-    ).fill_null(0).sort('Transaction Date').to_pandas().set_index('Transaction Date')
-
-    options = {
-        "tooltip": {"trigger": "axis"},
-        "legend": {"data": list(dxd_activity.columns)},
-        "xAxis": {"type": "category", "data": list(dxd_activity.index)},
-        "yAxis": {"type": "value"},
-        "series": [
-            {
-                "name": col,
-                "type": "bar",
-                "stack": "total",
-                "emphasis": {"focus": "series"},
-                "data": dxd_activity[col].tolist(),
-            } for col in dxd_activity.columns
-        ]
-    }
+@timed('section')
+def display_stacked_chart(category: str, month: str, year: int):
+    from streamlit_echarts import st_echarts
 
     st.subheader('💸 Day-to-day Transaction Summary')
+    zoom = st.radio("Zoom", list(ZOOM_LEVELS), horizontal=True, label_visibility="collapsed")
+    item_activity = dm.load_aggregate_cube().item_activity(year, MONTH_LIST.index(month) + 1, category, zoom)
+    options = viz.create_stacked_bar_chart(item_activity)
+
     st_echarts(options=options, height="400px", theme=get_st_theme())
 
-def display_transaction_table(data: pl.DataFrame):
-    # with st.expander("# 📋 Transaction Details"):
-    df = data.select(
-        pl.exclude([''])
-    ).to_pandas()
+def reset_grid_page():
+    st.session_state['grid_page'] = 1
+
+@timed('section')
+def display_transaction_table(transactions: pl.LazyFrame):
+    from st_aggrid import AgGrid, GridOptionsBuilder
+
+    # Sorting, filtering and grouping run in Polars; the grid only receives the current page
     st.markdown("### 📋 Transaction Details")
+    columns = transactions.collect_schema().names()
+    col1, col2, col3, col4 = st.columns([3, 2, 2, 1])
+    search = col1.text_input("Search", key='grid_search', on_change=reset_grid_page, placeholder="Filter any text column")
+    group_by = col2.selectbox(
+        "Group by", [None] + [c for c in dm.GROUPABLE_COLUMNS if c in columns],
+        format_func=lambda column: column or "No grouping", key='grid_group_by', on_change=reset_grid_page
+    )
+    sort_by = col3.selectbox(
+        "Sort by", columns, index=columns.index('Timestamp') if 'Timestamp' in columns else 0,
+        key='grid_sort_by', on_change=reset_grid_page
+    )
+    descending = col4.toggle("Desc", value=True, key='grid_descending', on_change=reset_grid_page)
+
+    transactions = dm.search_transactions(transactions, search)
+    if group_by:
+        groups = dm.group_transactions(transactions, group_by)
+        st.dataframe(groups.with_columns(format_rupiah(pl.col(pl.Float64))), hide_index=True, height=200)
+        group = st.selectbox(
+            f"Show transactions for {group_by}", groups[group_by].to_list(), key='grid_group', on_change=reset_grid_page
+        )
+        transactions = transactions.filter(pl.col(group_by).eq(group))
+
+    total = dm.count_transactions(transactions)
+    col1, col2, col3 = st.columns([1, 1, 2])
+    page_size = col1.selectbox("Rows per page", [50, 100, 250, 500], index=1, key='grid_page_size', on_change=reset_grid_page)
+    pages = max(1, -(-total // page_size))
+    page = col2.number_input("Page", min_value=1, max_value=pages, key='grid_page')
+    col3.caption(f"{total:,d} transactions, page {page} of {pages}")
+
+    df = dm.transaction_page(transactions, sort_by, descending, page - 1, page_size).to_pandas()
     gb = GridOptionsBuilder.from_dataframe(df)
-    gb.configure_default_column(groupable=True, enableRowGroup=True, editable=False)
+    gb.configure_default_column(sortable=False, filter=False, editable=False)
     gb.configure_grid_options(domLayout='normal')
-    grid_options = gb.build()
-
-    AgGrid(df, gridOptions=grid_options, enable_enterprise_modules=True, height=400)
+    AgGrid(df, gridOptions=gb.build(), height=400)
 
 
 
@@ -98,21 +108,25 @@ def main():
     st.title("🔍 Category Drilldown")
     
     year, month, worksheet = global_data_selector()
-    category_df = dm.load_category_budget_data()
-    metrics = dm.load_overview_metrics()
-    unallocated_number = float(metrics['total_remaining'].replace('Rp', '').replace('.', '').replace(',00', ''))
+    # The transaction sync runs alongside the budget computation
+    data, errors = dm.prefetch(year, month, *dm.PAGE_DATASETS['category_drilldown'])
+    if errors:
+        show_load_errors(errors)
+        st.stop()
 
+    category_df = data['category_budget']
     category = display_budget_category_selectbox(get_category_dropdown(category_df))
-    display_category_metrics(category_df, category, unallocated_number)
+    display_category_metrics(category_df, category, data['overview_metrics']['total_remaining'])
 
-    transaction_data = dm.load_transaction()
-    category_transaction_data = filter_month_transaction_by_category(transaction_data, category, month, year)
+    category_transaction_data = filter_month_transaction_by_category(category, month, year)
 
-    display_stacked_chart(category_transaction_data)
+    display_stacked_chart(category, month, year)
     display_transaction_table(category_transaction_data)
+    dm.schedule_prefetch(year, month)
 
 # ---------------------------
 # Run App
 # ---------------------------
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    with page_render("category_drilldown"):
+        main()
\ No newline at end of file
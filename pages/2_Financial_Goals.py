@@ -1,51 +1,92 @@
-import datetime
-from dateutil.relativedelta import relativedelta
 import streamlit as st
-import pandas as pd
 import polars as pl
-from utility import get_st_theme, global_data_selector
+from utility import global_data_selector, show_load_errors
 from utility import datamanager as dm
-from utility import visualization as viz
-from streamlit_echarts import st_echarts
+from utility import goals
+from utility.instrumentation import page_render, timed
+from utility.utils import format_rupiah, rupiah
 
 # ---------------------------
 # Section 1: Data Functions
 # ---------------------------
-def get_category_dropdown(finance_goal_df: pd.DataFrame):
-    return finance_goal_df['Budget Item'].to_list()
+def get_category_dropdown(projections: pl.DataFrame):
+    return projections['Budget Item'].unique(maintain_order=True).to_list()
 
 # ---------------------------
 # Section 2: UI Display Functions
 # ---------------------------
+@timed('section')
+def display_scenario_controls() -> tuple[pl.DataFrame, int]:
+    with st.expander("⚙️ What-if scenarios"):
+        col1, col2, col3 = st.columns(3)
+        levels = col1.multiselect(
+            "Contribution level (share of observed)",
+            [0.5, 0.75, 1.0, 1.25, 1.5, 2.0],
+            default=goals.DEFAULT_LEVELS,
+            format_func=lambda level: f"{level:.0%}",
+        )
+        extra = col2.number_input("Extra per goal each month", min_value=0, value=0, step=100_000)
+        window = col3.slider("Observed over the last (months)", 1, 24, 6)
+    return goals.scenario_frame(sorted(levels) or [1.0], extra), window
+
+@timed('section')
+def display_goal_overview(projections: pl.DataFrame):
+    st.subheader("📋 All Goals")
+    baseline = projections.filter(pl.col('Scenario').eq(projections['Scenario'][0]))
+    col1, col2, col3 = st.columns(3)
+    col1.metric("🎯 Total Goals", rupiah(baseline['Financial Goal'].sum()))
+    col2.metric("💰 Total Saved", rupiah(baseline['Currenlty Achieved'].sum()))
+    col3.metric("📆 Needed Each Month", rupiah(baseline['Required Contribution'].sum()))
+
+    st.dataframe(
+        baseline.select(
+            'Budget Item', 'Progress', 'Due Date', 'Months Left',
+            format_rupiah(pl.col('Financial Goal', 'Remaining', 'Required Contribution', 'Observed Contribution')),
+            'Projected Completion', 'On Track',
+        ),
+        column_config={'Progress': st.column_config.ProgressColumn("Progress", min_value=0, max_value=1)},
+        use_container_width=True,
+        hide_index=True,
+    )
+
+@timed('section')
+def display_scenario_comparison(projections: pl.DataFrame):
+    st.subheader("🔮 Scenario Comparison")
+    # One column per scenario, computed for every goal in a single pivot
+    surplus = projections.pivot('Scenario', index='Budget Item', values='Surplus', maintain_order=True)
+    completion = projections.pivot('Scenario', index='Budget Item', values='Projected Completion', maintain_order=True)
+    st.caption("Surplus (+) or shortfall (-) at the due date")
+    st.dataframe(surplus.with_columns(format_rupiah(pl.col(pl.Float64))), use_container_width=True, hide_index=True)
+    st.caption("Projected completion date")
+    st.dataframe(completion, use_container_width=True, hide_index=True)
+
+@timed('section')
 def display_finance_goal_selectbox(category: list):
     return st.selectbox(
-        "Select a Budget Category", 
+        "Select a Budget Category",
         category,
-        index=category.index('Tabungan Haji')
+        index=category.index('Tabungan Haji') if 'Tabungan Haji' in category else 0
     )
 
-def display_finance_goal_metrics(finance_goal_df: pd.DataFrame, selected_category: str):
-    def months_difference(date1, date2):
-        """Calculates the difference between two dates in months."""
-        
-        delta = relativedelta(date2, date1)
-        return delta.years * 12 + delta.months
-    
+@timed('section')
+def display_finance_goal_metrics(projections: pl.DataFrame, selected_category: str):
     st.subheader(f"📌 {selected_category}")
-    row = finance_goal_df[finance_goal_df['Budget Item'] == selected_category].iloc[0]
+    goal = projections.filter(pl.col('Budget Item').eq(selected_category))
+    row = goal.row(0, named=True)
     col1, col2, col3 = st.columns(3)
 
-    target = f'Rp {row['Financial Goal']:,.0f}'
-    achieved = f'Rp {row['Currenlty Achieved']:,.0f}'
-    remaining = f'Rp {row['Remaining']:,.0f}'
-
-    col1.metric("🎯 Financial Goal", target.replace(',','.') + ',00')
-    col2.metric("💰 Saved", achieved.replace(',','.') + ',00')
-    col3.metric("🧮 Remaining", remaining.replace(',','.') + ',00')
+    col1.metric("🎯 Financial Goal", rupiah(row['Financial Goal']))
+    col2.metric("💰 Saved", rupiah(row['Currenlty Achieved']))
+    col3.metric("🧮 Remaining", rupiah(row['Remaining']))
 
-    due_date = row['Due Date']
-    st.write(f"🗓️ **Deadline**: {due_date.date()} ({months_difference(datetime.date.today(), due_date)} months left)")
-    st.write(f"📈 **Progress**: {100 * (row['Currenlty Achieved']/row['Financial Goal'])}%")
+    st.write(f"🗓️ **Deadline**: {row['Due Date']} ({row['Months Left']} months left)")
+    st.write(f"📈 **Progress**: {row['Progress']:.1%}")
+    st.write(f"💸 **Needed each month**: {rupiah(row['Required Contribution'])}")
+    st.dataframe(
+        goal.select('Scenario', format_rupiah(pl.col('Contribution', 'Surplus')), 'Projected Completion', 'On Track'),
+        use_container_width=True,
+        hide_index=True,
+    )
 
 # ---------------------------
 # Section 3: Main App Logic
@@ -55,13 +96,27 @@ def main():
     st.title("🎯 Financial Goals Progress")
 
     year, month, worksheet = global_data_selector()
-    anual_budget = dm.load_anual_budget()
-    category = display_finance_goal_selectbox(get_category_dropdown(anual_budget))
-    display_finance_goal_metrics(anual_budget.to_pandas(), category)
+    # The savings rate is observed from the synced transactions
+    _, errors = dm.prefetch(year, month, *dm.PAGE_DATASETS['financial_goals'])
+    if errors:
+        show_load_errors(errors)
+        st.stop()
+
+    scenarios, window = display_scenario_controls()
+    projections = dm.project_goals(scenarios, window)
+    if projections.is_empty():
+        st.info("No open financial goals.")
+    else:
+        display_goal_overview(projections)
+        display_scenario_comparison(projections)
+        category = display_finance_goal_selectbox(get_category_dropdown(projections))
+        display_finance_goal_metrics(projections, category)
+    dm.schedule_prefetch(year, month)
 
 
 # ---------------------------
 # Run App
 # ---------------------------
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    with page_render("financial_goals"):
+        main()
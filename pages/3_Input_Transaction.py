@@ -1,44 +1,87 @@
-import datetime
-import gspread
+import sqlite3
 import streamlit as st
-import pandas as pd
 import polars as pl
-from utility import get_st_theme, global_data_selector
+from utility import global_data_selector, show_load_errors
 from utility import datamanager as dm
+from utility.instrumentation import page_render, timed
+from utility.utils import rupiah
 from datetime import date, datetime
-import requests
-
-def input_google_sheet() -> requests.Response:
-    url = st.secrets['insert_url']
-    payload = {
-        "sheetName": "Money Tracker",
-        "rowData": [
-            datetime.now().strftime('%d/%m/%Y %H:%M:%S'),
-            st.session_state.tx_date.strftime("%d/%m/%Y"),
-            st.session_state.cashflow_type,
-            st.session_state.amount,
-            '',
-            st.session_state.account,
-            st.session_state.category,
-            st.session_state.subcategory,
-            st.session_state.notes
-            ]
-    }
-    
-    st.session_state.insert_response = requests.post(url, json=payload)
-    return st.session_state.insert_response
+
+def input_google_sheet() -> str | None:
+    row = dm.transaction_row(
+        st.session_state.tx_date,
+        st.session_state.cashflow_type,
+        st.session_state.amount,
+        st.session_state.account,
+        st.session_state.category,
+        st.session_state.subcategory,
+        st.session_state.notes
+    )
+
+    # Saved to the local log; the background worker writes it to the sheet
+    try:
+        dm.submit_transactions([row])
+        st.session_state.insert_error = None
+    except sqlite3.Error as error:
+        st.session_state.insert_error = f"Could not save the transaction: {error}"
+    return st.session_state.insert_error
+
+@timed('section')
+def show_sync_status():
+    pending = dm.get_outbox().pending_count()
+    worker = dm.get_outbox_worker()
+    if not pending:
+        st.caption("☁️ Every transaction is in the sheet.")
+        return
+    col1, col2 = st.columns([3, 1])
+    col1.caption(f"⏳ {pending} transactions waiting to sync. They already count in the dashboards.")
+    if worker.last_error:
+        col1.caption(f"Last sync attempt failed: {worker.last_error}")
+    col2.button("Sync now", on_click=worker.wake)
+
+@timed('section')
+def show_bulk_entry(montly_budget: pl.DataFrame):
+    with st.expander("📥 Bulk Entry (CSV)"):
+        st.caption(f"Columns: {', '.join(dm.RECEIPT_COLUMNS)}. Dates as dd/mm/yyyy.")
+        uploaded = st.file_uploader("Upload receipts", type=['csv'])
+        pasted = st.text_area("...or paste them here", height=150)
+        text = uploaded.getvalue().decode('utf-8') if uploaded is not None else pasted
+        if not text.strip():
+            return
+
+        try:
+            receipts, rejected = dm.parse_receipts(text, montly_budget)
+        except (ValueError, pl.exceptions.PolarsError) as error:
+            st.error(f"Could not read the receipts: {error}")
+            return
+
+        st.dataframe(receipts, use_container_width=True, hide_index=True)
+        if not rejected.is_empty():
+            st.warning(f"{rejected.height} rows skipped: unknown budget item, bad date or amount")
+            st.dataframe(rejected, use_container_width=True, hide_index=True)
+
+        if st.button(f"Submit {receipts.height} Transactions", disabled=receipts.is_empty()):
+            try:
+                dm.submit_transactions(dm.receipts_to_rows(receipts))
+                st.success(f"✅ {receipts.height} transactions recorded! Total {rupiah(receipts['Amount'].sum())}")
+            except sqlite3.Error as error:
+                st.error(f"Could not save the transactions: {error}")
 
 
 def show_transaction_form():
     st.title("➕ Add Transaction")
     year, month, worksheet = global_data_selector()
-    budget_category = dm.load_category_budget_data()['Budget Category'].to_list()
-    montly_budget = dm.load_monthly_budget_data()
+    data, errors = dm.prefetch(year, month, *dm.PAGE_DATASETS['input_transaction'])
+    if errors:
+        show_load_errors(errors)
+        st.stop()
+    budget_category = data['category_budget']['Budget Category'].to_list()
+    montly_budget = data['monthly_budget']
     
     def get_budget_item(budget_category):
         return montly_budget.filter(pl.col('Budget Category').eq(budget_category))['Budget Item'].to_list()
             
-    account_data = pl.from_pandas(dm.load_account_data()).with_columns(
+    account_data = data['account_data'].with_columns(
         account_list = pl.col('Owner') + pl.lit(' - ') + pl.col('Account')
     )
     account_list = account_data['account_list'].to_list()
@@ -54,8 +97,10 @@ def show_transaction_form():
     st.session_state.cashflow_type = st.radio("Cashflow Type", ['Expense', 'Savings', 'Income'])
 
     # Category and Subcategory
-    if 'transaction_category' not in st.session_state:
-        st.session_state.transaction_category = budget_category[budget_category.index('Kebutuhan Harian')]
+    if st.session_state.get('transaction_category') not in budget_category:
+        st.session_state.transaction_category = (
+            'Kebutuhan Harian' if 'Kebutuhan Harian' in budget_category else budget_category[0]
+        )
 
     
     def on_category_change():
@@ -86,22 +131,23 @@ def show_transaction_form():
         on_click=input_google_sheet
     )
     if submitted:
-        if st.session_state.insert_response.status_code == 200:
+        if st.session_state.insert_error is None:
             st.success("✅ Transaction recorded!")
             st.write("### Summary:")
             st.write({
                 "Date": st.session_state.tx_date,
-                "Amount": f"Rp {st.session_state.amount:,}",
+                "Amount": rupiah(st.session_state.amount),
                 "Category": st.session_state.category,
                 "Subcategory": st.session_state.subcategory,
                 "Account": st.session_state.account,
                 "Notes": st.session_state.notes
             })
         else:
-            st.write(
-                st.session_state.insert_response.json
-            )
-        # st.cache_data.clear()
+            st.error(st.session_state.insert_error)
+
+    show_bulk_entry(montly_budget)
+    show_sync_status()
+    dm.schedule_prefetch(year, month)
             
 
 # Run the form
@@ -110,4 +156,5 @@ def main():
 
 # ---------------------------
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    with page_render("input_transaction"):
+        main()
\ No newline at end of file
@@ -0,0 +1,30 @@
+import pytest
+import streamlit as st
+from streamlit.runtime.secrets import Secrets
+from utility.backend import LocalBackend
+
+SHEET_IDS = {'money_tracker': 1, 'monthly_planning': 2, 'anual_planning': 3, 'accounts_state': 4}
+
+@pytest.fixture
+def app_secrets(tmp_path, monkeypatch):
+    """Secrets pointing the data layer at a LocalBackend and local state under `tmp_path`"""
+    secrets = Secrets()
+    secrets._secrets = {
+        'data_backend': 'local',
+        'local_backend_path': str(tmp_path / 'sheets.db'),
+        'snapshot_dir': str(tmp_path / 'snapshot'),
+        'outbox_path': str(tmp_path / 'outbox.db'),
+        'metrics_log': '',
+        'insert_url': '',
+        'sheets_id': SHEET_IDS,
+    }
+    monkeypatch.setattr(st, 'secrets', secrets)
+    st.cache_resource.clear()
+    st.cache_data.clear()
+    yield secrets._secrets
+    st.cache_resource.clear()
+    st.cache_data.clear()
+
+@pytest.fixture
+def local_backend(app_secrets) -> LocalBackend:
+    return LocalBackend(app_secrets['local_backend_path'])
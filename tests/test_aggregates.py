@@ -0,0 +1,37 @@
+import polars as pl
+import pytest
+from benchmarks import synthetic
+from tests.conftest import SHEET_IDS
+from utility import datamanager as dm
+from utility.aggregates import AggregateCube
+from utility.utils import MONTH_LIST
+
+@pytest.fixture
+def cube(local_backend) -> AggregateCube:
+    plan = synthetic.generate_budget_plan(n_categories=5, items_per_category=3)
+    transactions = synthetic.generate_transactions(600, plan, year=2025)
+    local_backend.import_sheet(SHEET_IDS['money_tracker'], 'Money Tracker', synthetic.to_values(transactions))
+    return dm.load_aggregate_cube()
+
+def test_cube_totals_match_the_transaction_query(cube):
+    totals = dm.scan_transactions().group_by('year', 'month', 'Budget Category').agg(
+        pl.col('Transasction Amount').sum()
+    ).collect()
+    assert totals.height > 12
+    for year, month, category, total in totals.iter_rows():
+        queried = dm.query_transactions(year, MONTH_LIST[month - 1], [category]).collect()
+        assert queried['Transasction Amount'].sum() == pytest.approx(total)
+        assert cube.category_total(year, month, category) == pytest.approx(total)
+
+def test_activity_and_month_to_date_add_up_to_the_total(cube):
+    for (year, month, category), total in cube.monthly_totals.items():
+        for zoom in ('Daily', 'Weekly'):
+            activity = cube.item_activity(year, month, category, zoom)
+            assert activity.drop('Transaction Date').sum_horizontal().sum() == pytest.approx(total)
+        month_to_date = cube.category_month_to_date(year, month, category)
+        assert month_to_date['Month To Date'][-1] == pytest.approx(total)
+
+def test_months_without_transactions_are_empty(cube):
+    assert cube.category_total(1999, 1, 'Gaji') == 0.0
+    assert cube.item_activity(1999, 1, 'Gaji').is_empty()
+    assert cube.category_month_to_date(1999, 1, 'Gaji') is None
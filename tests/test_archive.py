@@ -0,0 +1,52 @@
+import polars as pl
+import pytest
+from benchmarks import synthetic
+from tests.conftest import SHEET_IDS
+from utility import archive, snapshot
+from utility import datamanager as dm
+
+@pytest.fixture
+def transactions(local_backend) -> pl.DataFrame:
+    plan = synthetic.generate_budget_plan(n_categories=5, items_per_category=3)
+    transactions = synthetic.generate_transactions(800, plan, year=2025, n_years=2)
+    local_backend.import_sheet(SHEET_IDS['money_tracker'], 'Money Tracker', synthetic.to_values(transactions))
+    dm.sync_transactions()
+    return transactions
+
+def freeze(year: int):
+    archive.freeze_year(year, snapshot.scan_partitions(snapshot.partition_dir("money_tracker")))
+    dm.invalidate_transactions()
+
+def amount_of(frame: pl.DataFrame | pl.LazyFrame) -> float:
+    return frame.lazy().select(pl.col('Transasction Amount').sum()).collect().item()
+
+def test_frozen_year_reads_back_unchanged(transactions):
+    march = dm.query_transactions(2024, 'Maret').collect()
+    rollups = dm.load_monthly_rollups()
+    freeze(2024)
+
+    assert archive.archived_years() == [2024]
+    assert archive.live_years() == [2025]
+    assert archive.available_years() == [2024, 2025]
+    frozen = transactions.filter(pl.col('Transaction Date').dt.year().eq(2024))
+    assert archive.scan_archive().collect().height == frozen.height
+    assert archive.read_rollups().equals(archive.monthly_rollup(frozen))
+
+    # The live sheet still holds 2024, which is read from the archive only
+    assert dm.query_transactions(2024, 'Maret').collect().sort('Timestamp').equals(march.sort('Timestamp'))
+    assert dm.scan_transactions().collect().height == transactions.height
+    assert amount_of(dm.scan_transactions()) == pytest.approx(amount_of(transactions))
+    assert dm.load_monthly_rollups().sort(archive.ROLLUP_KEYS).equals(rollups.sort(archive.ROLLUP_KEYS))
+
+def test_archived_year_is_immutable(transactions):
+    freeze(2024)
+    with pytest.raises(FileExistsError):
+        freeze(2024)
+    assert archive.scan_archive().collect().height == transactions.filter(
+        pl.col('Transaction Date').dt.year().eq(2024)
+    ).height
+
+def test_year_without_transactions_is_not_frozen(transactions):
+    with pytest.raises(ValueError):
+        freeze(2023)
+    assert archive.archived_years() == []
@@ -0,0 +1,17 @@
+from utility.backend import insert_session
+
+def insert_retry():
+    return insert_session().get_adapter('https://script.google.com').max_retries
+
+def test_insert_retries_requests_that_were_not_applied():
+    retry = insert_retry()
+    assert retry.is_retry('POST', 429)
+    assert retry.is_retry('POST', 503)
+    assert retry.connect > 0
+
+def test_insert_never_resends_a_request_that_may_have_been_applied():
+    retry = insert_retry()
+    # The script may have appended the row before the 5xx or the timeout
+    for status in (500, 502, 504):
+        assert not retry.is_retry('POST', status)
+    assert retry.read == 0
@@ -0,0 +1,62 @@
+import datetime
+import polars as pl
+from utility import archive, budget
+
+PLAN = pl.DataFrame({
+    'Cash Flow Type': ['Income', 'Expense', 'Expense', 'Savings'],
+    'Budget Category': ['Gaji', 'Kebutuhan Harian', 'Kebutuhan Harian', 'Tabungan'],
+    'Budget Item': ['Gaji Abi', 'Belanja', 'Listrik', 'Tabungan Haji'],
+    'Planned Amount': [10_000_000.0, 3_000_000.0, 500_000.0, 2_000_000.0],
+})
+
+def transactions(*rows: tuple) -> pl.DataFrame:
+    return pl.DataFrame(
+        rows,
+        schema={
+            'Transaction Date': pl.Date, 'Cash Flow Type': pl.Utf8, 'Budget Category': pl.Utf8,
+            'Budget Item': pl.Utf8, 'Transasction Amount': pl.Float64,
+        },
+        orient='row',
+    ).with_columns(pl.col('Transasction Amount').alias('Cashflow'))
+
+ROLLUPS = archive.monthly_rollup(transactions(
+    (datetime.date(2024, 12, 1), 'Income', 'Gaji', 'Gaji Abi', 10_000_000.0),
+    (datetime.date(2024, 12, 31), 'Expense', 'Kebutuhan Harian', 'Belanja', 1_250_000.0),
+    (datetime.date(2025, 1, 1), 'Expense', 'Kebutuhan Harian', 'Belanja', 400_000.0),
+    (datetime.date(2025, 1, 2), 'Expense', 'Kebutuhan Harian', 'Belanja', 100_000.0),
+    (datetime.date(2025, 1, 3), 'Savings', 'Tabungan', 'Tabungan Haji', 2_500_000.0),
+    # Spent without a plan
+    (datetime.date(2025, 1, 4), 'Expense', 'Hiburan', 'Bioskop', 75_000.0),
+))
+
+def category(items: pl.DataFrame, year: int, month: int) -> dict:
+    overview = budget.category_overview(items).filter(pl.col('year').eq(year), pl.col('month').eq(month))
+    return {row['Budget Category']: (row['Planned'], row['Actual'], row['Difference']) for row in overview.iter_rows(named=True)}
+
+def test_budget_vs_actual_per_category_across_the_year_boundary():
+    items = budget.budget_vs_actual(PLAN, ROLLUPS)
+    assert category(items, 2024, 12) == {
+        'Gaji': (10_000_000.0, 10_000_000.0, 0.0),
+        'Kebutuhan Harian': (3_500_000.0, 1_250_000.0, -2_250_000.0),
+        'Tabungan': (2_000_000.0, 0.0, -2_000_000.0),
+    }
+    assert category(items, 2025, 1) == {
+        'Gaji': (10_000_000.0, 0.0, -10_000_000.0),
+        'Kebutuhan Harian': (3_500_000.0, 500_000.0, -3_000_000.0),
+        'Tabungan': (2_000_000.0, 2_500_000.0, 500_000.0),
+        'Hiburan': (0.0, 75_000.0, 75_000.0),
+    }
+
+def test_months_without_transactions_are_planned_only():
+    items = budget.budget_vs_actual(PLAN, ROLLUPS, pl.DataFrame({'year': [2025], 'month': [2]}))
+    assert items['Planned'].sum() == PLAN['Planned Amount'].sum()
+    assert items['Actual'].sum() == 0
+
+def test_month_totals():
+    totals = budget.month_totals(budget.budget_vs_actual(PLAN, ROLLUPS)).sort('year', 'month')
+    assert totals.rows() == [(2024, 12, 0.0, 8_750_000.0), (2025, 1, 2_500_000.0, -3_075_000.0)]
+
+def test_cash_flow_is_ordered_and_formatted():
+    cash_flow = budget.cash_flow(budget.budget_vs_actual(PLAN, ROLLUPS)).filter(pl.col('month').eq(1))
+    assert cash_flow['Cash Flow'].to_list() == ['Income', 'Expense', 'Savings']
+    assert cash_flow['Actual'].to_list() == ['Rp 0,00', 'Rp 575.000,00', 'Rp 2.500.000,00']
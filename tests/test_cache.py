@@ -0,0 +1,33 @@
+import pytest
+from utility import cache
+from utility.cache import cached_dataset
+
+def test_monthly_loader_is_cached_per_month(app_secrets):
+    calls = []
+
+    @cached_dataset('overview_metrics', monthly=True)
+    def load(year, month):
+        calls.append((year, month))
+        return {'month': month}
+
+    assert load(2025, 'Maret') == {'month': 'Maret'}
+    assert load(2025, 'Maret') == {'month': 'Maret'}
+    assert load(2025, 'April') == {'month': 'April'}
+    assert calls == [(2025, 'Maret'), (2025, 'April')]
+
+    load.invalidate(2025, 'Maret')
+    load(2025, 'Maret')
+    load(2025, 'April')
+    assert calls == [(2025, 'Maret'), (2025, 'April'), (2025, 'Maret')]
+
+    cache.invalidate('overview_metrics')
+    load(2025, 'April')
+    assert calls[-1] == (2025, 'April')
+
+def test_monthly_loader_needs_a_month(app_secrets):
+    @cached_dataset('overview_metrics', monthly=True)
+    def load(year, month):
+        return month
+
+    with pytest.raises(TypeError):
+        load()
@@ -0,0 +1,67 @@
+import datetime
+import polars as pl
+from utility import goals
+
+AS_OF = datetime.date(2025, 4, 15)
+
+# 600.000 saved for the Hajj every month from October to March, plus one older month outside the window
+ROLLUPS = pl.DataFrame(
+    [(2024, 9, 'Savings', 'Tabungan Haji', 5_000_000.0)]
+    + [(year, month, 'Savings', 'Tabungan Haji', 600_000.0) for year, month in
+       [(2024, 10), (2024, 11), (2024, 12), (2025, 1), (2025, 2), (2025, 3)]]
+    + [(2025, 3, 'Expense', 'Belanja', 900_000.0)],
+    schema=['year', 'month', 'Cash Flow Type', 'Budget Item', 'Amount'],
+    orient='row',
+)
+GOALS = pl.DataFrame({
+    'Budget Item': ['Tabungan Haji', 'Dana Darurat'],
+    'Financial Goal': [10_000_000.0, 5_000_000.0],
+    'Currenlty Achieved': [4_000_000.0, 1_000_000.0],
+    'Remaining': [6_000_000.0, 4_000_000.0],
+    'Due Date': [datetime.date(2025, 10, 31), datetime.date(2025, 12, 31)],
+})
+
+def project(scenarios: pl.DataFrame) -> dict:
+    contributions = goals.observed_contributions(ROLLUPS, AS_OF)
+    projection = goals.project_goals(GOALS, contributions, AS_OF, scenarios)
+    return {(row['Scenario'], row['Budget Item']): row for row in projection.iter_rows(named=True)}
+
+def test_observed_contribution_averages_the_complete_months():
+    contributions = goals.observed_contributions(ROLLUPS, AS_OF)
+    assert contributions.rows() == [('Tabungan Haji', 600_000.0)]
+
+def test_projection_at_the_observed_rate_and_double():
+    projection = project(goals.scenario_frame([1.0, 2.0]))
+    hajj = projection[('100% of observed', 'Tabungan Haji')]
+    assert hajj['Months Left'] == 6
+    assert hajj['Required Contribution'] == 1_000_000.0
+    assert hajj['Months To Complete'] == 10
+    assert hajj['Projected Completion'] == datetime.date(2026, 2, 15)
+    assert hajj['Surplus'] == -2_400_000.0
+    assert not hajj['On Track']
+
+    doubled = projection[('200% of observed', 'Tabungan Haji')]
+    assert doubled['Contribution'] == 1_200_000.0
+    assert doubled['Projected Completion'] == datetime.date(2025, 9, 15)
+    assert doubled['Surplus'] == 1_200_000.0
+    assert doubled['On Track']
+
+def test_what_if_extra_contribution():
+    projection = project(goals.scenario_frame([1.0], extra=400_000))
+    hajj = projection[('100% of observed + 400,000', 'Tabungan Haji')]
+    assert hajj['Contribution'] == 1_000_000.0
+    assert hajj['Projected Completion'] == datetime.date(2025, 10, 15)
+    assert hajj['Surplus'] == 0.0
+    assert hajj['On Track']
+
+    # Nothing saved for it so far, so only the extra counts
+    emergency = projection[('100% of observed + 400,000', 'Dana Darurat')]
+    assert emergency['Observed Contribution'] == 0.0
+    assert emergency['Months To Complete'] == 10
+    assert not emergency['On Track']
+
+def test_goal_without_any_contribution_is_never_completed():
+    emergency = project(goals.scenario_frame([1.0]))[('100% of observed', 'Dana Darurat')]
+    assert emergency['Months To Complete'] is None
+    assert emergency['Projected Completion'] is None
+    assert not emergency['On Track']
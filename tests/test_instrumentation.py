@@ -0,0 +1,33 @@
+import json
+from utility import instrumentation
+from utility.instrumentation import MetricsStore
+
+def event(n: int) -> dict:
+    return {"ts": n, "page": None, "kind": "loader", "name": f"load_{n}", "seconds": 0.01}
+
+def test_log_is_rotated_past_max_bytes(tmp_path):
+    path = tmp_path / 'metrics.jsonl'
+    store = MetricsStore(str(path), max_bytes=1000)
+    for n in range(40):
+        store.add(event(n))
+    assert store.flush(5)
+
+    rotated = path.with_name('metrics.jsonl.1')
+    assert rotated.stat().st_size >= 1000
+    assert path.stat().st_size < 1000
+    names = [json.loads(line)['name'] for line in (rotated.read_text() + path.read_text()).splitlines()]
+    assert names[-1] == 'load_39'
+    assert len(store.snapshot()) == 40
+
+def test_without_a_log_events_stay_in_memory(tmp_path):
+    store = MetricsStore(None, max_events=3)
+    for n in range(5):
+        store.add(event(n))
+    assert store.flush()
+    assert [e['name'] for e in store.snapshot()] == ['load_2', 'load_3', 'load_4']
+    assert not list(tmp_path.iterdir())
+
+def test_instrumentation_is_off_by_default(app_secrets):
+    assert not instrumentation.enabled()
+    instrumentation.record('loader', 'load_account_data', 0.01)
+    assert instrumentation.get_metrics_store().snapshot() == []
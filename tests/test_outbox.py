@@ -0,0 +1,128 @@
+import datetime
+import pytest
+from benchmarks import synthetic
+from tests.conftest import SHEET_IDS
+from utility import datamanager as dm
+from utility.backend import BackendError, LocalBackend
+from utility.outbox import Outbox
+
+MONEY_TRACKER = SHEET_IDS['money_tracker']
+
+class IdleWorker:
+    """Stands in for the outbox worker, so each test drains the outbox itself"""
+
+    def wake(self):
+        pass
+
+
+@pytest.fixture
+def money_tracker(local_backend, monkeypatch):
+    monkeypatch.setattr(dm, 'get_outbox_worker', IdleWorker)
+    local_backend.import_sheet(MONEY_TRACKER, 'Money Tracker', [synthetic.MONEY_TRACKER_COLUMNS])
+    local_backend.append_rows(MONEY_TRACKER, [row(1000)])
+    dm.sync_transactions()
+    return local_backend
+
+def row(amount: float, day: int = 1, notes: str = '') -> list:
+    return dm.transaction_row(
+        datetime.date(2025, 3, day), 'Expense', amount, 'Abi - Cash', 'Kebutuhan Harian', 'Kebutuhan Harian - Item 00', notes
+    )
+
+def march_amounts() -> list[float]:
+    return sorted(dm.query_transactions(2025, 'Maret').collect()['Transasction Amount'].to_list())
+
+def test_synced_rows_update_the_local_data_in_place(money_tracker):
+    dm.submit_transactions([row(2000)])
+    rollups = dm.load_monthly_rollups()
+    assert dm.sync_outbox() is False
+
+    # No re-sync from the sheet: the cached results were kept
+    assert dm.sync_transactions.is_cached()
+    assert dm.load_monthly_rollups.is_cached()
+    assert dm.load_monthly_rollups().equals(rollups)
+    assert march_amounts() == [1000.0, 2000.0]
+    assert len(money_tracker.get_values(MONEY_TRACKER)) == 3
+
+def test_pending_rows_show_up_before_they_sync(money_tracker):
+    dm.submit_transactions([row(2000), row(3000, day=2)])
+    assert march_amounts() == [1000.0, 2000.0, 3000.0]
+    assert dm.load_monthly_rollups()['Amount'].sum() == 6000.0
+    # Nothing reached the sheet yet
+    assert len(money_tracker.get_values(MONEY_TRACKER)) == 2
+
+def test_outbox_drains_oldest_first_in_batches(money_tracker):
+    for amount in (2000, 3000, 4000):
+        dm.submit_transactions([row(amount, notes=str(amount))])
+    assert dm.sync_outbox(batch_size=2) is True
+    assert dm.sync_outbox(batch_size=2) is False
+    notes = [values[-1] for values in money_tracker.get_values(MONEY_TRACKER)[2:]]
+    assert notes == ['2000', '3000', '4000']
+    assert march_amounts() == [1000.0, 2000.0, 3000.0, 4000.0]
+
+def test_keys_survive_a_restart(app_secrets, local_backend):
+    local_backend.import_sheet(MONEY_TRACKER, 'Money Tracker', [synthetic.MONEY_TRACKER_COLUMNS])
+    keys = Outbox(app_secrets['outbox_path']).enqueue(MONEY_TRACKER, [row(2000), row(3000)])
+
+    reopened = Outbox(app_secrets['outbox_path'])
+    entries = reopened.pending()
+    assert [entry['key'] for entry in entries] == keys
+    assert entries[0]['row'] == row(2000)
+    # Sending the same keys again appends nothing
+    for _ in range(2):
+        local_backend.append_rows(MONEY_TRACKER, [entry['row'] for entry in entries], keys)
+    assert len(local_backend.get_values(MONEY_TRACKER)) == 3
+
+def test_failure_after_the_sheet_took_the_rows_is_reconciled(money_tracker, monkeypatch):
+    append_rows = LocalBackend.append_rows
+
+    def append_then_time_out(self, *args):
+        # The rows land in the sheet, but the answer never arrives
+        append_rows(self, *args)
+        monkeypatch.setattr(LocalBackend, 'append_rows', append_rows)
+        raise BackendError("Read timed out")
+
+    monkeypatch.setattr(LocalBackend, 'append_rows', append_then_time_out)
+    dm.submit_transactions([row(2000)])
+    with pytest.raises(BackendError):
+        dm.sync_outbox()
+    assert dm.get_outbox().pending()[0]['attempts'] == 1
+
+    assert dm.sync_outbox() is False
+    assert dm.get_outbox().pending_count() == 0
+    assert len(money_tracker.get_values(MONEY_TRACKER)) == 3
+    assert march_amounts() == [1000.0, 2000.0]
+
+def test_identical_rows_are_reconciled_one_for_one(money_tracker, monkeypatch):
+    append_rows = LocalBackend.append_rows
+
+    def append_first_then_fail(self, sheet_id, rows, keys=None):
+        append_rows(self, sheet_id, rows[:1], keys[:1])
+        monkeypatch.setattr(LocalBackend, 'append_rows', append_rows)
+        raise BackendError("Read timed out")
+
+    monkeypatch.setattr(LocalBackend, 'append_rows', append_first_then_fail)
+    # Two identical receipts, only one of which reached the sheet
+    dm.submit_transactions([row(2000), row(2000)])
+    with pytest.raises(BackendError):
+        dm.sync_outbox()
+    assert dm.sync_outbox() is False
+    assert len(money_tracker.get_values(MONEY_TRACKER)) == 4
+    assert march_amounts() == [1000.0, 2000.0, 2000.0]
+
+def test_submitting_recomputes_only_the_months_it_touches(money_tracker):
+    plan = synthetic.generate_budget_plan(n_categories=4, items_per_category=2)
+    money_tracker.import_sheet(SHEET_IDS['monthly_planning'], 'Monthly Planning', synthetic.to_values(plan))
+    for month in ('Maret', 'April'):
+        dm.load_category_budget_data(2025, month)
+
+    dm.submit_transactions([row(2000)])
+    assert not dm.load_category_budget_data.is_cached(2025, 'Maret')
+    assert dm.load_category_budget_data.is_cached(2025, 'April')
+    assert dm.load_budget_items.is_cached()
+    items = dm.load_budget_items()
+
+    # The same answer as computing everything again
+    dm.load_monthly_rollups.invalidate()
+    dm.invalidate_budget()
+    assert dm.load_budget_items().sort('year', 'month', 'Budget Item').equals(items.sort('year', 'month', 'Budget Item'))
+    assert dm.load_monthly_rollups()['Amount'].sum() == 3000.0
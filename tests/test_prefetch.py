@@ -0,0 +1,55 @@
+import threading
+import time
+from utility.prefetch import Prefetcher
+
+def wait_idle(prefetcher: Prefetcher, timeout: float = 5):
+    deadline = time.monotonic() + timeout
+    while prefetcher.pending() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert not prefetcher.pending()
+
+def test_completed_tasks_run_once_per_data_version():
+    prefetcher = Prefetcher(workers=1)
+    runs = []
+    tasks = {('budget', 2025, 'Maret'): lambda: runs.append('Maret'), ('rollups',): lambda: runs.append('rollups')}
+
+    prefetcher.schedule('a', tasks, version=1)
+    wait_idle(prefetcher)
+    prefetcher.schedule('a', tasks, version=1)
+    prefetcher.schedule('b', tasks, version=1)
+    wait_idle(prefetcher)
+    assert sorted(runs) == ['Maret', 'rollups']
+
+    prefetcher.schedule('a', tasks, version=2)
+    wait_idle(prefetcher)
+    assert sorted(runs) == ['Maret', 'Maret', 'rollups', 'rollups']
+
+def test_failed_tasks_are_tried_again():
+    prefetcher = Prefetcher(workers=1)
+    attempts = []
+
+    def fail():
+        attempts.append(1)
+        raise RuntimeError("quota")
+
+    for _ in range(2):
+        prefetcher.schedule('a', {('account_data',): fail}, version=1)
+        wait_idle(prefetcher)
+    assert len(attempts) == 2
+    assert prefetcher.stats['failed'] == 2
+
+def test_released_task_is_cancelled_before_it_starts():
+    prefetcher = Prefetcher(workers=1)
+    started, release = threading.Event(), threading.Event()
+
+    def block():
+        started.set()
+        release.wait(5)
+
+    prefetcher.schedule('a', {('blocker',): block})
+    started.wait(5)
+    prefetcher.schedule('b', {('budget', 2025, 'Maret'): lambda: None})
+    prefetcher.schedule('b', {})
+    release.set()
+    wait_idle(prefetcher)
+    assert prefetcher.stats['cancelled'] == 1
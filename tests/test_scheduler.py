@@ -0,0 +1,136 @@
+import threading
+import time
+import pytest
+from utility.scheduler import ScheduledBackend, SingleFlight, TokenBucket
+
+class QuotaError(Exception):
+    """Stands in for a gspread APIError carrying an HTTP response"""
+
+    def __init__(self, status_code: int, headers: dict | None = None):
+        super().__init__(f"HTTP {status_code}")
+        self.response = type('Response', (), {'status_code': status_code, 'headers': headers or {}})()
+
+
+class CountingBucket(TokenBucket):
+    def __init__(self):
+        super().__init__(rate=1000, capacity=1000)
+        self.taken = 0
+
+    def acquire(self):
+        self.taken += 1
+        super().acquire()
+
+
+def scheduled(backend, retries: int = 3) -> ScheduledBackend:
+    return ScheduledBackend(backend, CountingBucket(), CountingBucket(), retries=retries, backoff=0.001, max_backoff=0.001)
+
+# ---------------------------
+# TokenBucket
+# ---------------------------
+def test_bucket_allows_a_burst_then_paces():
+    bucket = TokenBucket(rate=20, capacity=3)
+    start = time.monotonic()
+    for _ in range(3):
+        bucket.acquire()
+    assert time.monotonic() - start < 0.05
+    for _ in range(2):
+        bucket.acquire()
+    # Two tokens beyond the burst take 1/20 s each
+    assert time.monotonic() - start >= 0.09
+
+def test_per_minute_bucket_never_exceeds_the_limit():
+    bucket = TokenBucket.per_minute(60, burst=10)
+    assert bucket.capacity == 10
+    assert bucket.capacity + bucket.rate * 60 == 60
+
+# ---------------------------
+# SingleFlight
+# ---------------------------
+def test_concurrent_callers_share_one_call():
+    flight, calls, release = SingleFlight(), [], threading.Event()
+
+    def fetch():
+        calls.append(1)
+        release.wait(5)
+        return [['Maret']]
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(flight.do('range', fetch))) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    time.sleep(0.05)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+    assert len(calls) == 1
+    assert results == [[['Maret']]] * 5
+    # The key is free again once the call finished
+    assert flight.do('range', lambda: 'again') == 'again'
+
+def test_waiting_callers_get_the_error():
+    flight, release = SingleFlight(), threading.Event()
+    errors = []
+
+    def fail():
+        release.wait(5)
+        raise QuotaError(403)
+
+    def call():
+        try:
+            flight.do('range', fail)
+        except QuotaError as error:
+            errors.append(error)
+
+    threads = [threading.Thread(target=call) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    time.sleep(0.05)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+    assert len(errors) == 3
+
+# ---------------------------
+# ScheduledBackend
+# ---------------------------
+def test_quota_errors_are_retried(local_backend):
+    local_backend.import_sheet(1, 'Money Tracker', [['Timestamp'], ['2025-03-01']])
+    failures = [QuotaError(429), QuotaError(429, {'Retry-After': '0'})]
+    get_values = local_backend.get_values
+
+    def flaky_get_values(*args):
+        if failures:
+            raise failures.pop(0)
+        return get_values(*args)
+
+    local_backend.get_values = flaky_get_values
+    backend = scheduled(local_backend)
+    assert backend.get_values(1) == [['Timestamp'], ['2025-03-01']]
+    # Every attempt takes its own read token
+    assert backend.read_bucket.taken == 3
+
+def test_retries_give_up_after_the_limit(local_backend):
+    def quota_exceeded(*args):
+        raise QuotaError(429)
+
+    local_backend.get_values = quota_exceeded
+    backend = scheduled(local_backend, retries=2)
+    with pytest.raises(QuotaError):
+        backend.get_values(1)
+    assert backend.read_bucket.taken == 3
+
+def test_other_errors_are_not_retried(local_backend):
+    def forbidden(*args):
+        raise QuotaError(403)
+
+    local_backend.get_values = forbidden
+    backend = scheduled(local_backend)
+    with pytest.raises(QuotaError):
+        backend.get_values(1)
+    assert backend.read_bucket.taken == 1
+
+def test_sheet_title_takes_no_read_token(local_backend):
+    local_backend.import_sheet(1, 'Money Tracker', [['Timestamp']])
+    backend = scheduled(local_backend)
+    assert backend.sheet_title(1) == 'Money Tracker'
+    assert backend.read_bucket.taken == 0
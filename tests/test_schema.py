@@ -0,0 +1,50 @@
+import datetime
+import polars as pl
+from utility.schema import SHEET_SCHEMAS, values_to_frame
+from utility.utils import format_rupiah, rupiah
+
+HEADER = ['Timestamp', 'Transaction Date', 'Cash Flow Type', 'Transasction Amount', 'Cashflow']
+
+def test_serial_dates_and_numbers_are_typed():
+    frame = values_to_frame(
+        [HEADER, [45717.5, 45717, 'Expense', 150000, -150000], [45658.25, 45658.9, 'Income', '2500000.5', 2500000.5]],
+        SHEET_SCHEMAS['money_tracker'],
+    )
+    assert frame.schema['Timestamp'] == pl.Datetime
+    assert frame['Timestamp'].to_list() == [datetime.datetime(2025, 3, 1, 12), datetime.datetime(2025, 1, 1, 6)]
+    # A date cell holding a time of day still falls on its day
+    assert frame['Transaction Date'].to_list() == [datetime.date(2025, 3, 1), datetime.date(2025, 1, 1)]
+    assert frame['Transasction Amount'].to_list() == [150000.0, 2500000.5]
+    assert frame['Cash Flow Type'].to_list() == ['Expense', 'Income']
+
+def test_empty_cells_and_short_rows_become_null():
+    frame = values_to_frame(
+        [HEADER, ['', '', '', '', ''], [45717.5, 45717, 'Expense']],
+        SHEET_SCHEMAS['money_tracker'],
+    )
+    assert frame['Timestamp'][0] is None
+    assert frame['Transaction Date'][0] is None
+    assert frame['Transasction Amount'].to_list() == [None, None]
+    assert frame['Cashflow'].null_count() == 2
+    assert frame['Cash Flow Type'].to_list() == ['', 'Expense']
+
+def test_numeric_text_is_parsed_and_anything_else_is_null():
+    frame = values_to_frame([['Account Balance'], ['1500000'], ['-250.75'], ['n/a']], SHEET_SCHEMAS['accounts_state'])
+    assert frame['Account Balance'].to_list() == [1_500_000.0, -250.75, None]
+
+def test_booleans():
+    frame = values_to_frame([['Funds Achieved'], ['TRUE'], ['FALSE'], [True]], SHEET_SCHEMAS['anual_planning'])
+    assert frame['Funds Achieved'].to_list() == [True, False, True]
+
+def test_header_only_sheet_keeps_its_typed_columns():
+    frame = values_to_frame([HEADER], SHEET_SCHEMAS['money_tracker'])
+    assert frame.is_empty()
+    assert frame.schema['Transaction Date'] == pl.Date
+    assert frame.schema['Transasction Amount'] == pl.Float64
+
+def test_rupiah_formatting():
+    amounts = pl.DataFrame({'Amount': [0.0, 999.0, 1_234_567.0, -1_234_567.0, -500.0, 1_000_000_000_000.0, None]})
+    assert amounts.select(format_rupiah('Amount'))['Amount'].to_list() == [
+        'Rp 0,00', 'Rp 999,00', 'Rp 1.234.567,00', 'Rp -1.234.567,00', 'Rp -500,00', 'Rp 1.000.000.000.000,00', None,
+    ]
+    assert rupiah(-15_000_000.0) == 'Rp -15.000.000,00'
@@ -0,0 +1,109 @@
+import datetime
+import polars as pl
+from benchmarks import synthetic
+from tests.conftest import SHEET_IDS
+from utility import archive, snapshot
+from utility import datamanager as dm
+
+def test_write_partitions_of_an_empty_frame(tmp_path):
+    frame = pl.DataFrame(schema={'Transaction Date': pl.Date, 'Amount': pl.Float64})
+    directory = tmp_path / 'money_tracker'
+    snapshot.write_partitions(frame, directory, 'Transaction Date')
+
+    scanned = snapshot.scan_partitions(directory, frame.schema)
+    assert directory.is_dir()
+    assert scanned.collect().is_empty()
+    assert scanned.collect_schema() == {**frame.schema, 'year': pl.Int64, 'month': pl.Int64}
+
+def test_sync_of_an_empty_money_tracker(local_backend):
+    local_backend.import_sheet(SHEET_IDS['money_tracker'], 'Money Tracker', [synthetic.MONEY_TRACKER_COLUMNS])
+
+    dm.sync_transactions()
+    assert dm.scan_transactions().collect().is_empty()
+    assert dm.load_monthly_rollups().is_empty()
+    assert archive.live_years() == []
+
+    # The first row entered afterwards is picked up by the next sync
+    row = dm.transaction_row(
+        datetime.date(2025, 3, 1), 'Expense', 1000, 'Abi - Cash', 'Kebutuhan Harian', 'Kebutuhan Harian - Item 00', ''
+    )
+    local_backend.append_rows(SHEET_IDS['money_tracker'], [row])
+    dm.invalidate_transactions()
+    transactions = dm.query_transactions(2025, 'Maret').collect()
+    assert transactions['Transasction Amount'].to_list() == [1000.0]
+
+# ---------------------------
+# Change detection
+# ---------------------------
+ACCOUNTS = SHEET_IDS['accounts_state']
+
+def import_accounts(local_backend):
+    values = synthetic.to_values(synthetic.generate_accounts())
+    local_backend.import_sheet(ACCOUNTS, 'Accounts State', values)
+    snapshot.sync_full('accounts_state', local_backend, ACCOUNTS)
+    return values
+
+def test_unchanged_sheet_is_not_downloaded(local_backend):
+    import_accounts(local_backend)
+    assert not snapshot.has_changed('accounts_state', local_backend, ACCOUNTS)
+
+def test_appended_row_is_detected(local_backend):
+    import_accounts(local_backend)
+    local_backend.append_rows(ACCOUNTS, [['Abi - Dana', 50_000.0]])
+    assert snapshot.has_changed('accounts_state', local_backend, ACCOUNTS)
+
+def test_edit_of_the_last_row_is_detected(local_backend):
+    values = import_accounts(local_backend)
+    local_backend.update_values(ACCOUNTS, f"B{len(values)}", [[999.0]])
+    assert snapshot.has_changed('accounts_state', local_backend, ACCOUNTS)
+
+def test_edit_above_the_last_row_needs_a_full_download(local_backend):
+    import_accounts(local_backend)
+    local_backend.update_values(ACCOUNTS, 'B2', [[999.0]])
+    # The tail check cannot see it
+    assert not snapshot.has_changed('accounts_state', local_backend, ACCOUNTS)
+    frame, downloaded = snapshot.sync_changed('accounts_state', local_backend, ACCOUNTS, full_every=86_400)
+    assert not downloaded and frame['Account Balance'][0] != 999.0
+
+def test_shrunk_sheet_is_detected(local_backend):
+    values = import_accounts(local_backend)
+    local_backend.import_sheet(ACCOUNTS, 'Accounts State', values[:-1])
+    assert snapshot.has_changed('accounts_state', local_backend, ACCOUNTS)
+    frame, downloaded = snapshot.sync_changed('accounts_state', local_backend, ACCOUNTS)
+    assert downloaded and frame.height == len(values) - 2
+
+def test_snapshot_is_downloaded_again_after_full_every(local_backend):
+    import_accounts(local_backend)
+    local_backend.update_values(ACCOUNTS, 'B2', [[999.0]])
+    frame, downloaded = snapshot.sync_changed('accounts_state', local_backend, ACCOUNTS, full_every=0)
+    assert downloaded and frame['Account Balance'][0] == 999.0
+
+def test_identical_download_keeps_the_data_version(local_backend):
+    import_accounts(local_backend)
+    version = snapshot.data_version('accounts_state')
+    _, downloaded = snapshot.sync_changed('accounts_state', local_backend, ACCOUNTS, full_every=0)
+    assert downloaded and snapshot.data_version('accounts_state') == version
+    # Downloading in full still counts, so the next check is a small read again
+    local_backend.update_values(ACCOUNTS, 'B2', [[999.0]])
+    _, downloaded = snapshot.sync_changed('accounts_state', local_backend, ACCOUNTS, full_every=86_400)
+    assert not downloaded
+
+def test_refresh_downloads_the_sheets_edited_in_place(local_backend):
+    local_backend.import_sheet(SHEET_IDS['money_tracker'], 'Money Tracker', [synthetic.MONEY_TRACKER_COLUMNS])
+    plan = synthetic.generate_budget_plan(n_categories=4, items_per_category=2)
+    local_backend.import_sheet(SHEET_IDS['monthly_planning'], 'Monthly Planning', synthetic.to_values(plan))
+    local_backend.import_sheet(
+        SHEET_IDS['anual_planning'], 'Annual Planning', synthetic.to_values(synthetic.generate_anual_budget(plan))
+    )
+    import_accounts(local_backend)
+    dm.sync_transactions()
+    for sheet_key in ('monthly_planning', 'anual_planning'):
+        snapshot.sync_full(sheet_key, local_backend, SHEET_IDS[sheet_key])
+    balance = dm.load_account_data()['Account Balance'][0]
+
+    local_backend.update_values(ACCOUNTS, 'B2', [[balance + 1]])
+    # The background poll only reads the last rows
+    assert dm.refresh_changed_sheets() == []
+    assert dm.refresh_changed_sheets(full=True) == ['accounts_state']
+    assert dm.load_account_data()['Account Balance'][0] == balance + 1
+    assert dm.refresh_changed_sheets(full=True) == []
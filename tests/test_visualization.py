@@ -0,0 +1,34 @@
+import polars as pl
+from utility import visualization as viz
+
+BREAKDOWN = pl.DataFrame({
+    'Cash Flow Type': ['Income', 'Expense'],
+    'Budget Category': ['Gaji', 'Kebutuhan Harian'],
+    'Planned': [10_000_000.0, 3_500_000.0],
+    'Actual': [9_000_000.0, 4_000_000.0],
+    'Difference': [-1_000_000.0, 500_000.0],
+}).with_columns((pl.col('Actual') - pl.col('Planned')).alias('Diff')).with_columns(viz.budget_remarks(0))
+
+def test_budget_breakdown_has_one_grid_per_category():
+    spec = viz.create_budget_breakdown_chart.__wrapped__(BREAKDOWN, row_height=100)
+    assert [title['text'] for title in spec['title']] == ['📦 Gaji', '📦 Kebutuhan Harian']
+    assert spec['title'][1] == {
+        'text': '📦 Kebutuhan Harian',
+        'subtext': 'You overspent Rp 500.000,00 more than planned!',
+        'top': 100,
+        'left': '1%',
+        'textStyle': {'fontSize': 14},
+        'subtextStyle': {'color': viz.REMARK_COLORS['red'], 'fontWeight': 500, 'fontSize': 12},
+    }
+    assert [grid['top'] for grid in spec['grid']] == [48, 148]
+    assert [axis['gridIndex'] for axis in spec['xAxis'] + spec['yAxis']] == [0, 1, 0, 1]
+    assert spec['yAxis'][0]['data'] == ['Planned', 'Actual']
+    assert spec['series'][1]['xAxisIndex'] == spec['series'][1]['yAxisIndex'] == 1
+    assert spec['series'][1]['data'] == [
+        {'value': 3_500_000.0, 'itemStyle': {'color': '#5400C6'}},
+        {'value': 4_000_000.0, 'itemStyle': {'color': '#FF6B6B'}},
+    ]
+
+def test_budget_breakdown_without_categories():
+    spec = viz.create_budget_breakdown_chart.__wrapped__(BREAKDOWN.clear())
+    assert spec['title'] == spec['grid'] == spec['series'] == []
@@ -1,30 +1,66 @@
-import time
 import streamlit as st
-from streamlit_theme import st_theme
 import datetime
-from google.oauth2 import service_account
-import gspread
-
-
-def get_worksheet() -> gspread.Spreadsheet:
-    """Initialize and return the worksheet"""
-    if "gspread_worksheet" not in st.session_state:
-        gsheet_url = st.secrets["gsheet_url"]
-        service_account_info = st.secrets["gcp_service_account"]
-        
-        scope = ["https://spreadsheets.google.com/feeds", "https://www.googleapis.com/auth/drive"]
-        credentials = service_account.Credentials.from_service_account_info(
-            service_account_info,
-            scopes=scope
-        )
+from typing import TYPE_CHECKING
+from utility import archive, instrumentation
+from utility.scheduler import ScheduledBackend
+from utility.backend import SheetsBackend, GSpreadBackend, LocalBackend
+from utility.utils import MONTH_LIST
+
+if TYPE_CHECKING:
+    import gspread
+
+# gspread, google-auth and the theme component are imported on first use:
+# a page render that is served from the snapshot never pays for them
+
 
-        client = gspread.authorize(credentials)
-        st.session_state.gspread_worksheet = client.open_by_url(gsheet_url)
+@st.cache_resource(show_spinner="Connecting to Google Sheets...")
+def open_spreadsheet() -> "gspread.Spreadsheet":
+    """Authorize the service account and open the configured spreadsheet, once per process"""
+    import gspread
+    from google.oauth2 import service_account
+
+    gsheet_url = st.secrets["gsheet_url"]
+    service_account_info = st.secrets["gcp_service_account"]
+    
+    scope = ["https://spreadsheets.google.com/feeds", "https://www.googleapis.com/auth/drive"]
+    credentials = service_account.Credentials.from_service_account_info(
+        service_account_info,
+        scopes=scope
+    )
+    # Every session shares this client, so the token is refreshed ahead of
+    # expiry by a single background worker instead of by concurrent requests
+    credentials.with_non_blocking_refresh()
 
-    return st.session_state.gspread_worksheet
+    client = gspread.authorize(credentials)
+    # Count every Google API request for the performance panel
+    client.http_client.session.hooks['response'].append(instrumentation.record_http)
+    return client.open_by_url(gsheet_url)
+
+def get_worksheet() -> "gspread.Spreadsheet":
+    """Return the spreadsheet shared by all sessions"""
+    return open_spreadsheet()
+
+@st.cache_resource
+def get_backend() -> SheetsBackend:
+    """Return the configured data backend, Google Sheets unless `data_backend = "local"`"""
+    if st.secrets.get("data_backend", "gspread") == "local":
+        backend = LocalBackend(st.secrets.get("local_backend_path", "local_sheets.db"))
+    else:
+        backend = GSpreadBackend(
+            get_worksheet,
+            st.secrets["insert_url"],
+            bulk_insert=st.secrets.get("insert_bulk", False),
+            insert_batch_size=st.secrets.get("insert_batch_size", 200),
+        )
+        backend.session.hooks['response'].append(instrumentation.record_http)
+        # All sessions share this backend, so they also share the Sheets quota
+        backend = ScheduledBackend.from_quota(backend, st.secrets.get("sheets_quota"))
+    return instrumentation.InstrumentedBackend(backend) if instrumentation.enabled() else backend
 
 def get_st_theme():
     if "base_theme" not in st.session_state:
+        from streamlit_theme import st_theme
+
         theme = st_theme()
         st.session_state.base_theme = theme.get("base", "light")   
     return st.session_state.base_theme
@@ -32,41 +68,46 @@ def get_st_theme():
 def global_data_selector():
     # Initialize if not exists
     today = datetime.date.today()
-    month_list = ['Januari', 'Februari', 'Maret', 'April', 'Mei', 'Juni', 'Juli', 'Agustus', 'September', 'Oktober', 'November', 'Desember']
-    year_list = [2025]
-    worksheet = get_worksheet()
+    year_list = archive.available_years()
+    backend = get_backend()
     
     if 'selected_month' not in st.session_state:
-        st.session_state.selected_month = month_list[today.month - 1]
-        # worksheet = update_control_sheet()
+        st.session_state.selected_month = MONTH_LIST[today.month - 1]
+    if st.session_state.get('selected_year') not in year_list:
+        st.session_state.selected_year = archive.live_year()
     
     st.sidebar.subheader("📅 Filter Options")
 
+    st.session_state.selected_year = st.sidebar.selectbox(
+        "Year",
+        year_list,
+        index=year_list.index(st.session_state.selected_year),
+    )
+
     st.sidebar.selectbox(
         "Month",
-        month_list,
-        index=month_list.index(st.session_state.selected_month),
+        MONTH_LIST,
+        index=MONTH_LIST.index(st.session_state.selected_month),
         key='global_selected_month'
     )
     
-    if st.session_state.global_selected_month != st.session_state.selected_month:
-        st.session_state.selected_month = st.session_state.global_selected_month
-        # worksheet = update_control_sheet()
-        time.sleep(1)
+    # Every loader is cached per month, so switching back to a month is a cache hit
+    st.session_state.selected_month = st.session_state.global_selected_month
 
     if st.sidebar.button("Refresh Data"):
-        st.cache_data.clear()
-        st.rerun()
+        # The small worksheets are downloaded again, Money Tracker only when rows were added
+        from utility import datamanager as dm
 
-    return 2025, st.session_state.selected_month, worksheet
+        try:
+            dm.refresh_changed_sheets(full=True)
+        except Exception as error:
+            st.sidebar.error(f"Could not check the sheets for changes: {error}")
+        else:
+            st.rerun()
 
-def get_initial_month():
-    worksheet = get_worksheet()
-    control_sheet = worksheet.get_worksheet_by_id(st.secrets["sheets_id"]["monthly_overview"])
-    return control_sheet.get_values('CurrentMonth')[0][0]
+    return st.session_state.selected_year, st.session_state.selected_month, backend
 
-def update_control_sheet():
-    worksheet = get_worksheet()
-    control_sheet = worksheet.get_worksheet_by_id(st.secrets["sheets_id"]["monthly_overview"])
-    control_sheet.update([[st.session_state.selected_month]], 'CurrentMonth')
-    return worksheet
+def show_load_errors(errors: dict[str, Exception]):
+    """Report the datasets a page failed to load"""
+    for name, error in errors.items():
+        st.error(f"Could not load {name.replace('_', ' ')}: {error}")
@@ -0,0 +1,73 @@
+import polars as pl
+
+ZOOM_LEVELS = {'Daily': '1d', 'Weekly': '1w'}
+
+class AggregateCube:
+    """Transaction sums pre-aggregated per (year, month, category)
+
+    Built once per data refresh, so switching the category, month or zoom
+    level on the drilldown page is a dictionary lookup. Each entry holds:
+
+    - item activity: one row per day (or week), one column per budget item
+    - month to date: daily category totals with their running sum
+    - the monthly category total
+    """
+
+    def __init__(self, activity: dict, month_to_date: dict, monthly_totals: dict):
+        self.activity = activity
+        self.month_to_date = month_to_date
+        self.monthly_totals = monthly_totals
+
+    @classmethod
+    def from_transactions(cls, transactions: pl.LazyFrame | pl.DataFrame) -> 'AggregateCube':
+        daily = transactions.lazy().group_by(
+            pl.col('Transaction Date').dt.year().alias('Year'),
+            pl.col('Transaction Date').dt.month().alias('Month'),
+            'Budget Category', 'Budget Item', 'Transaction Date',
+        ).agg(pl.col('Transasction Amount').sum()).collect()
+
+        activity = {}
+        for zoom, every in ZOOM_LEVELS.items():
+            bucketed = daily.with_columns(pl.col('Transaction Date').dt.truncate(every)).group_by(
+                'Year', 'Month', 'Budget Category', 'Budget Item', 'Transaction Date'
+            ).agg(pl.col('Transasction Amount').sum())
+            for key, part in bucketed.partition_by('Year', 'Month', 'Budget Category', as_dict=True).items():
+                activity[(zoom, *key)] = pivot_item_activity(part)
+
+        category_daily = daily.group_by('Year', 'Month', 'Budget Category', 'Transaction Date').agg(
+            pl.col('Transasction Amount').sum()
+        ).sort('Transaction Date').with_columns(
+            pl.col('Transasction Amount').cum_sum().over('Year', 'Month', 'Budget Category').alias('Month To Date')
+        )
+        month_to_date = {
+            key: part.select('Transaction Date', 'Transasction Amount', 'Month To Date')
+            for key, part in category_daily.partition_by('Year', 'Month', 'Budget Category', as_dict=True).items()
+        }
+
+        monthly = daily.group_by('Year', 'Month', 'Budget Category').agg(pl.col('Transasction Amount').sum())
+        monthly_totals = {
+            (year, month, category): total for year, month, category, total in monthly.iter_rows()
+        }
+        return cls(activity, month_to_date, monthly_totals)
+
+    def item_activity(self, year: int, month: int, category: str, zoom: str = 'Daily') -> pl.DataFrame:
+        """Wide frame of `Transaction Date` plus one amount column per budget item"""
+        return self.activity.get((zoom, year, month, category), pl.DataFrame({'Transaction Date': []}, schema={'Transaction Date': pl.Utf8}))
+
+    def category_month_to_date(self, year: int, month: int, category: str) -> pl.DataFrame | None:
+        return self.month_to_date.get((year, month, category))
+
+    def category_total(self, year: int, month: int, category: str) -> float:
+        return self.monthly_totals.get((year, month, category), 0.0)
+
+def pivot_item_activity(transactions: pl.DataFrame) -> pl.DataFrame:
+    """Sum amounts per date and budget item, one column per item"""
+    return transactions.pivot(
+        on='Budget Item',
+        index=['Transaction Date'],
+        values='Transasction Amount',
+        aggregate_function='sum',
+        sort_columns=True,
+    ).with_columns(
+        pl.col('Transaction Date').dt.to_string()
+    ).fill_null(0).sort('Transaction Date')
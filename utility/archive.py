@@ -0,0 +1,125 @@
+"""Closed years of the Money Tracker, frozen out of the live sheet
+
+A frozen year is written once as month partitions under
+`<snapshot_dir>/archive/year=YYYY/` together with its monthly rollup, and
+is never rewritten. Once a year is archived its rows can be removed from
+the live sheet, which then only holds the current year.
+
+    python -m utility.archive 2024     # freeze 2024 from the synced live data
+"""
+import datetime
+import shutil
+from pathlib import Path
+import polars as pl
+from utility import snapshot
+
+ROLLUP_KEYS = ['year', 'month', 'Cash Flow Type', 'Budget Category', 'Budget Item']
+
+def archive_dir() -> Path:
+    return snapshot.get_snapshot_dir() / "archive"
+
+def _rollup_path(year: int) -> Path:
+    return archive_dir() / "rollups" / f"{year}.parquet"
+
+def partition_years(directory: Path) -> list[int]:
+    """Years present in a `year=YYYY` partitioned directory"""
+    if not directory.exists():
+        return []
+    return sorted(int(path.name.removeprefix('year=')) for path in directory.glob('year=*') if path.is_dir())
+
+def archived_years() -> list[int]:
+    return partition_years(archive_dir())
+
+def live_years() -> list[int]:
+    """Years still held by the live sheet, as of the last sync"""
+    frozen = set(archived_years())
+    return [year for year in partition_years(snapshot.partition_dir("money_tracker")) if year not in frozen]
+
+def available_years() -> list[int]:
+    return sorted(set(archived_years()) | set(live_years())) or [datetime.date.today().year]
+
+def live_year() -> int:
+    """The year the live sheet covers"""
+    return max(live_years(), default=datetime.date.today().year)
+
+def monthly_rollup(transactions: pl.LazyFrame | pl.DataFrame) -> pl.DataFrame:
+    """Amounts, cash flow and transaction counts per month and budget item"""
+    return transactions.lazy().group_by(
+        pl.col('Transaction Date').dt.year().alias('year'),
+        pl.col('Transaction Date').dt.month().alias('month'),
+        'Cash Flow Type', 'Budget Category', 'Budget Item',
+    ).agg(
+        pl.col('Transasction Amount').sum().alias('Amount'),
+        pl.col('Cashflow').sum(),
+        pl.len().alias('Transactions'),
+    ).sort(ROLLUP_KEYS).collect()
+
+def freeze_year(year: int, transactions: pl.LazyFrame | pl.DataFrame):
+    """Write one closed year to the archive; an archived year is immutable"""
+    target = archive_dir() / f"year={year}"
+    if target.exists():
+        raise FileExistsError(f"{year} is already archived")
+
+    frame = transactions.lazy().filter(pl.col('Transaction Date').dt.year().eq(year)).collect()
+    if frame.is_empty():
+        raise ValueError(f"No transactions in {year}")
+    frame = frame.drop('year', 'month', strict=False)
+
+    # Staged next to the archive and moved in once complete
+    staging = archive_dir() / f".staging-{year}"
+    shutil.rmtree(staging, ignore_errors=True)
+    snapshot.write_partitions(frame, staging, 'Transaction Date')
+    _rollup_path(year).parent.mkdir(parents=True, exist_ok=True)
+    monthly_rollup(frame).write_parquet(_rollup_path(year), compression='zstd')
+    (staging / f"year={year}").rename(target)
+    shutil.rmtree(staging)
+
+def scan_archive() -> pl.LazyFrame | None:
+    if not archived_years():
+        return None
+    return snapshot.scan_partitions(archive_dir())
+
+def read_rollups() -> pl.DataFrame | None:
+    paths = [_rollup_path(year) for year in archived_years()]
+    return pl.concat([pl.read_parquet(path) for path in paths]) if paths else None
+
+# ---------------------------
+# Rollup of the live sheet
+# ---------------------------
+def live_rollup_path() -> Path:
+    return snapshot.get_snapshot_dir() / "money_tracker_rollup.parquet"
+
+def merge_rollups(*rollups: pl.DataFrame) -> pl.DataFrame:
+    """Combine rollups covering overlapping months into one"""
+    return pl.concat(rollups).group_by(ROLLUP_KEYS).agg(
+        pl.col('Amount', 'Cashflow', 'Transactions').sum()
+    ).sort(ROLLUP_KEYS)
+
+def write_live_rollup(rollup: pl.DataFrame):
+    path = live_rollup_path()
+    rollup.write_parquet(path.with_suffix('.tmp'))
+    path.with_suffix('.tmp').replace(path)
+
+def read_live_rollup() -> pl.DataFrame | None:
+    path = live_rollup_path()
+    return pl.read_parquet(path) if path.exists() else None
+
+def update_live_rollup(new_rows: pl.LazyFrame | pl.DataFrame):
+    """Fold newly synced or written transactions into the live rollup
+
+    Only the new rows are aggregated; with no stored rollup there is nothing
+    to fold into, and the next read rebuilds it from the partitions.
+    """
+    stored = read_live_rollup()
+    if stored is not None:
+        write_live_rollup(merge_rollups(stored, monthly_rollup(new_rows)))
+
+
+if __name__ == "__main__":
+    import sys
+    from utility import datamanager as dm
+
+    dm.sync_transactions()
+    for year in sys.argv[1:]:
+        freeze_year(int(year), snapshot.scan_partitions(snapshot.partition_dir("money_tracker")))
+        print(f"Archived {year}")
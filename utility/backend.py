@@ -0,0 +1,363 @@
+import datetime
+import json
+import re
+import sqlite3
+import threading
+from contextlib import closing
+from typing import TYPE_CHECKING
+from utility.schema import SERIAL_EPOCH
+
+if TYPE_CHECKING:
+    import requests
+
+class BackendError(Exception):
+    """Raised when a backend rejects a read or a write"""
+
+class SheetsBackend:
+    """Interface the data loaders use to read and write the finance spreadsheet
+
+    Worksheets are addressed by the numeric sheet IDs configured in
+    `st.secrets["sheets_id"]`, and ranges by A1 notation or named range.
+    """
+
+    def sheet_title(self, sheet_id: int) -> str:
+        raise NotImplementedError
+
+    def get_values(self, sheet_id: int, cell_range: str | None = None, unformatted: bool = False) -> list[list]:
+        """Return the range as a rectangular grid, or the whole worksheet when no range is given
+
+        With `unformatted` numbers come back as numbers and dates as serial
+        day numbers instead of display strings.
+        """
+        raise NotImplementedError
+
+    def append_rows(self, sheet_id: int, rows: list[list], keys: list[str] | None = None):
+        """Append rows after the last row of the worksheet
+
+        Cells may be Python dates and datetimes; each backend stores them the
+        way the spreadsheet would. `keys` are idempotency keys, one per row:
+        a row whose key was already appended is skipped where the backend
+        supports it.
+        """
+        raise NotImplementedError
+
+    def named_ranges(self) -> dict[str, tuple[int, str]]:
+        """Map every named range to its (sheet ID, A1 range)"""
+        raise NotImplementedError
+
+
+def format_cell(value):
+    """Render a cell the way it is typed into the sheet"""
+    if isinstance(value, datetime.datetime):
+        return value.strftime('%d/%m/%Y %H:%M:%S')
+    if isinstance(value, datetime.date):
+        return value.strftime('%d/%m/%Y')
+    return value
+
+def serial_cell(value):
+    """Store dates and datetimes as Sheets serial day numbers, like an unformatted read returns them"""
+    if isinstance(value, datetime.datetime):
+        return (value - SERIAL_EPOCH).total_seconds() / 86_400
+    if isinstance(value, datetime.date):
+        return (value - SERIAL_EPOCH.date()).days
+    return value
+
+def insert_session(retries: int = 3, backoff: float = 0.5) -> "requests.Session":
+    """HTTP session with pooled connections that retries failed inserts with exponential backoff
+
+    An insert is only re-sent when it certainly was not applied: the
+    connection failed, or the endpoint answered 429 or 503 without running
+    the script. After a read timeout or any other server error the row may
+    already be in the sheet, so that is left to the caller, which can check
+    (see `datamanager.already_written`).
+    """
+    import requests
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
+
+    retry = Retry(
+        total=retries,
+        connect=retries,
+        read=0,
+        other=0,
+        status=retries,
+        backoff_factor=backoff,
+        status_forcelist=(429, 503),
+        allowed_methods=frozenset({'POST'}),
+        raise_on_status=False,
+    )
+    session = requests.Session()
+    session.mount('https://', HTTPAdapter(max_retries=retry))
+    session.mount('http://', HTTPAdapter(max_retries=retry))
+    return session
+
+
+class GSpreadBackend(SheetsBackend):
+    """Google Sheets through gspread, with writes going to the Apps Script endpoint
+
+    The endpoint takes `{"sheetName", "rowData"}` for a single row. With
+    `bulk_insert` rows are sent `insert_batch_size` at a time as
+    `{"sheetName", "rows"}`, which the script must support. Idempotency keys
+    are sent as `key` / `keys` for the script to skip rows it already wrote.
+    """
+
+    UNFORMATTED = {'valueRenderOption': 'UNFORMATTED_VALUE', 'dateTimeRenderOption': 'SERIAL_NUMBER'}
+
+    def __init__(
+        self,
+        get_spreadsheet,
+        insert_url: str,
+        bulk_insert: bool = False,
+        insert_batch_size: int = 200,
+        timeout: tuple[float, float] = (5, 30),
+    ):
+        self._get_spreadsheet = get_spreadsheet
+        self.insert_url = insert_url
+        self.bulk_insert = bulk_insert
+        self.insert_batch_size = insert_batch_size
+        self.timeout = timeout
+        self.session = insert_session()
+        self._worksheets = {}
+        self._worksheets_lock = threading.Lock()
+
+    def worksheet(self, sheet_id: int):
+        """Worksheet handle by ID, from a map filled with one metadata request"""
+        with self._worksheets_lock:
+            if sheet_id not in self._worksheets:
+                # Unknown IDs (new or re-created sheets) reload the whole map
+                self._worksheets = {ws.id: ws for ws in self._get_spreadsheet().worksheets()}
+            if sheet_id not in self._worksheets:
+                raise BackendError(f"Unknown sheet id {sheet_id}")
+            return self._worksheets[sheet_id]
+
+    def sheet_title(self, sheet_id: int) -> str:
+        return self.worksheet(sheet_id).title
+
+    def get_values(self, sheet_id: int, cell_range: str | None = None, unformatted: bool = False) -> list[list]:
+        if not unformatted:
+            return self.worksheet(sheet_id).get_values(cell_range)
+        return self.worksheet(sheet_id).get_values(
+            cell_range,
+            value_render_option=self.UNFORMATTED['valueRenderOption'],
+            date_time_render_option=self.UNFORMATTED['dateTimeRenderOption'],
+        )
+
+    def _post(self, payload: dict):
+        import requests
+
+        try:
+            response = self.session.post(self.insert_url, json=payload, timeout=self.timeout)
+        except requests.RequestException as error:
+            raise BackendError(f"Insert request failed: {error}") from error
+        if response.status_code != 200:
+            raise BackendError(response.text)
+
+    def append_rows(self, sheet_id: int, rows: list[list], keys: list[str] | None = None):
+        sheet_name = self.sheet_title(sheet_id)
+        rows = [[format_cell(cell) for cell in row] for row in rows]
+        if not self.bulk_insert:
+            for index, row in enumerate(rows):
+                payload = {"sheetName": sheet_name, "rowData": row}
+                if keys:
+                    payload["key"] = keys[index]
+                self._post(payload)
+            return
+        for start in range(0, len(rows), self.insert_batch_size):
+            payload = {"sheetName": sheet_name, "rows": rows[start:start + self.insert_batch_size]}
+            if keys:
+                payload["keys"] = keys[start:start + self.insert_batch_size]
+            self._post(payload)
+
+    def named_ranges(self) -> dict[str, tuple[int, str]]:
+        from gspread.utils import rowcol_to_a1
+
+        result = {}
+        for named_range in self._get_spreadsheet().list_named_ranges():
+            grid = named_range['range']
+            start = rowcol_to_a1(grid.get('startRowIndex', 0) + 1, grid.get('startColumnIndex', 0) + 1)
+            end = rowcol_to_a1(grid['endRowIndex'], grid['endColumnIndex'])
+            result[named_range['name']] = (grid.get('sheetId', 0), f"{start}:{end}")
+        return result
+
+
+# ---------------------------
+# Local stand-in
+# ---------------------------
+_CELL_PATTERN = re.compile(r'^([A-Z]*)(\d*)$')
+
+def column_index(letters: str) -> int:
+    index = 0
+    for letter in letters:
+        index = index * 26 + ord(letter) - 64
+    return index
+
+def parse_a1_range(cell_range: str) -> tuple[int, int, int | None, int | None]:
+    """Return 1-based (first row, first column, last row, last column); open ends are None"""
+    start, _, end = cell_range.upper().replace('$', '').partition(':')
+    end = end or start
+    start_col, start_row = _CELL_PATTERN.match(start).groups()
+    end_col, end_row = _CELL_PATTERN.match(end).groups()
+    return (
+        int(start_row) if start_row else 1,
+        column_index(start_col) if start_col else 1,
+        int(end_row) if end_row else None,
+        column_index(end_col) if end_col else None,
+    )
+
+
+class LocalBackend(SheetsBackend):
+    """SQLite replica of the spreadsheet, keyed by the same sheet IDs and named ranges
+
+    Each worksheet row is stored as a JSON array so the values keep the
+    types they were written with. Replicas hold unformatted values, so
+    `unformatted` has no effect here.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with closing(self._connect()) as connection, connection:
+            connection.executescript("""
+                CREATE TABLE IF NOT EXISTS sheets (sheet_id INTEGER PRIMARY KEY, title TEXT NOT NULL);
+                CREATE TABLE IF NOT EXISTS rows (
+                    sheet_id INTEGER NOT NULL,
+                    row_number INTEGER NOT NULL,
+                    cells TEXT NOT NULL,
+                    PRIMARY KEY (sheet_id, row_number)
+                );
+                CREATE TABLE IF NOT EXISTS named_ranges (
+                    name TEXT PRIMARY KEY,
+                    sheet_id INTEGER NOT NULL,
+                    cell_range TEXT NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS append_keys (key TEXT PRIMARY KEY);
+            """)
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, timeout=30)
+
+    def sheet_title(self, sheet_id: int) -> str:
+        with closing(self._connect()) as connection:
+            row = connection.execute("SELECT title FROM sheets WHERE sheet_id = ?", (sheet_id,)).fetchone()
+        if row is None:
+            raise BackendError(f"Unknown sheet id {sheet_id}")
+        return row[0]
+
+    def _resolve(self, connection, sheet_id: int, cell_range: str) -> tuple[int, str]:
+        named = connection.execute(
+            "SELECT sheet_id, cell_range FROM named_ranges WHERE name = ?", (cell_range,)
+        ).fetchone()
+        if named is not None:
+            return named
+        if '!' in cell_range:
+            title, _, cell_range = cell_range.rpartition('!')
+            row = connection.execute(
+                "SELECT sheet_id FROM sheets WHERE title = ?", (title.strip("'"),)
+            ).fetchone()
+            if row is None:
+                raise BackendError(f"Unknown sheet {title}")
+            sheet_id = row[0]
+        return sheet_id, cell_range
+
+    def get_values(self, sheet_id: int, cell_range: str | None = None, unformatted: bool = False) -> list[list]:
+        with closing(self._connect()) as connection:
+            if cell_range:
+                sheet_id, cell_range = self._resolve(connection, sheet_id, cell_range)
+                first_row, first_col, last_row, last_col = parse_a1_range(cell_range)
+            else:
+                first_row, first_col, last_row, last_col = 1, 1, None, None
+            stored = connection.execute(
+                "SELECT row_number, cells FROM rows WHERE sheet_id = ? AND row_number >= ? AND row_number <= ? "
+                "ORDER BY row_number",
+                (sheet_id, first_row, last_row if last_row is not None else 2 ** 62),
+            ).fetchall()
+
+        if not stored:
+            return []
+        cells_by_row = {row_number: json.loads(cells)[first_col - 1:last_col] for row_number, cells in stored}
+        end_row = last_row if last_row is not None else stored[-1][0]
+        grid = [cells_by_row.get(row_number, []) for row_number in range(first_row, end_row + 1)]
+        width = (last_col - first_col + 1) if last_col is not None else max(len(row) for row in grid)
+        return [row + [''] * (width - len(row)) for row in grid]
+
+    def update_values(self, sheet_id: int, cell_range: str, values: list[list]):
+        """Overwrite cells in place, the way someone editing the spreadsheet would; the app only appends"""
+        with closing(self._connect()) as connection, connection:
+            sheet_id, cell_range = self._resolve(connection, sheet_id, cell_range)
+            first_row, first_col, _, _ = parse_a1_range(cell_range)
+            for row_number, new_cells in enumerate(values, start=first_row):
+                stored = connection.execute(
+                    "SELECT cells FROM rows WHERE sheet_id = ? AND row_number = ?", (sheet_id, row_number)
+                ).fetchone()
+                cells = json.loads(stored[0]) if stored else []
+                cells += [''] * (first_col - 1 + len(new_cells) - len(cells))
+                cells[first_col - 1:first_col - 1 + len(new_cells)] = [serial_cell(cell) for cell in new_cells]
+                connection.execute(
+                    "INSERT OR REPLACE INTO rows (sheet_id, row_number, cells) VALUES (?, ?, ?)",
+                    (sheet_id, row_number, json.dumps(cells)),
+                )
+
+    def append_rows(self, sheet_id: int, rows: list[list], keys: list[str] | None = None):
+        with closing(self._connect()) as connection, connection:
+            if keys:
+                seen = {
+                    key for (key,) in connection.execute(
+                        f"SELECT key FROM append_keys WHERE key IN ({','.join('?' * len(keys))})", keys
+                    )
+                }
+                rows = [row for row, key in zip(rows, keys) if key not in seen]
+                connection.executemany(
+                    "INSERT INTO append_keys (key) VALUES (?)", [(key,) for key in keys if key not in seen]
+                )
+            last_row = connection.execute(
+                "SELECT COALESCE(MAX(row_number), 0) FROM rows WHERE sheet_id = ?", (sheet_id,)
+            ).fetchone()[0]
+            connection.executemany(
+                "INSERT INTO rows (sheet_id, row_number, cells) VALUES (?, ?, ?)",
+                [
+                    (sheet_id, last_row + offset, json.dumps([serial_cell(cell) for cell in row]))
+                    for offset, row in enumerate(rows, start=1)
+                ],
+            )
+
+    def named_ranges(self) -> dict[str, tuple[int, str]]:
+        with closing(self._connect()) as connection:
+            rows = connection.execute("SELECT name, sheet_id, cell_range FROM named_ranges").fetchall()
+        return {name: (sheet_id, cell_range) for name, sheet_id, cell_range in rows}
+
+    def import_sheet(self, sheet_id: int, title: str, values: list[list]):
+        """Replace a worksheet with the given grid, header row first"""
+        with closing(self._connect()) as connection, connection:
+            connection.execute("INSERT OR REPLACE INTO sheets (sheet_id, title) VALUES (?, ?)", (sheet_id, title))
+            connection.execute("DELETE FROM rows WHERE sheet_id = ?", (sheet_id,))
+            connection.executemany(
+                "INSERT INTO rows (sheet_id, row_number, cells) VALUES (?, ?, ?)",
+                [(sheet_id, row_number, json.dumps(row)) for row_number, row in enumerate(values, start=1)],
+            )
+
+    def define_named_range(self, name: str, sheet_id: int, cell_range: str):
+        with closing(self._connect()) as connection, connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO named_ranges (name, sheet_id, cell_range) VALUES (?, ?, ?)",
+                (name, sheet_id, cell_range),
+            )
+
+
+def replicate(source: SheetsBackend, target: LocalBackend, sheet_ids: dict[str, int]):
+    """Copy the configured worksheets and every named range into a local replica"""
+    for sheet_id in sheet_ids.values():
+        target.import_sheet(sheet_id, source.sheet_title(sheet_id), source.get_values(sheet_id, unformatted=True))
+    for name, (sheet_id, cell_range) in source.named_ranges().items():
+        target.define_named_range(name, sheet_id, cell_range)
+
+
+if __name__ == "__main__":
+    # python -m utility.backend  -> refresh the local replica from Google Sheets
+    import streamlit as st
+    from utility import open_spreadsheet
+
+    spreadsheet = open_spreadsheet()
+    replicate(
+        GSpreadBackend(lambda: spreadsheet, st.secrets["insert_url"]),
+        LocalBackend(st.secrets.get("local_backend_path", "local_sheets.db")),
+        dict(st.secrets["sheets_id"]),
+    )
@@ -0,0 +1,65 @@
+import polars as pl
+from utility.utils import format_rupiah
+
+# Planned against actual per budget item, computed from the Monthly Planning
+# sheet and the monthly transaction rollups instead of the overview formulas
+ITEM_KEYS = ['year', 'month', 'Cash Flow Type', 'Budget Category', 'Budget Item']
+CASH_FLOW_ORDER = ['Income', 'Expense', 'Savings']
+
+def budget_vs_actual(plan: pl.DataFrame, rollups: pl.DataFrame, months: pl.DataFrame | None = None) -> pl.DataFrame:
+    """Planned, actual and difference per budget item for a batch of months
+
+    `months` holds `year`/`month` pairs; by default every month with
+    transactions. Items spent on without a plan appear with nothing planned,
+    planned items without transactions with nothing spent.
+    """
+    actual = rollups.lazy().group_by(ITEM_KEYS).agg(pl.col('Amount').sum().alias('Actual'))
+    if months is None:
+        months = rollups.select('year', 'month').unique()
+    months = months.lazy().select(pl.col('year').cast(pl.Int32), pl.col('month').cast(pl.Int8))
+    planned = months.join(
+        plan.lazy().group_by('Cash Flow Type', 'Budget Category', 'Budget Item', maintain_order=True).agg(
+            pl.col('Planned Amount').sum().alias('Planned')
+        ),
+        how='cross',
+    )
+    actual = actual.with_columns(pl.col('year').cast(pl.Int32), pl.col('month').cast(pl.Int8)).join(
+        months, on=['year', 'month'], how='semi'
+    )
+    return planned.join(actual, on=ITEM_KEYS, how='full', coalesce=True, maintain_order='left').with_columns(
+        pl.col('Planned', 'Actual').fill_null(0),
+    ).with_columns(
+        (pl.col('Actual') - pl.col('Planned')).alias('Difference'),
+    ).collect()
+
+def category_overview(items: pl.DataFrame) -> pl.DataFrame:
+    """The overview category table: one row per month and budget category"""
+    return items.group_by('year', 'month', 'Cash Flow Type', 'Budget Category', maintain_order=True).agg(
+        pl.col('Planned', 'Actual', 'Difference').sum()
+    )
+
+def cash_flow(items: pl.DataFrame) -> pl.DataFrame:
+    """Planned and actual per cash flow type and month, as display strings"""
+    return items.group_by('year', 'month', 'Cash Flow Type').agg(
+        pl.col('Planned', 'Actual').sum()
+    ).sort(
+        'year', 'month', pl.col('Cash Flow Type').replace_strict(
+            {flow: order for order, flow in enumerate(CASH_FLOW_ORDER)}, default=len(CASH_FLOW_ORDER)
+        )
+    ).select(
+        'year', 'month', pl.col('Cash Flow Type').alias('Cash Flow'), format_rupiah(pl.col('Planned', 'Actual'))
+    )
+
+def month_totals(items: pl.DataFrame) -> pl.DataFrame:
+    """Saved and unallocated amounts per month
+
+    Unallocated is what came in and was neither spent nor saved.
+    """
+    actual = {
+        flow: pl.col('Actual').filter(pl.col('Cash Flow Type').eq(flow)).sum()
+        for flow in CASH_FLOW_ORDER
+    }
+    return items.group_by('year', 'month').agg(
+        actual['Savings'].alias('total_saved'),
+        (actual['Income'] - actual['Expense'] - actual['Savings']).alias('total_remaining'),
+    )
@@ -0,0 +1,150 @@
+import functools
+import sys
+import threading
+import time
+from collections import OrderedDict
+import polars as pl
+import streamlit as st
+from utility.instrumentation import measure_result, span
+
+# Seconds a loaded dataset stays fresh; override per dataset under [cache_ttl] in secrets
+DEFAULT_TTL = {
+    'account_data': 600,
+    'monthly_budget': 3600,
+    'anual_budget': 3600,
+    'transactions': 300,
+    'rollups': 300,
+    'budget': 300,
+    'cashflow_data': 300,
+    'category_budget': 300,
+    'overview_metrics': 300,
+}
+
+def size_of(value) -> int:
+    """Approximate memory held by a cached value, in bytes"""
+    if isinstance(value, pl.DataFrame):
+        return value.estimated_size()
+    # pandas is only loaded once a widget converted a frame, so never import it here
+    pd = sys.modules.get('pandas')
+    if pd is not None and isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(deep=True).sum())
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(size_of(item) for item in value.values())
+    if isinstance(value, (list, tuple)):
+        return sys.getsizeof(value) + sum(size_of(item) for item in value)
+    return sys.getsizeof(value)
+
+
+class ResultCache:
+    """Process-wide loader results keyed by (dataset, year, month)
+
+    Entries expire after their dataset's TTL and the least recently used ones
+    are evicted once the cache holds more than `max_bytes`. Invalidation can
+    target one dataset, or one dataset for a single month.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._key_locks = {}
+
+    def get(self, key: tuple, ttl: float):
+        """Return (hit, value) for `key`, dropping it when older than `ttl` seconds"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return False, None
+            value, stored_at, size = entry
+            if time.time() - stored_at > ttl:
+                self._drop(key)
+                return False, None
+            self._entries.move_to_end(key)
+            return True, value
+
+    def contains(self, key: tuple, ttl: float) -> bool:
+        """Whether `key` holds a result younger than `ttl` seconds; unlike `get` it is not a use"""
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry is not None and time.time() - entry[1] <= ttl
+
+    def put(self, key: tuple, value):
+        size = size_of(value)
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = (value, time.time(), size)
+            self._bytes += size
+            while self._bytes > self.max_bytes and len(self._entries) > 1:
+                self._drop(next(iter(self._entries)))
+
+    def invalidate(self, dataset: str | None = None, year: int | None = None, month: str | None = None):
+        """Drop matching entries; with no arguments the whole cache is cleared"""
+        with self._lock:
+            for key in list(self._entries):
+                if dataset is not None and key[0] != dataset:
+                    continue
+                if year is not None and key[1] != year:
+                    continue
+                if month is not None and key[2] != month:
+                    continue
+                self._drop(key)
+
+    def key_lock(self, key: tuple) -> threading.Lock:
+        """Lock serializing the computation of one key, so concurrent misses load it once"""
+        with self._lock:
+            return self._key_locks.setdefault(key, threading.Lock())
+
+    def _drop(self, key: tuple):
+        _, _, size = self._entries.pop(key)
+        self._bytes -= size
+
+
+@st.cache_resource
+def get_result_cache() -> ResultCache:
+    return ResultCache(st.secrets.get("cache_max_mb", 256) * 1024 * 1024)
+
+def dataset_ttl(dataset: str) -> float:
+    return st.secrets.get("cache_ttl", {}).get(dataset, DEFAULT_TTL.get(dataset, 600))
+
+def cached_dataset(dataset: str, monthly: bool = False):
+    """Cache a loader in the result cache under `dataset`
+
+    Monthly loaders take `(year, month)` and are cached per month; the others
+    are called without arguments and cached once. Either way the wrapped
+    loader accepts `(year, month)`, so pages can load any dataset uniformly.
+    """
+    def key_of(year: int | None, month: str | None) -> tuple:
+        return (dataset, year, month) if monthly else (dataset, None, None)
+
+    def decorator(loader):
+        @functools.wraps(loader)
+        def wrapper(year: int | None = None, month: str | None = None):
+            if monthly and (year is None or month is None):
+                raise TypeError(f"{dataset} is cached per month and needs a year and a month")
+            key = key_of(year, month)
+            cache = get_result_cache()
+            with span('loader', dataset) as info:
+                hit, value = cache.get(key, dataset_ttl(dataset))
+                if not hit:
+                    with cache.key_lock(key):
+                        hit, value = cache.get(key, dataset_ttl(dataset))
+                        if not hit:
+                            value = loader(year, month) if monthly else loader()
+                            cache.put(key, value)
+                info['cache'] = 'hit' if hit else 'miss'
+                info['rows'], info['bytes'] = measure_result(value)
+            return value
+
+        wrapper.is_cached = lambda year=None, month=None: get_result_cache().contains(
+            key_of(year, month), dataset_ttl(dataset)
+        )
+        wrapper.peek = lambda year=None, month=None: get_result_cache().get(key_of(year, month), dataset_ttl(dataset))[1]
+        wrapper.store = lambda value, year=None, month=None: get_result_cache().put(key_of(year, month), value)
+        wrapper.invalidate = lambda year=None, month=None: get_result_cache().invalidate(dataset, year, month)
+        return wrapper
+    return decorator
+
+def invalidate(dataset: str | None = None, year: int | None = None, month: str | None = None):
+    get_result_cache().invalidate(dataset, year, month)
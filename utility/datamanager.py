@@ -1,86 +1,660 @@
+import datetime
+import functools
+import io
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
 import polars as pl
-import pandas as pd
 import streamlit as st
-from utility import get_worksheet
-from utility.utils import currency_to_number
-
-@st.cache_data(show_spinner="Loading monthly budget data...")
-def load_account_data() -> pd.DataFrame:
-    worksheet = get_worksheet()
-    sheet = worksheet.get_worksheet_by_id(st.secrets["sheets_id"]["accounts_state"])
-    account_data = pl.DataFrame(sheet.get_all_records()).select(
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+from utility import archive, budget, cache, get_backend, goals, snapshot
+from utility.aggregates import AggregateCube
+from utility.cache import cached_dataset
+from utility.instrumentation import span, timed
+from utility.outbox import Outbox, OutboxWorker
+from utility.prefetch import Prefetcher
+from utility.utils import MONTH_LIST, month_bounds
+
+def load_sheet_snapshot(sheet_key: str) -> pl.DataFrame:
+    """Return the raw worksheet, served from the local snapshot while it is fresh"""
+    with span('snapshot', sheet_key) as info:
+        frame = snapshot.read_snapshot(sheet_key, max_age=st.secrets.get("snapshot_ttl", 3600))
+        info['cache'] = 'hit'
+        if frame is None:
+            # A stale snapshot is only downloaded again when the worksheet changed
+            frame, downloaded = snapshot.sync_changed(
+                sheet_key, get_backend(), st.secrets["sheets_id"][sheet_key],
+                full_every=st.secrets.get("snapshot_full_refresh", 86_400),
+            )
+            info['cache'] = 'miss' if downloaded else 'unchanged'
+        info['rows'], info['bytes'] = frame.height, frame.estimated_size()
+    return frame
+
+# ---------------------------
+# Parsing of raw worksheet frames
+# ---------------------------
+def parse_account_data(raw: pl.DataFrame) -> pl.DataFrame:
+    return raw.select(
         pl.col("Alias").str.split(' - ').list.get(1).alias('Account'),
         pl.col("Alias").str.split(' - ').list.get(0).alias('Owner'),
         pl.col('Account Balance')
-    ).to_pandas()
+    )
+
+def parse_category_overview(raw: pl.DataFrame) -> pl.DataFrame:
+    return raw.with_columns(
+        pl.col('Planned').abs(),
+        pl.col('Actual').abs(),
+        (pl.col('Actual').abs() - pl.col('Planned').abs()).alias('Diff')
+    )
+
+def parse_anual_budget(raw: pl.DataFrame) -> pl.DataFrame:
+    return raw.filter(
+        pl.col('Funds Achieved').eq(False)
+    )
+
+# ---------------------------
+# Loaders
+# ---------------------------
+@cached_dataset('account_data')
+def load_account_data() -> pl.DataFrame:
+    account_data = parse_account_data(load_sheet_snapshot("accounts_state"))
     return account_data
 
-def load_cashflow_data():
-    worksheet = get_worksheet()
-    sheet = worksheet.get_worksheet_by_id(st.secrets["sheets_id"]["monthly_overview"])
-    cash_flow_raw = sheet.get_values(st.secrets["table_definition"]["cash_flow"])
-    return pd.DataFrame(cash_flow_raw[1:], columns=cash_flow_raw[0])    
-
-@st.cache_data(show_spinner="Loading monthly budget data...")
-def load_category_budget_data() -> pd.DataFrame:
-    worksheet = get_worksheet()
-    sheet = worksheet.get_worksheet_by_id(st.secrets["sheets_id"]["monthly_overview"])
-    category_overview_raw = sheet.get_values(st.secrets["table_definition"]["category_overview"])
-    category_data = pl.from_pandas(pd.DataFrame(category_overview_raw[1:], columns=category_overview_raw[0]))
-    
-    if 'category_summary' not in st.session_state:
-        st.session_state.category_summary = category_data.with_columns(
-            currency_to_number('Planned').abs(),
-            currency_to_number('Actual').abs(),
-            (currency_to_number('Actual').abs() - currency_to_number('Planned').abs()).alias('Diff')
-        ).to_pandas()
-
-    return st.session_state.category_summary
-
-@st.cache_data(show_spinner="Loading monthly budget data...")
+@cached_dataset('monthly_budget')
 def load_monthly_budget_data() -> pl.DataFrame:
-    worksheet = get_worksheet()
-    sheet = worksheet.get_worksheet_by_id(st.secrets["sheets_id"]["monthly_planning"])
-    monthly_budget = pl.DataFrame(sheet.get_all_records())
+    monthly_budget = load_sheet_snapshot("monthly_planning")
 
     return monthly_budget
 
-def load_overview_metrics() -> dict:
-    worksheet = get_worksheet()
-    sheet = worksheet.get_worksheet_by_id(st.secrets["sheets_id"]["monthly_overview"])
-    if 'overall_metrics' not in st.session_state:
-        st.session_state.overall_metrics = {
-        'total_saved': sheet.get_values('Total_This_Month_Saving')[0][0],
-        'total_remaining': sheet.get_values('Unallocated')[0][0],
-        'total_holding': sheet.get_values('Total_Holding')[0][0],
+@cached_dataset('budget')
+def load_budget_items() -> pl.DataFrame:
+    """Planned against actual per budget item, for every month with transactions and the current one"""
+    rollups = load_monthly_rollups()
+    today = datetime.date.today()
+    months = pl.concat([
+        rollups.select('year', 'month'),
+        pl.DataFrame({'year': [today.year], 'month': [today.month]}, schema=rollups.select('year', 'month').schema),
+    ]).unique()
+    return budget.budget_vs_actual(load_monthly_budget_data(), rollups, months)
+
+def budget_items(year: int, month: str) -> pl.DataFrame:
+    """Budget items of one month; months outside the batch are computed on demand"""
+    month_number = MONTH_LIST.index(month) + 1
+    items = load_budget_items().filter(pl.col('year').eq(year), pl.col('month').eq(month_number))
+    if items.is_empty():
+        items = budget.budget_vs_actual(
+            load_monthly_budget_data(), load_monthly_rollups(), pl.DataFrame({'year': [year], 'month': [month_number]})
+        )
+    return items
+
+# Derived from the budget batch; every one of them but the batch is cached per month
+BUDGET_DATASETS = ('budget', 'cashflow_data', 'category_budget', 'overview_metrics')
+
+def invalidate_budget():
+    """Drop planned against actual, for every month"""
+    for dataset in BUDGET_DATASETS:
+        cache.invalidate(dataset)
+
+def refresh_budget_months(months: pl.DataFrame, rollups: pl.DataFrame):
+    """Recompute planned against actual for the `year`/`month` pairs in `months` only"""
+    batch = load_budget_items.peek()
+    if batch is not None:
+        months = months.select(pl.col('year').cast(batch.schema['year']), pl.col('month').cast(batch.schema['month']))
+        fresh = budget.budget_vs_actual(load_monthly_budget_data(), rollups, months)
+        load_budget_items.store(pl.concat([batch.join(months, on=['year', 'month'], how='anti'), fresh]))
+    for year, month in months.iter_rows():
+        for dataset in BUDGET_DATASETS[1:]:
+            cache.invalidate(dataset, year, MONTH_LIST[month - 1])
+
+@cached_dataset('cashflow_data', monthly=True)
+def load_cashflow_data(year: int, month: str) -> pl.DataFrame:
+    return budget.cash_flow(budget_items(year, month)).drop('year', 'month')
+
+@cached_dataset('category_budget', monthly=True)
+def load_category_budget_data(year: int, month: str) -> pl.DataFrame:
+    category_data = budget.category_overview(budget_items(year, month)).drop('year', 'month')
+    return parse_category_overview(category_data)
+
+@cached_dataset('overview_metrics', monthly=True)
+def load_overview_metrics(year: int, month: str) -> dict:
+    totals = budget.month_totals(budget_items(year, month))
+    return {
+        'total_saved': totals['total_saved'].sum(),
+        'total_remaining': totals['total_remaining'].sum(),
+        'total_holding': load_account_data()['Account Balance'].sum(),
     }
-    return st.session_state.overall_metrics
 
-@st.cache_data(show_spinner="Loading transaction data...")
-def load_transaction() -> pl.DataFrame:
-    worksheet = get_worksheet()
-    sheet = worksheet.get_worksheet_by_id(
-        st.secrets["sheets_id"]["money_tracker"]
+@st.cache_resource
+def get_transactions_lock() -> threading.Lock:
+    """Serializes writes to the Money Tracker snapshot, its partitions and its live rollup
+
+    Page syncs and the outbox worker both add rows to them; without the lock
+    the same rows could be written twice.
+    """
+    return threading.Lock()
+
+@cached_dataset('transactions')
+def sync_transactions() -> float:
+    """Bring the month-partitioned Money Tracker dataset up to date with the sheet
+
+    Returns the time the data last changed, which identifies this version of it.
+    """
+    with get_transactions_lock():
+        # Only the rows appended since the last sync are fetched from the sheet
+        raw, first_new_row = snapshot.sync_appended(
+            "money_tracker", get_backend(), st.secrets["sheets_id"]["money_tracker"]
+        )
+        directory = snapshot.partition_dir("money_tracker")
+        if first_new_row is None or not directory.exists():
+            snapshot.write_partitions(raw, directory, 'Transaction Date')
+            archive.write_live_rollup(archive.monthly_rollup(raw))
+        elif first_new_row < raw.height:
+            snapshot.write_partitions(raw[first_new_row:], directory, 'Transaction Date', append=True)
+            archive.update_live_rollup(raw[first_new_row:])
+    return snapshot.data_version("money_tracker")
+
+def scan_live_transactions() -> pl.LazyFrame:
+    """Live sheet rows and submissions still waiting to sync, minus any year already frozen into the archive"""
+    directory = snapshot.partition_dir("money_tracker")
+    live = snapshot.scan_partitions(directory, snapshot.read_snapshot_schema("money_tracker"))
+    pending = pending_transactions()
+    if pending is not None:
+        partition_schema = live.collect_schema()
+        live = pl.concat([
+            live,
+            pending.lazy().with_columns(
+                pl.col('Transaction Date').dt.year().cast(partition_schema['year']).alias('year'),
+                pl.col('Transaction Date').dt.month().cast(partition_schema['month']).alias('month'),
+            ),
+        ], how='vertical_relaxed')
+    frozen = archive.archived_years()
+    return live.filter(~pl.col('year').is_in(frozen)) if frozen else live
+
+def scan_transactions() -> pl.LazyFrame:
+    """Every transaction, archived years and the live sheet, with `year`/`month` partition columns"""
+    sync_transactions()
+    live = scan_live_transactions()
+    archived = archive.scan_archive()
+    return live if archived is None else pl.concat([archived, live], how='vertical_relaxed')
+
+
+def filter_transactions(
+    transactions: pl.LazyFrame,
+    year: int,
+    months: str | tuple[str, str],
+    categories: list[str] | None = None,
+    items: list[str] | None = None,
+) -> pl.LazyFrame:
+    """Restrict a partitioned transaction scan to a month range, categories and items
+
+    `months` is a single month name or an inclusive (first, last) range that
+    may roll over into the next year. The `year`/`month` predicates prune
+    whole partitions before any file is read.
+    """
+    first_month, last_month = (months, months) if isinstance(months, str) else months
+    start, end = month_bounds(year, first_month, last_month)
+    last_day = end - datetime.timedelta(days=1)
+    month_key = pl.col('year') * 12 + pl.col('month')
+
+    predicates = [
+        month_key.is_between(start.year * 12 + start.month, last_day.year * 12 + last_day.month),
+        pl.col('Transaction Date').ge(start),
+        pl.col('Transaction Date').lt(end),
+    ]
+    if categories is not None:
+        predicates.append(pl.col('Budget Category').is_in(categories))
+    if items is not None:
+        predicates.append(pl.col('Budget Item').is_in(items))
+    return transactions.filter(*predicates).drop('year', 'month')
+
+@timed('loader')
+def query_transactions(
+    year: int,
+    months: str | tuple[str, str],
+    categories: list[str] | None = None,
+    items: list[str] | None = None,
+) -> pl.LazyFrame:
+    return filter_transactions(scan_transactions(), year, months, categories, items)
+
+# ---------------------------
+# Transaction grid pages
+# ---------------------------
+GROUPABLE_COLUMNS = ['Budget Category', 'Budget Item', 'Cash Flow Type', 'Account', 'Transaction Date']
+
+def search_transactions(transactions: pl.LazyFrame, search: str = '') -> pl.LazyFrame:
+    """Keep rows where any text column contains `search`, ignoring case"""
+    if not search:
+        return transactions
+    pattern = f"(?i){re.escape(search)}"
+    return transactions.filter(pl.any_horizontal(pl.col(pl.Utf8).str.contains(pattern)))
+
+def count_transactions(transactions: pl.LazyFrame) -> int:
+    return transactions.select(pl.len()).collect().item()
+
+def transaction_page(
+    transactions: pl.LazyFrame,
+    sort_by: str,
+    descending: bool = True,
+    page: int = 0,
+    page_size: int = 100,
+) -> pl.DataFrame:
+    """One sorted page of a transaction query; only `page_size` rows are materialized"""
+    return transactions.sort(sort_by, descending=descending, nulls_last=True).slice(page * page_size, page_size).collect()
+
+def group_transactions(transactions: pl.LazyFrame, group_by: str) -> pl.DataFrame:
+    """Per-group count and totals, computed server-side for the grouped grid"""
+    return transactions.group_by(group_by).agg(
+        pl.len().alias('Transactions'),
+        pl.col('Transasction Amount').sum().alias('Total Amount'),
+        pl.col('Cashflow').sum().alias('Net Cashflow'),
+    ).sort('Total Amount', descending=True).collect()
+
+@st.cache_resource(max_entries=2, show_spinner="Aggregating transactions...")
+def build_aggregate_cube(data_version: float, archived: tuple[int, ...], pending: tuple) -> AggregateCube:
+    return AggregateCube.from_transactions(scan_transactions())
+
+@timed('loader')
+def load_aggregate_cube() -> AggregateCube:
+    """Aggregates of the current transaction data, rebuilt only after a sync or a local insert"""
+    sync_transactions()
+    return build_aggregate_cube(
+        snapshot.data_version("money_tracker"), tuple(archive.archived_years()), get_outbox().version()
     )
-    return pl.DataFrame(sheet.get_all_records()).with_columns(
-        currency_to_number('Transasction Amount'),
-        currency_to_number('Cashflow'),
-        pl.col('Transaction Date').str.to_date('%d/%m/%Y')
+
+# ---------------------------
+# Multi-year trends
+# ---------------------------
+@cached_dataset('rollups')
+def load_monthly_rollups() -> pl.DataFrame:
+    """Monthly rollups of every year: frozen with the archive, maintained on sync for the live sheet"""
+    sync_transactions()
+    live = archive.read_live_rollup()
+    if live is None:
+        with get_transactions_lock():
+            live = archive.monthly_rollup(
+                snapshot.scan_partitions(snapshot.partition_dir("money_tracker"), snapshot.read_snapshot_schema("money_tracker"))
+            )
+            archive.write_live_rollup(live)
+    # The live sheet may still hold years already frozen into the archive
+    pending = pending_transactions()
+    if pending is not None:
+        live = archive.merge_rollups(live, archive.monthly_rollup(pending))
+    archived = archive.archived_years()
+    live = live.filter(~pl.col('year').is_in(archived)) if archived else live
+    frozen = archive.read_rollups()
+    return live if frozen is None else pl.concat([frozen, live], how='vertical_relaxed')
+
+def category_spend_by_month(
+    categories: list[str] | None = None,
+    years: list[int] | None = None,
+    cashflow_type: str = 'Expense',
+) -> pl.DataFrame:
+    """One row per (year, month, Budget Category) with the summed amount"""
+    rollups = load_monthly_rollups().filter(pl.col('Cash Flow Type').eq(cashflow_type))
+    if categories is not None:
+        rollups = rollups.filter(pl.col('Budget Category').is_in(categories))
+    if years is not None:
+        rollups = rollups.filter(pl.col('year').is_in(years))
+    return rollups.group_by('year', 'month', 'Budget Category').agg(
+        pl.col('Amount').sum(), pl.col('Transactions').sum()
+    ).sort('year', 'month', 'Budget Category')
+
+def savings_rate_by_year() -> pl.DataFrame:
+    """Income, savings and expenses per year, with savings as a share of income"""
+    totals = load_monthly_rollups().group_by('year').agg(
+        pl.col('Amount').filter(pl.col('Cash Flow Type').eq(flow_type)).sum().alias(flow_type)
+        for flow_type in ('Income', 'Savings', 'Expense')
     )
+    return totals.with_columns(
+        (pl.col('Savings') / pl.col('Income')).fill_nan(None).alias('Savings Rate')
+    ).sort('year')
 
+@cached_dataset('anual_budget')
 def load_anual_budget() -> pl.DataFrame:
-    worksheet = get_worksheet()
-    sheet = worksheet.get_worksheet_by_id(
-        st.secrets["sheets_id"]["anual_planning"]
+    return parse_anual_budget(load_sheet_snapshot("anual_planning"))
+
+@timed('loader')
+def project_goals(scenarios: pl.DataFrame | None = None, window: int = 6) -> pl.DataFrame:
+    """Every open goal under every scenario, at the savings rate observed over the last `window` months"""
+    today = datetime.date.today()
+    contributions = goals.observed_contributions(load_monthly_rollups(), today, window)
+    return goals.project_goals(load_anual_budget(), contributions, today, scenarios)
+
+# ---------------------------
+# Transaction submission
+# ---------------------------
+RECEIPT_COLUMNS = ['Transaction Date', 'Cash Flow Type', 'Amount', 'Account', 'Budget Category', 'Budget Item', 'Notes']
+CASHFLOW_SIGN = {'Income': 1, 'Expense': -1, 'Savings': -1}
+
+def transaction_row(
+    tx_date: datetime.date,
+    cashflow_type: str,
+    amount: float,
+    account: str,
+    category: str,
+    item: str,
+    notes: str = '',
+    timestamp: datetime.datetime | None = None,
+) -> list:
+    """One Money Tracker row; the Cashflow column is left to the sheet formula"""
+    # The sheet keeps whole seconds, so the local copy must match the synced row
+    timestamp = (timestamp or datetime.datetime.now()).replace(microsecond=0)
+    return [timestamp, tx_date, cashflow_type, amount, '', account, category, item, notes]
+
+def parse_receipts(text: str, monthly_budget: pl.DataFrame) -> tuple[pl.DataFrame, pl.DataFrame]:
+    """Split a pasted or uploaded receipts CSV into valid and rejected rows
+
+    The CSV holds the `RECEIPT_COLUMNS`, with dates as `%d/%m/%Y` and amounts
+    in Rupiah notation (`.` thousands, `,` decimals). Rows with an
+    unknown budget item, a bad date or a non-positive amount are rejected.
+    """
+    receipts = pl.read_csv(io.StringIO(text), infer_schema=False)
+    missing = [column for column in RECEIPT_COLUMNS if column not in receipts.columns]
+    if missing:
+        raise ValueError(f"Missing columns: {', '.join(missing)}")
+
+    receipts = receipts.select(RECEIPT_COLUMNS).with_columns(
+        pl.col('Transaction Date').str.strip_chars().str.to_date('%d/%m/%Y', strict=False),
+        pl.col('Amount').str.replace_all(r'[^\d,-]', '').str.replace(',', '.').cast(pl.Float64, strict=False),
+        pl.col('Notes').fill_null(''),
+    ).with_row_index('Row', offset=1)
+    known_items = monthly_budget.select('Budget Category', 'Budget Item').with_columns(pl.lit(True).alias('_known'))
+    checked = receipts.join(known_items, on=['Budget Category', 'Budget Item'], how='left')
+    is_valid = (
+        pl.col('_known').is_not_null()
+        & pl.col('Transaction Date').is_not_null()
+        & pl.col('Amount').gt(0)
+        & pl.col('Cash Flow Type').is_in(list(CASHFLOW_SIGN))
     )
-    return pl.DataFrame(sheet.get_all_records()).with_columns(
-        pl.col('Funds Achieved').eq('TRUE'),
-        currency_to_number('Financial Goal'),
-        currency_to_number('Currenlty Achieved'),
-        currency_to_number('Remaining'),
-        pl.col('Due Date').str.to_date("%d/%m/%Y")
-    ).filter(
-        pl.col('Funds Achieved').eq(False)
+    return checked.filter(is_valid).drop('_known'), checked.filter(~is_valid).drop('_known')
+
+def receipts_to_rows(receipts: pl.DataFrame) -> list[list]:
+    timestamp = datetime.datetime.now()
+    return [
+        transaction_row(
+            row['Transaction Date'], row['Cash Flow Type'], row['Amount'], row['Account'],
+            row['Budget Category'], row['Budget Item'], row['Notes'], timestamp,
+        )
+        for row in receipts.iter_rows(named=True)
+    ]
+
+def transaction_frame(rows: list[list], schema: pl.Schema) -> pl.DataFrame:
+    """Money Tracker rows typed like the synced data, with the Cashflow the sheet formula would give"""
+    return pl.DataFrame(rows, schema=list(schema), orient='row', strict=False).with_columns(
+        (pl.col('Transasction Amount').cast(pl.Float64)
+         * pl.col('Cash Flow Type').replace_strict(CASHFLOW_SIGN, default=-1)).alias('Cashflow')
+    ).cast(schema)
+
+def record_transactions(rows: list[list]) -> bool:
+    """Add freshly written rows to the local transaction data instead of re-syncing it
+
+    Returns False when there is no local copy to add them to. Hold
+    `get_transactions_lock` from writing the rows to the sheet until they
+    are recorded, or a sync in between would add them twice.
+    """
+    frame = snapshot.read_snapshot("money_tracker")
+    directory = snapshot.partition_dir("money_tracker")
+    if frame is None or not directory.exists():
+        return False
+    new_rows = transaction_frame(rows, frame.schema)
+    snapshot.write_snapshot("money_tracker", pl.concat([frame, new_rows]))
+    snapshot.write_partitions(new_rows, directory, 'Transaction Date', append=True)
+    archive.update_live_rollup(new_rows)
+    return True
+
+def invalidate_transactions():
+    """Drop every cached result derived from the transactions"""
+    sync_transactions.invalidate()
+    load_monthly_rollups.invalidate()
+    invalidate_budget()
+
+# ---------------------------
+# Offline transaction entry
+# ---------------------------
+@st.cache_resource
+def get_outbox() -> Outbox:
+    return Outbox(st.secrets.get("outbox_path", "outbox.db"))
+
+@st.cache_resource
+def get_outbox_worker() -> OutboxWorker:
+    return OutboxWorker(sync_outbox, interval=st.secrets.get("outbox_interval", 5))
+
+def pending_transactions() -> pl.DataFrame | None:
+    """Submissions not yet written to the sheet, typed like the synced transactions"""
+    entries = get_outbox().pending()
+    if not entries:
+        return None
+    # Entries left from before a restart are drained once anything reads them
+    get_outbox_worker()
+    schema = snapshot.read_snapshot_schema("money_tracker")
+    if schema is None:
+        return None
+    return transaction_frame([entry['row'] for entry in entries], schema)
+
+def submit_transactions(rows: list[list]) -> list[str]:
+    """Queue rows for the Money Tracker; they show up in every page before they reach the sheet
+
+    The cached rollups gain the new rows, and only the budgets of the
+    months they fall in are recomputed.
+    """
+    # Read before queueing: a rollup computed afterwards already counts the rows
+    rollups = load_monthly_rollups.peek()
+    keys = get_outbox().enqueue(st.secrets["sheets_id"]["money_tracker"], rows)
+    schema = snapshot.read_snapshot_schema("money_tracker")
+    if rollups is None or schema is None:
+        load_monthly_rollups.invalidate()
+        invalidate_budget()
+    else:
+        new_rows = transaction_frame(rows, schema).filter(
+            ~pl.col('Transaction Date').dt.year().is_in(archive.archived_years())
+        )
+        added = archive.monthly_rollup(new_rows)
+        rollups = archive.merge_rollups(rollups, added.cast(rollups.select(added.columns).schema))
+        load_monthly_rollups.store(rollups)
+        refresh_budget_months(added.select('year', 'month').unique(), rollups)
+    get_outbox_worker().wake()
+    return keys
+
+def already_written(entries: list[dict]) -> set[str]:
+    """Keys of entries whose earlier, failed attempt still reached the sheet"""
+    sync_transactions.invalidate()
+    sync_transactions()
+    synced = snapshot.read_snapshot("money_tracker")
+    attempted = transaction_frame([entry['row'] for entry in entries], synced.schema).with_columns(
+        pl.Series('key', [entry['key'] for entry in entries])
+    )
+    # Identical rows are matched one for one, so a duplicate receipt is not swallowed
+    columns = [column for column in synced.columns if column != 'Cashflow']
+    occurrence = pl.int_range(pl.len()).over(columns).alias('occurrence')
+    recent = synced.filter(pl.col('Timestamp') >= attempted['Timestamp'].min())
+    found = attempted.with_columns(occurrence).join(
+        recent.with_columns(occurrence), on=columns + ['occurrence'], how='semi', nulls_equal=True
+    )
+    return set(found['key'])
+
+def sync_outbox(batch_size: int = 100) -> bool:
+    """Write the oldest pending submissions to the sheet; returns True while more are waiting"""
+    outbox = get_outbox()
+    entries = outbox.pending(batch_size)
+    if not entries:
+        outbox.purge()
+        return False
+
+    retried = [entry for entry in entries if entry['attempts']]
+    written = already_written(retried) if retried else set()
+    if written:
+        outbox.mark_synced(list(written))
+        # already_written has just synced the transactions; only what was derived before that is dropped
+        load_monthly_rollups.invalidate()
+        invalidate_budget()
+        entries = [entry for entry in entries if entry['key'] not in written]
+
+    if entries:
+        rows, keys = [entry['row'] for entry in entries], [entry['key'] for entry in entries]
+        # No sync may pick the rows up from the sheet before they are recorded locally
+        with get_transactions_lock():
+            try:
+                get_backend().append_rows(st.secrets["sheets_id"]["money_tracker"], rows, keys)
+            except Exception as error:
+                outbox.mark_failed(keys, str(error))
+                raise
+            # Marked synced before the local copy gains the rows, so they are never counted twice
+            outbox.mark_synced(keys)
+            recorded = record_transactions(rows)
+        if recorded:
+            # The rows moved from the outbox into the local data, so the rollups and
+            # budgets derived from both still hold; only the data version moved on
+            sync_transactions.store(snapshot.data_version("money_tracker"))
+        else:
+            invalidate_transactions()
+    return outbox.pending_count() > 0
+
+# ---------------------------
+# Page-level prefetch
+# ---------------------------
+DATASETS = {
+    'account_data': load_account_data,
+    'cashflow_data': load_cashflow_data,
+    'category_budget': load_category_budget_data,
+    'monthly_budget': load_monthly_budget_data,
+    'overview_metrics': load_overview_metrics,
+    'anual_budget': load_anual_budget,
+    'transactions': sync_transactions,
+}
+
+def prefetch(year: int, month: str, *datasets: str) -> tuple[dict, dict[str, Exception]]:
+    """Load the named `DATASETS` for one month concurrently on a bounded thread pool
+
+    Every fetch is independent network I/O, so a cold page load takes about
+    as long as its slowest dataset. Returns the loaded datasets and the
+    error of each one that failed, so a page can still render the rest.
+    """
+    ctx = get_script_run_ctx()
+
+    def load(name: str):
+        # Worker threads need the script context for st.cache_data and st.session_state
+        add_script_run_ctx(threading.current_thread(), ctx)
+        return DATASETS[name](year, month)
+
+    workers = max(1, min(len(datasets), st.secrets.get("prefetch_workers", 4)))
+    with st.spinner("Loading data..."), ThreadPoolExecutor(max_workers=workers, thread_name_prefix='prefetch') as pool:
+        futures = {name: pool.submit(load, name) for name in datasets}
+
+    loaded, errors = {}, {}
+    for name, future in futures.items():
+        if future.exception() is None:
+            loaded[name] = future.result()
+        else:
+            errors[name] = future.exception()
+    return loaded, errors
+
+# ---------------------------
+# Background prefetch
+# ---------------------------
+# Datasets of every page, so navigating between them hits a warm cache
+PAGE_DATASETS = {
+    'home': ('account_data', 'transactions', 'cashflow_data', 'category_budget', 'overview_metrics'),
+    'category_drilldown': ('transactions', 'category_budget', 'overview_metrics'),
+    'financial_goals': ('anual_budget', 'transactions'),
+    'input_transaction': ('category_budget', 'monthly_budget', 'account_data'),
+}
+MONTH_DATASETS = ('cashflow_data', 'category_budget', 'overview_metrics')
+
+@st.cache_resource
+def get_prefetcher() -> Prefetcher:
+    return Prefetcher(st.secrets.get("background_prefetch_workers", 2))
+
+def adjacent_months(year: int, month: str) -> list[tuple[int, str]]:
+    """The previous and next month, within the years that have data"""
+    index = year * 12 + MONTH_LIST.index(month)
+    years = archive.available_years()
+    return [
+        (neighbour // 12, MONTH_LIST[neighbour % 12])
+        for neighbour in (index - 1, index + 1)
+        if neighbour // 12 in years
+    ]
+
+def current_data_version() -> tuple:
+    """Identifies the current data: every worksheet snapshot, the archive and the submissions not yet synced"""
+    return (
+        *(snapshot.data_version(sheet_key) for sheet_key in SHEET_DATASETS),
+        tuple(archive.archived_years()),
+        get_outbox().version(),
     )
 
-    
\ No newline at end of file
+def schedule_prefetch(year: int, month: str):
+    """Warm what the next page or month switch will load, while this page is being read
+
+    Call once the page has rendered, so the warm-up never competes with it.
+    Only results that land in a cache are warmed, and only the ones missing
+    from it.
+    """
+    ctx = get_script_run_ctx()
+    if ctx is None:
+        return
+    # Sheet changes are polled in the background too, when configured
+    get_change_poller()
+    # Drilldown first: its aggregates are the slowest to load cold
+    tasks = {('aggregate_cube',): load_aggregate_cube}
+    if not load_monthly_rollups.is_cached():
+        tasks[('rollups',)] = load_monthly_rollups
+    months = [(year, month), *adjacent_months(year, month)]
+    for name in dict.fromkeys(name for datasets in PAGE_DATASETS.values() for name in datasets):
+        loader = DATASETS[name]
+        for key in ([(name, *selected) for selected in months] if name in MONTH_DATASETS else [(name,)]):
+            if not loader.is_cached(*key[1:]):
+                tasks[key] = functools.partial(loader, *key[1:])
+    get_prefetcher().schedule(ctx.session_id, tasks, current_data_version())
+
+# ---------------------------
+# Change detection
+# ---------------------------
+# Worksheets only ever appended to; the others are edited in place
+APPEND_ONLY_SHEETS = ('money_tracker',)
+
+# Cached datasets derived from each worksheet
+SHEET_DATASETS = {
+    'accounts_state': ('account_data', 'overview_metrics'),
+    'monthly_planning': ('monthly_budget', *BUDGET_DATASETS),
+    'anual_planning': ('anual_budget',),
+    'money_tracker': ('transactions', 'rollups', *BUDGET_DATASETS),
+}
+
+def refresh_changed_sheets(full: bool = False) -> list[str]:
+    """Re-sync only the worksheets that changed since their snapshot; returns their keys
+
+    One small read of its last rows tells whether the append-only Money
+    Tracker changed. That check misses edits above the last row, which is
+    how the other worksheets change (balances are formulas, plans are edited
+    in place), so with `full` those small worksheets are downloaded whole.
+    Unchanged worksheets keep their snapshot and every cached result derived
+    from it.
+    """
+    backend = get_backend()
+    changed = []
+    for sheet_key, datasets in SHEET_DATASETS.items():
+        sheet_id = st.secrets["sheets_id"][sheet_key]
+        if full and sheet_key not in APPEND_ONLY_SHEETS:
+            version = snapshot.data_version(sheet_key)
+            snapshot.sync_full(sheet_key, backend, sheet_id)
+            if snapshot.data_version(sheet_key) == version:
+                continue
+        elif snapshot.has_changed(sheet_key, backend, sheet_id):
+            snapshot.expire(sheet_key)
+        else:
+            snapshot.touch(sheet_key)
+            continue
+        changed.append(sheet_key)
+        for dataset in datasets:
+            cache.invalidate(dataset)
+    return changed
+
+def poll_changes() -> bool:
+    refresh_changed_sheets()
+    return False
+
+@st.cache_resource
+def get_change_poller() -> OutboxWorker | None:
+    """Background check for sheet changes every `change_poll_interval` seconds; off by default"""
+    interval = st.secrets.get("change_poll_interval", 0)
+    return OutboxWorker(poll_changes, interval=interval) if interval else None
@@ -0,0 +1,81 @@
+import datetime
+import polars as pl
+
+# Contribution levels compared by default, as a share of the observed savings rate
+DEFAULT_LEVELS = [1.0, 1.5]
+
+def month_index(year: pl.Expr | int, month: pl.Expr | int) -> pl.Expr | int:
+    """Months since year zero, so month arithmetic is plain subtraction"""
+    return year * 12 + month - 1
+
+def observed_contributions(rollups: pl.DataFrame, as_of: datetime.date, window: int = 6) -> pl.DataFrame:
+    """Average monthly savings per Budget Item over the `window` complete months before `as_of`
+
+    Months without a contribution count as zero.
+    """
+    current = month_index(as_of.year, as_of.month)
+    return rollups.lazy().filter(
+        pl.col('Cash Flow Type').eq('Savings'),
+        month_index(pl.col('year'), pl.col('month')).is_between(current - window, current - 1),
+    ).group_by('Budget Item').agg(
+        (pl.col('Amount').sum() / window).alias('Observed Contribution')
+    ).collect()
+
+def scenario_frame(levels: list[float], extra: float = 0) -> pl.DataFrame:
+    """What-if scenarios: the observed rate scaled by each level, plus `extra` per goal and month"""
+    suffix = f" + {extra:,.0f}" if extra else ""
+    return pl.DataFrame({
+        'Scenario': [f"{level:.0%} of observed{suffix}" for level in levels],
+        'Multiplier': [float(level) for level in levels],
+        'Extra': [float(extra)] * len(levels),
+    })
+
+def project_goals(
+    goals: pl.DataFrame,
+    contributions: pl.DataFrame,
+    as_of: datetime.date,
+    scenarios: pl.DataFrame | None = None,
+) -> pl.DataFrame:
+    """Project every goal under every scenario in one pass
+
+    One row per (goal, scenario) with the months left until the due date,
+    the monthly contribution required to meet it, the projected completion
+    date at the scenario's contribution and the surplus (positive) or
+    shortfall (negative) expected at the due date.
+    """
+    scenarios = scenarios if scenarios is not None else scenario_frame(DEFAULT_LEVELS)
+    current = month_index(as_of.year, as_of.month)
+    due = pl.col('Due Date')
+    months_left = (
+        month_index(due.dt.year(), due.dt.month()) - current - (due.dt.day() < as_of.day).cast(pl.Int32)
+    ).clip(lower_bound=0)
+    contribution = pl.col('Observed Contribution') * pl.col('Multiplier') + pl.col('Extra')
+    months_to_complete = (pl.col('Remaining') / pl.col('Contribution')).ceil().cast(pl.Int64)
+
+    return goals.lazy().join(
+        contributions.lazy(), on='Budget Item', how='left'
+    ).with_columns(
+        pl.col('Observed Contribution').fill_null(0),
+        months_left.alias('Months Left'),
+        (pl.col('Currenlty Achieved') / pl.col('Financial Goal')).alias('Progress'),
+    ).with_columns(
+        (pl.col('Remaining') / pl.max_horizontal(pl.col('Months Left'), 1)).alias('Required Contribution'),
+    ).join(
+        scenarios.lazy().with_row_index('scenario_order'), how='cross'
+    ).with_columns(
+        contribution.alias('Contribution'),
+    ).with_columns(
+        pl.when(pl.col('Remaining') <= 0).then(0)
+        .when(pl.col('Contribution') > 0).then(months_to_complete)
+        .alias('Months To Complete'),
+        (pl.col('Currenlty Achieved') + pl.col('Contribution') * pl.col('Months Left') - pl.col('Financial Goal'))
+        .alias('Surplus'),
+    ).with_columns(
+        pl.lit(as_of).dt.offset_by(pl.format("{}mo", pl.col('Months To Complete'))).alias('Projected Completion'),
+    ).with_columns(
+        pl.col('Projected Completion').le(due).fill_null(False).alias('On Track'),
+    ).sort('scenario_order', 'Budget Item').select(
+        'Scenario', 'Budget Item', 'Financial Goal', 'Currenlty Achieved', 'Remaining', 'Progress', 'Due Date',
+        'Months Left', 'Observed Contribution', 'Required Contribution', 'Contribution',
+        'Months To Complete', 'Projected Completion', 'Surplus', 'On Track',
+    ).collect()
@@ -0,0 +1,248 @@
+"""Timing and Sheets API accounting for page renders
+
+With `instrumentation = true` in secrets, every loader, backend read and
+page section records an event: wall time, rows and bytes transferred and,
+for cached loaders, whether the cache hit. Events are kept in memory, also
+appended as JSON lines to `metrics_log` when one is set, and summarized with
+p50/p95 in the sidebar debug panel, shown with `debug_panel = true` in
+secrets or `?debug=1` in the URL.
+
+    python -m utility.instrumentation metrics.jsonl
+"""
+import functools
+import json
+import queue
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from pathlib import Path
+from urllib.parse import urlparse
+import polars as pl
+import streamlit as st
+from utility.backend import SheetsBackend
+
+class MetricsStore:
+    """Process-wide ring buffer of events, optionally mirrored to a JSON lines file
+
+    Renders only queue the events they record. One background thread keeps
+    the file open, writes them and moves it to `<path>.1` once it has grown
+    past `max_bytes`, so the log never holds more than twice that.
+    """
+
+    def __init__(self, path: str | None, max_events: int = 10_000, max_bytes: int = 10 * 1024 * 1024):
+        self.path = Path(path) if path else None
+        self.max_bytes = max_bytes
+        self.events = deque(maxlen=max_events)
+        self._lock = threading.Lock()
+        self._queue = queue.SimpleQueue()
+        if self.path is not None:
+            threading.Thread(target=self._write_log, name='metrics-log', daemon=True).start()
+
+    def add(self, event: dict):
+        with self._lock:
+            self.events.append(event)
+        if self.path is not None:
+            self._queue.put(event)
+
+    def snapshot(self) -> list[dict]:
+        with self._lock:
+            return list(self.events)
+
+    def flush(self, timeout: float | None = None) -> bool:
+        """Wait until the events added so far are in the file; False on timeout"""
+        if self.path is None:
+            return True
+        written = threading.Event()
+        self._queue.put(written)
+        return written.wait(timeout)
+
+    def _write_log(self):
+        log = None
+        while True:
+            item = self._queue.get()
+            try:
+                if log is None:
+                    log = self.path.open('a')
+                if isinstance(item, threading.Event):
+                    log.flush()
+                    continue
+                log.write(json.dumps(item) + '\n')
+                if self._queue.empty():
+                    log.flush()
+                if log.tell() >= self.max_bytes:
+                    log.close()
+                    log = None
+                    self.path.replace(self.path.with_name(self.path.name + '.1'))
+            except OSError:
+                # Metrics are best effort: drop the event and reopen the file for the next one
+                if log is not None and not log.closed:
+                    log.close()
+                log = None
+            finally:
+                if isinstance(item, threading.Event):
+                    item.set()
+
+
+@st.cache_resource
+def get_metrics_store() -> MetricsStore:
+    return MetricsStore(
+        st.secrets.get("metrics_log"), max_bytes=st.secrets.get("metrics_log_max_mb", 10) * 1024 * 1024
+    )
+
+def enabled() -> bool:
+    return st.secrets.get("instrumentation", False)
+
+def _session_events() -> list | None:
+    try:
+        return st.session_state.setdefault('_render_metrics', [])
+    except Exception:
+        # No script context, e.g. a CLI refresh of the local replica
+        return None
+
+def record(kind: str, name: str, seconds: float, rows: int | None = None, bytes: int | None = None, cache: str | None = None):
+    if not enabled():
+        return
+    event = {
+        "ts": time.time(),
+        "page": st.session_state.get('_render_page') if _session_events() is not None else None,
+        "kind": kind,
+        "name": name,
+        "seconds": seconds,
+        "rows": rows,
+        "bytes": bytes,
+        "cache": cache,
+    }
+    get_metrics_store().add(event)
+    events = _session_events()
+    if events is not None:
+        events.append(event)
+
+def measure_result(value) -> tuple[int | None, int | None]:
+    """(rows, bytes) of a loader result, where they can be told cheaply"""
+    if isinstance(value, pl.DataFrame):
+        return value.height, value.estimated_size()
+    if isinstance(value, list):
+        return len(value), None
+    return None, None
+
+@contextmanager
+def span(kind: str, name: str):
+    """Time a block; the yielded dict may set `rows`, `bytes` and `cache`"""
+    info = {}
+    start = time.perf_counter()
+    try:
+        yield info
+    finally:
+        record(kind, name, time.perf_counter() - start, info.get('rows'), info.get('bytes'), info.get('cache'))
+
+def timed(kind: str, name: str | None = None):
+    """Record every call of the decorated function, sizing its result"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(kind, name or func.__name__) as info:
+                result = func(*args, **kwargs)
+                info['rows'], info['bytes'] = measure_result(result)
+            return result
+        return wrapper
+    return decorator
+
+def record_http(response, *args, **kwargs):
+    """requests response hook: one `api` event per HTTP call to Google or the insert endpoint"""
+    path = urlparse(response.request.url).path.rstrip('/')
+    record(
+        'api',
+        f"{response.request.method} {path.rsplit('/', 1)[-1]}",
+        response.elapsed.total_seconds(),
+        bytes=len(response.content),
+    )
+    return response
+
+@contextmanager
+def page_render(page: str):
+    """Time a whole page render and attribute the events inside it to `page`"""
+    st.session_state['_render_page'] = page
+    st.session_state['_render_metrics'] = []
+    with span('page', page):
+        yield
+    show_debug_panel()
+
+
+class InstrumentedBackend(SheetsBackend):
+    """Backend wrapper recording every read and write"""
+
+    def __init__(self, backend: SheetsBackend):
+        self.backend = backend
+
+    def __getattr__(self, name):
+        return getattr(self.backend, name)
+
+    def sheet_title(self, sheet_id: int) -> str:
+        return self.backend.sheet_title(sheet_id)
+
+    def get_values(self, sheet_id: int, cell_range: str | None = None, unformatted: bool = False) -> list[list]:
+        with span('backend', f"get_values {sheet_id}!{cell_range or ''}") as info:
+            values = self.backend.get_values(sheet_id, cell_range, unformatted)
+            info['rows'] = len(values)
+        return values
+
+    def append_rows(self, sheet_id: int, rows: list[list], keys: list[str] | None = None):
+        with span('backend', f"append_rows {sheet_id}") as info:
+            self.backend.append_rows(sheet_id, rows, keys)
+            info['rows'] = len(rows)
+
+    def named_ranges(self) -> dict[str, tuple[int, str]]:
+        with span('backend', 'named_ranges'):
+            return self.backend.named_ranges()
+
+
+# ---------------------------
+# Aggregates and debug panel
+# ---------------------------
+EVENT_SCHEMA = {
+    "ts": pl.Float64, "page": pl.Utf8, "kind": pl.Utf8, "name": pl.Utf8,
+    "seconds": pl.Float64, "rows": pl.Int64, "bytes": pl.Int64, "cache": pl.Utf8,
+}
+
+def summarize(events: list[dict] | pl.DataFrame) -> pl.DataFrame:
+    """Count, p50/p95 wall time, rows, bytes and cache hit rate per (kind, name)"""
+    frame = events if isinstance(events, pl.DataFrame) else pl.DataFrame(events, schema=EVENT_SCHEMA)
+    return frame.group_by('kind', 'name').agg(
+        pl.len().alias('calls'),
+        (pl.col('seconds').quantile(0.5) * 1000).round(1).alias('p50 ms'),
+        (pl.col('seconds').quantile(0.95) * 1000).round(1).alias('p95 ms'),
+        pl.col('rows').sum(),
+        pl.col('bytes').sum(),
+        (pl.col('cache').eq('hit').sum() / pl.col('cache').is_not_null().sum()).fill_nan(None).round(2).alias('hit rate'),
+    ).sort('kind', 'p95 ms', descending=[False, True])
+
+def api_calls_per_page(events: list[dict], window: float = 60) -> pl.DataFrame:
+    """Google API calls made by each page over the last `window` seconds"""
+    frame = pl.DataFrame(events, schema=EVENT_SCHEMA)
+    return frame.filter(pl.col('kind').eq('api'), pl.col('ts').ge(time.time() - window)).group_by('page').agg(
+        pl.len().alias('calls'),
+    ).sort('calls', descending=True)
+
+def show_debug_panel():
+    """Sidebar panel with this render's events and the process-wide aggregates"""
+    if not enabled() or not (st.secrets.get("debug_panel", False) or st.query_params.get("debug") == "1"):
+        return
+    with st.sidebar.expander("🛠 Performance", expanded=False):
+        render = st.session_state.get('_render_metrics', [])
+        api_calls = sum(1 for event in render if event['kind'] == 'api')
+        st.caption(f"This render: {api_calls} API calls, {len(render)} events")
+        if render:
+            st.dataframe(summarize(render), hide_index=True)
+        events = get_metrics_store().snapshot()
+        st.caption("API calls per page, last minute")
+        st.dataframe(api_calls_per_page(events), hide_index=True)
+        st.caption(f"All sessions, last {len(events)} events")
+        st.dataframe(summarize(events), hide_index=True)
+
+
+if __name__ == "__main__":
+    import sys
+
+    with pl.Config(tbl_rows=-1, tbl_cols=-1):
+        print(summarize(pl.read_ndjson(sys.argv[1] if len(sys.argv) > 1 else "metrics.jsonl", schema=EVENT_SCHEMA)))
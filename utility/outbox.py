@@ -0,0 +1,151 @@
+"""Durable queue of transaction rows waiting to be written to the sheet
+
+Submissions are committed to a local SQLite log first, so entering a
+transaction costs a disk write and survives a dropped connection or a
+restart. A background worker drains the log to the sheet in batches. Every
+entry carries an idempotency key that is sent along with its row, and an
+entry is only marked synced once the sheet accepted it.
+"""
+import datetime
+import json
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import closing
+
+def _encode_cell(value):
+    if isinstance(value, datetime.datetime):
+        return {"$datetime": value.isoformat()}
+    if isinstance(value, datetime.date):
+        return {"$date": value.isoformat()}
+    raise TypeError(f"Cannot store {type(value).__name__} in the outbox")
+
+def _decode_cell(value):
+    if isinstance(value, dict) and "$datetime" in value:
+        return datetime.datetime.fromisoformat(value["$datetime"])
+    if isinstance(value, dict) and "$date" in value:
+        return datetime.date.fromisoformat(value["$date"])
+    return value
+
+
+class Outbox:
+    """SQLite write-ahead log of rows to append, keyed by idempotency key"""
+
+    def __init__(self, path: str):
+        self.path = path
+        with closing(self._connect()) as connection, connection:
+            connection.execute("PRAGMA journal_mode = WAL")
+            connection.executescript("""
+                CREATE TABLE IF NOT EXISTS entries (
+                    key TEXT PRIMARY KEY,
+                    sheet_id INTEGER NOT NULL,
+                    cells TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    last_error TEXT,
+                    synced_at REAL
+                );
+                CREATE INDEX IF NOT EXISTS pending_entries ON entries (synced_at, created_at);
+            """)
+
+    def _connect(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(self.path, timeout=30)
+        # An acknowledged submission must survive a crash or power loss
+        connection.execute("PRAGMA synchronous = FULL")
+        return connection
+
+    def enqueue(self, sheet_id: int, rows: list[list]) -> list[str]:
+        """Durably store rows to append; returns their idempotency keys"""
+        keys = [uuid.uuid4().hex for _ in rows]
+        now = time.time()
+        with closing(self._connect()) as connection, connection:
+            connection.executemany(
+                "INSERT INTO entries (key, sheet_id, cells, created_at) VALUES (?, ?, ?, ?)",
+                [(key, sheet_id, json.dumps(row, default=_encode_cell), now) for key, row in zip(keys, rows)],
+            )
+        return keys
+
+    def pending(self, limit: int | None = None) -> list[dict]:
+        """Unsynced entries, oldest first"""
+        with closing(self._connect()) as connection:
+            stored = connection.execute(
+                "SELECT key, sheet_id, cells, created_at, attempts, last_error FROM entries "
+                "WHERE synced_at IS NULL ORDER BY created_at, rowid LIMIT ?",
+                (limit if limit is not None else -1,),
+            ).fetchall()
+        return [
+            {
+                "key": key,
+                "sheet_id": sheet_id,
+                "row": [_decode_cell(cell) for cell in json.loads(cells)],
+                "created_at": created_at,
+                "attempts": attempts,
+                "last_error": last_error,
+            }
+            for key, sheet_id, cells, created_at, attempts, last_error in stored
+        ]
+
+    def pending_count(self) -> int:
+        with closing(self._connect()) as connection:
+            return connection.execute("SELECT COUNT(*) FROM entries WHERE synced_at IS NULL").fetchone()[0]
+
+    def version(self) -> tuple:
+        """Changes whenever an entry is added or synced, for keying derived caches"""
+        with closing(self._connect()) as connection:
+            return connection.execute(
+                "SELECT COUNT(*), MAX(created_at), MAX(synced_at) FROM entries"
+            ).fetchone()
+
+    def mark_synced(self, keys: list[str]):
+        with closing(self._connect()) as connection, connection:
+            connection.executemany(
+                "UPDATE entries SET synced_at = ?, last_error = NULL WHERE key = ?",
+                [(time.time(), key) for key in keys],
+            )
+
+    def mark_failed(self, keys: list[str], error: str):
+        with closing(self._connect()) as connection, connection:
+            connection.executemany(
+                "UPDATE entries SET attempts = attempts + 1, last_error = ? WHERE key = ?",
+                [(error, key) for key in keys],
+            )
+
+    def purge(self, older_than: float = 30 * 86_400):
+        """Forget synced entries once they are well past any retry"""
+        with closing(self._connect()) as connection, connection:
+            connection.execute("DELETE FROM entries WHERE synced_at < ?", (time.time() - older_than,))
+
+
+class OutboxWorker:
+    """Daemon thread calling `drain` whenever woken, and every `interval` seconds
+
+    `drain` returns True while entries remain pending. After a failed drain
+    the worker waits twice as long before the next attempt, up to
+    `max_interval`.
+    """
+
+    def __init__(self, drain, interval: float = 5, max_interval: float = 300):
+        self.drain = drain
+        self.interval = interval
+        self.max_interval = max_interval
+        self.last_error = None
+        self._wake = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="outbox-sync", daemon=True)
+        self._thread.start()
+
+    def wake(self):
+        self._wake.set()
+
+    def _run(self):
+        delay = self.interval
+        while True:
+            self._wake.wait(delay)
+            self._wake.clear()
+            try:
+                remaining = self.drain()
+                self.last_error = None
+                delay = 0 if remaining else self.interval
+            except Exception as error:
+                self.last_error = str(error)
+                delay = min(max(delay, self.interval) * 2, self.max_interval)
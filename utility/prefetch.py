@@ -0,0 +1,75 @@
+"""Background warming of the datasets a session is likely to ask for next
+
+While a page is being read, `Prefetcher` loads what the next interaction
+probably needs -- the neighbouring months, the datasets of the other pages --
+on a small pool of daemon threads, so that click is served from a warm cache.
+
+Work is planned per session. Planning again releases that session's earlier
+tasks, and a released task nobody else wants is cancelled if it has not
+started yet: it was planned for a selection the user has already left. A
+task queued or running for one session is not submitted again for another,
+and one that completed is not submitted again until the data changes.
+"""
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Hashable
+
+class Prefetcher:
+    """Bounded pool running deduplicated, cancellable warm-up tasks"""
+
+    def __init__(self, workers: int = 2):
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='background-prefetch')
+        self._lock = threading.Lock()
+        self._tasks: dict[Hashable, Future] = {}
+        self._owners: dict[Hashable, set] = {}
+        self._planned: dict[Hashable, list] = {}
+        self._version: Hashable = None
+        self._done: set = set()
+        self.stats = {'completed': 0, 'failed': 0, 'cancelled': 0}
+
+    def schedule(self, session: Hashable, tasks: dict[Hashable, Callable[[], object]], version: Hashable = None):
+        """Replace the tasks planned for `session`, most likely first
+
+        Tasks that completed while the data was at `version` are skipped; a
+        new version forgets them all.
+        """
+        with self._lock:
+            if version != self._version:
+                self._version, self._done = version, set()
+            tasks = {key: task for key, task in tasks.items() if key not in self._done}
+            for key in self._planned.pop(session, []):
+                if key not in tasks:
+                    self._release(key, session)
+            for key, task in tasks.items():
+                if key not in self._tasks:
+                    self._tasks[key] = self._pool.submit(self._run, key, task, version)
+                self._owners.setdefault(key, set()).add(session)
+            self._planned[session] = list(tasks)
+
+    def pending(self) -> int:
+        with self._lock:
+            return len(self._tasks)
+
+    def _release(self, key: Hashable, session: Hashable):
+        owners = self._owners.get(key)
+        if owners is None:
+            return
+        owners.discard(session)
+        if not owners and self._tasks[key].cancel():
+            del self._tasks[key], self._owners[key]
+            self.stats['cancelled'] += 1
+
+    def _run(self, key: Hashable, task: Callable[[], object], version: Hashable):
+        try:
+            task()
+            outcome = 'completed'
+        except Exception:
+            # The page that needs the data loads it again and reports the error
+            outcome = 'failed'
+        with self._lock:
+            self._tasks.pop(key, None)
+            self._owners.pop(key, None)
+            self.stats[outcome] += 1
+            # Finished against data that has changed since, so it may be stale already
+            if outcome == 'completed' and version == self._version:
+                self._done.add(key)
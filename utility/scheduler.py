@@ -0,0 +1,178 @@
+"""Quota-aware scheduling of Sheets API requests shared by every session
+
+Sheets allows a fixed number of read and of write requests per minute.
+`ScheduledBackend` takes a token from the matching bucket before each
+call, retries reads that hit quota (429) or server (5xx) errors with
+jittered exponential backoff, and lets concurrent identical reads share one call:
+when several sessions refresh at once, the range is fetched a single time.
+
+Limits are read from `[sheets_quota]` in secrets:
+
+    [sheets_quota]
+    reads_per_minute = 60
+    writes_per_minute = 60
+    burst = 10
+    retries = 5
+"""
+import random
+import threading
+import time
+from utility.backend import SheetsBackend
+
+RETRY_STATUS = (429, 500, 502, 503, 504)
+
+DEFAULT_QUOTA = {
+    'reads_per_minute': 60,
+    'writes_per_minute': 60,
+    'burst': 10,
+    'retries': 5,
+}
+
+class TokenBucket:
+    """Blocking token bucket refilled at `rate` tokens per second, holding at most `capacity`"""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def per_minute(cls, limit: int, burst: int) -> "TokenBucket":
+        """Bucket that never exceeds `limit` requests in any 60 second window"""
+        burst = max(1, min(burst, limit - 1))
+        return cls((limit - burst) / 60, burst)
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+class SingleFlight:
+    """Run one call per key at a time; callers arriving meanwhile get the same result"""
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, func):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = {'done': threading.Event()}
+        if not leader:
+            call['done'].wait()
+            if 'error' in call:
+                raise call['error']
+            return call['value']
+
+        try:
+            call['value'] = func()
+            return call['value']
+        except Exception as error:
+            call['error'] = error
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call['done'].set()
+
+
+def error_status(error: Exception) -> int | None:
+    """HTTP status behind a gspread or requests error, when there is one"""
+    response = getattr(error, 'response', None)
+    return getattr(response, 'status_code', None)
+
+def retryable(error: Exception) -> bool:
+    """Quota, server and connection errors; anything else is final"""
+    if error_status(error) in RETRY_STATUS:
+        return True
+    import requests
+
+    return isinstance(error, (requests.ConnectionError, requests.Timeout))
+
+def retry_after(error: Exception) -> float | None:
+    response = getattr(error, 'response', None)
+    try:
+        return float(response.headers['Retry-After'])
+    except (AttributeError, KeyError, TypeError, ValueError):
+        return None
+
+
+class ScheduledBackend(SheetsBackend):
+    """Backend wrapper applying rate limits, retries and read coalescing"""
+
+    def __init__(
+        self,
+        backend: SheetsBackend,
+        read_bucket: TokenBucket,
+        write_bucket: TokenBucket,
+        retries: int = 5,
+        backoff: float = 1.0,
+        max_backoff: float = 32.0,
+    ):
+        self.backend = backend
+        self.read_bucket = read_bucket
+        self.write_bucket = write_bucket
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self._reads = SingleFlight()
+
+    @classmethod
+    def from_quota(cls, backend: SheetsBackend, quota: dict | None = None) -> "ScheduledBackend":
+        quota = {**DEFAULT_QUOTA, **(quota or {})}
+        return cls(
+            backend,
+            TokenBucket.per_minute(quota['reads_per_minute'], quota['burst']),
+            TokenBucket.per_minute(quota['writes_per_minute'], quota['burst']),
+            retries=quota['retries'],
+        )
+
+    def __getattr__(self, name):
+        return getattr(self.backend, name)
+
+    def _call(self, bucket: TokenBucket, func, *args):
+        for attempt in range(self.retries + 1):
+            bucket.acquire()
+            try:
+                return func(*args)
+            except Exception as error:
+                if not retryable(error) or attempt == self.retries:
+                    raise
+                delay = retry_after(error)
+            # Full jitter, so sessions throttled together do not retry together
+            time.sleep(delay if delay is not None else random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt)))
+
+    def _read(self, key: tuple, func, *args):
+        return self._reads.do(key, lambda: self._call(self.read_bucket, func, *args))
+
+    def sheet_title(self, sheet_id: int) -> str:
+        # Titles come from the worksheet map the backend keeps, so they cost no request
+        return self.backend.sheet_title(sheet_id)
+
+    def get_values(self, sheet_id: int, cell_range: str | None = None, unformatted: bool = False) -> list[list]:
+        return self._read(
+            ('get_values', sheet_id, cell_range, unformatted), self.backend.get_values, sheet_id, cell_range, unformatted
+        )
+
+    def named_ranges(self) -> dict[str, tuple[int, str]]:
+        return self._read(('named_ranges',), self.backend.named_ranges)
+
+    def append_rows(self, sheet_id: int, rows: list[list], keys: list[str] | None = None):
+        # Appends are only idempotent where the endpoint honours the keys:
+        # the insert session re-sends only requests that were certainly not
+        # applied and the outbox reconciles the rest, so only the rate limit
+        # applies here
+        self.write_bucket.acquire()
+        self.backend.append_rows(sheet_id, rows, keys)
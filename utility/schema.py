@@ -0,0 +1,60 @@
+import datetime
+from itertools import zip_longest
+import polars as pl
+
+# Column types per worksheet; columns not listed stay strings. Values are
+# requested from Sheets unformatted, so numbers arrive as plain numbers,
+# booleans as TRUE/FALSE and dates as serial day numbers.
+SHEET_SCHEMAS = {
+    "money_tracker": {
+        'Timestamp': pl.Datetime,
+        'Transaction Date': pl.Date,
+        'Transasction Amount': pl.Float64,
+        'Cashflow': pl.Float64,
+    },
+    "monthly_planning": {
+        'Planned Amount': pl.Float64,
+    },
+    "anual_planning": {
+        'Financial Goal': pl.Float64,
+        'Currenlty Achieved': pl.Float64,
+        'Remaining': pl.Float64,
+        'Due Date': pl.Date,
+        'Funds Achieved': pl.Boolean,
+    },
+    "accounts_state": {
+        'Account Balance': pl.Float64,
+    },
+    "category_overview": {
+        'Planned': pl.Float64,
+        'Actual': pl.Float64,
+        'Difference': pl.Float64,
+    },
+}
+
+# Day zero of the Sheets serial date system
+SERIAL_EPOCH = datetime.datetime(1899, 12, 30)
+
+def cast_expr(column: str, dtype: pl.DataType) -> pl.Expr:
+    """Convert an unformatted cell column, held as strings, to `dtype`; empty cells become null"""
+    value = pl.col(column).cast(pl.Float64, strict=False)
+    if dtype == pl.Date:
+        return (pl.lit(SERIAL_EPOCH.date()) + pl.duration(days=value.floor().cast(pl.Int64))).alias(column)
+    if dtype == pl.Datetime:
+        milliseconds = (value * 86_400_000).round(0).cast(pl.Int64)
+        return (pl.lit(SERIAL_EPOCH) + pl.duration(milliseconds=milliseconds)).alias(column)
+    if dtype == pl.Boolean:
+        return pl.col(column).str.to_lowercase().eq('true').alias(column)
+    return pl.col(column).cast(dtype, strict=False).alias(column)
+
+def values_to_frame(values: list[list], schema: dict | None = None) -> pl.DataFrame:
+    """Build a typed frame from a header row followed by data rows"""
+    header = values[0]
+    # Built column by column: much faster than row-wise construction for large sheets
+    columns = list(zip_longest(*values[1:], fillvalue=''))[:len(header)] or [()] * len(header)
+    frame = pl.DataFrame([
+        pl.Series(name, column, dtype=pl.Utf8, strict=False) for name, column in zip(header, columns)
+    ])
+    return frame.with_columns(
+        cast_expr(column, dtype) for column, dtype in (schema or {}).items() if column in frame.columns
+    )
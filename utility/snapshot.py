@@ -0,0 +1,236 @@
+import hashlib
+import json
+import shutil
+import time
+from pathlib import Path
+import polars as pl
+import streamlit as st
+from utility.schema import SHEET_SCHEMAS, values_to_frame
+
+def get_snapshot_dir() -> Path:
+    """Return the directory holding the local Parquet snapshots"""
+    snapshot_dir = Path(st.secrets.get("snapshot_dir", ".snapshot"))
+    snapshot_dir.mkdir(parents=True, exist_ok=True)
+    return snapshot_dir
+
+def last_column_letter(width: int) -> str:
+    """Column letter of the last column in a table `width` columns wide"""
+    letters = ''
+    while width > 0:
+        width, remainder = divmod(width - 1, 26)
+        letters = chr(65 + remainder) + letters
+    return letters
+
+def _meta_path(sheet_key: str) -> Path:
+    return get_snapshot_dir() / f"{sheet_key}.json"
+
+def _data_path(sheet_key: str) -> Path:
+    return get_snapshot_dir() / f"{sheet_key}.parquet"
+
+def read_meta(sheet_key: str) -> dict:
+    path = _meta_path(sheet_key)
+    if not path.exists():
+        return {}
+    return json.loads(path.read_text())
+
+def read_snapshot(sheet_key: str, max_age: float | None = None) -> pl.DataFrame | None:
+    """Return the stored frame, or None when missing or older than `max_age` seconds"""
+    meta = read_meta(sheet_key)
+    path = _data_path(sheet_key)
+    if not meta or not path.exists():
+        return None
+    if max_age is not None and time.time() - meta.get("synced_at", 0) > max_age:
+        return None
+    return pl.read_parquet(path)
+
+def read_snapshot_schema(sheet_key: str) -> pl.Schema | None:
+    """Column names and types of the stored frame, without reading its rows"""
+    path = _data_path(sheet_key)
+    return pl.Schema(pl.read_parquet_schema(path)) if path.exists() else None
+
+def data_version(sheet_key: str) -> float | None:
+    """Time the stored frame last changed; unlike `synced_at` it stays put when a sync finds nothing new"""
+    meta = read_meta(sheet_key)
+    return meta.get("changed_at", meta.get("synced_at"))
+
+def write_snapshot(sheet_key: str, frame: pl.DataFrame, fingerprint: dict | None = None):
+    """Replace the stored frame; without a `fingerprint` the next change check re-syncs it"""
+    # Write to a temporary file first so a crash never leaves a half-written snapshot
+    path = _data_path(sheet_key)
+    tmp_path = path.with_suffix('.parquet.tmp')
+    frame.write_parquet(tmp_path, compression='zstd')
+    tmp_path.replace(path)
+    now = time.time()
+    _meta_path(sheet_key).write_text(json.dumps({
+        "rows": frame.height,
+        "synced_at": now,
+        "changed_at": now,
+        "fingerprint": fingerprint,
+    }))
+
+def touch(sheet_key: str, fingerprint: dict | None = None):
+    """Mark the stored frame as up to date with the sheet without rewriting it"""
+    meta = read_meta(sheet_key)
+    meta.setdefault("changed_at", meta.get("synced_at"))
+    meta["synced_at"] = time.time()
+    if fingerprint is not None:
+        meta["fingerprint"] = fingerprint
+    _meta_path(sheet_key).write_text(json.dumps(meta))
+
+def expire(sheet_key: str):
+    """Mark one snapshot as stale so the next load re-syncs it"""
+    meta = read_meta(sheet_key)
+    if meta:
+        meta["synced_at"] = 0
+        _meta_path(sheet_key).write_text(json.dumps(meta))
+
+# ---------------------------
+# Change detection
+# ---------------------------
+def _row_digest(row: list) -> str:
+    # Trailing blanks depend on how wide the range was read, not on the data
+    while row and row[-1] == '':
+        row = row[:-1]
+    return hashlib.sha1(json.dumps(row, default=str).encode()).hexdigest()
+
+def grid_fingerprint(values: list[list], first_row: int = 1) -> dict:
+    """Row count, width and last-row checksum of a worksheet read from `first_row` to its end"""
+    return {
+        "rows": first_row - 1 + len(values),
+        "width": max((len(row) for row in values), default=0),
+        "last_row": _row_digest(values[-1]) if values else None,
+    }
+
+def has_changed(sheet_key: str, backend, sheet_id: int) -> bool:
+    """Whether the worksheet differs from its snapshot, told from one small read
+
+    The last synced row and the one after it are read back: the sheet is
+    unchanged while that row still matches its checksum and nothing follows
+    it. Edits above the last row go unnoticed until the snapshot is next
+    downloaded in full.
+    """
+    fingerprint = read_meta(sheet_key).get("fingerprint")
+    if not fingerprint or not _data_path(sheet_key).exists():
+        return True
+    rows, width = fingerprint["rows"], fingerprint["width"]
+    if rows == 0:
+        return True
+    values = backend.get_values(sheet_id, f"A{rows}:{last_column_letter(width)}{rows + 1}", unformatted=True)
+    values = [row for row in values if any(cell != '' for cell in row)]
+    return len(values) != 1 or _row_digest(values[0]) != fingerprint["last_row"]
+
+def sync_changed(sheet_key: str, backend, sheet_id: int, full_every: float | None = None) -> tuple[pl.DataFrame, bool]:
+    """Reuse the snapshot when the worksheet has not changed, download it otherwise
+
+    With `full_every` a snapshot not downloaded for that many seconds is
+    downloaded regardless, picking up edits the check cannot see. Returns
+    the frame and whether it was downloaded.
+    """
+    meta = read_meta(sheet_key)
+    downloaded_at = meta.get("downloaded_at", meta.get("changed_at", meta.get("synced_at", 0)))
+    expired = full_every is not None and time.time() - downloaded_at > full_every
+    if expired or has_changed(sheet_key, backend, sheet_id):
+        return sync_full(sheet_key, backend, sheet_id), True
+    touch(sheet_key)
+    return pl.read_parquet(_data_path(sheet_key)), False
+
+def sync_full(sheet_key: str, backend, sheet_id: int) -> pl.DataFrame:
+    """Download the whole worksheet, typed per its schema, and replace its snapshot
+
+    A download identical to the snapshot keeps its `data_version`, so
+    nothing derived from it has to be recomputed.
+    """
+    values = backend.get_values(sheet_id, unformatted=True)
+    frame = values_to_frame(values, SHEET_SCHEMAS.get(sheet_key))
+    stored = read_snapshot(sheet_key)
+    if stored is not None and stored.equals(frame):
+        touch(sheet_key, grid_fingerprint(values))
+    else:
+        write_snapshot(sheet_key, frame, grid_fingerprint(values))
+    meta = read_meta(sheet_key)
+    meta["downloaded_at"] = meta["synced_at"]
+    _meta_path(sheet_key).write_text(json.dumps(meta))
+    return frame
+
+def sync_appended(sheet_key: str, backend, sheet_id: int) -> tuple[pl.DataFrame, int | None]:
+    """Fetch only the rows appended after the last synced row
+
+    Rows are appended in insertion order with a timestamp in the first column,
+    so the last synced row is re-read and compared against the snapshot. Any
+    mismatch means rows were edited or deleted and the sheet is re-downloaded.
+
+    Returns the full frame and the index of its first new row, or None when
+    the whole sheet was downloaded again.
+    """
+    frame = read_snapshot(sheet_key)
+    if frame is None or frame.is_empty():
+        return sync_full(sheet_key, backend, sheet_id), None
+
+    # Row 1 holds the header, so the last synced record sits at row `height + 1`
+    synced_rows = frame.height
+    schema = SHEET_SCHEMAS.get(sheet_key)
+    values = backend.get_values(
+        sheet_id, f"A{synced_rows + 1}:{last_column_letter(frame.width)}", unformatted=True
+    )
+    if not values:
+        return sync_full(sheet_key, backend, sheet_id), None
+    fetched = values_to_frame([frame.columns] + values, schema)
+    if fetched.schema != frame.schema or fetched[0, 0] != frame[-1, 0]:
+        return sync_full(sheet_key, backend, sheet_id), None
+
+    # The fetch started at the last synced record, so it ends at the sheet's last row
+    fingerprint = grid_fingerprint(values, first_row=synced_rows + 1)
+    if fetched.height > 1:
+        frame = pl.concat([frame, fetched[1:]])
+        write_snapshot(sheet_key, frame, fingerprint)
+    else:
+        touch(sheet_key, fingerprint)
+    return frame, synced_rows
+
+# ---------------------------
+# Month-partitioned datasets
+# ---------------------------
+def partition_dir(sheet_key: str) -> Path:
+    return get_snapshot_dir() / sheet_key
+
+def write_partitions(frame: pl.DataFrame, directory: Path, date_column: str, append: bool = False):
+    """Store `frame` as one Parquet file per (year, month) of `date_column`
+
+    The `year=YYYY/month=M` layout lets `scan_partitions` skip every file
+    outside the months a query asks for. With `append` only the partitions
+    touched by `frame` are rewritten.
+    """
+    target = directory if append else directory.with_name(directory.name + '.tmp')
+    if not append:
+        shutil.rmtree(target, ignore_errors=True)
+    # An empty frame still leaves a (then empty) dataset behind
+    target.mkdir(parents=True, exist_ok=True)
+
+    keyed = frame.with_columns(
+        pl.col(date_column).dt.year().alias('_year'),
+        pl.col(date_column).dt.month().alias('_month'),
+    )
+    for (year, month), part in keyed.group_by('_year', '_month'):
+        path = target / f"year={year}" / f"month={month}" / "data.parquet"
+        part = part.drop('_year', '_month')
+        if path.exists():
+            part = pl.concat([pl.read_parquet(path), part])
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix('.parquet.tmp')
+        part.write_parquet(tmp_path, compression='zstd')
+        tmp_path.replace(path)
+
+    if not append:
+        shutil.rmtree(directory, ignore_errors=True)
+        target.rename(directory)
+
+def scan_partitions(directory: Path, schema: pl.Schema | None = None) -> pl.LazyFrame:
+    """Lazily scan a partitioned dataset, exposing `year` and `month` columns
+
+    A dataset without any file yet, e.g. from an empty sheet, scans as an
+    empty frame of `schema`.
+    """
+    pattern = directory / 'year=*' / 'month=*' / '*.parquet'
+    if not any(directory.glob('year=*/month=*/*.parquet')):
+        return pl.LazyFrame(schema={**(schema or {}), 'year': pl.Int64, 'month': pl.Int64})
+    return pl.scan_parquet(pattern, hive_partitioning=True)
@@ -1,8 +1,37 @@
+import datetime
 import polars as pl
 
+MONTH_LIST = ['Januari', 'Februari', 'Maret', 'April', 'Mei', 'Juni', 'Juli', 'Agustus', 'September', 'Oktober', 'November', 'Desember']
+
 def currency_to_number(column_to_convert:str) -> pl.Expr:
     return (
         pl.col(column_to_convert)
         .str.replace_all(r'[Rp.\s]', '')
         .str.replace(',','.').cast(pl.Float64)
-    )
\ No newline at end of file
+    )
+
+def month_bounds(year: int, first_month: str, last_month: str | None = None) -> tuple[datetime.date, datetime.date]:
+    """First day of `first_month` and first day after `last_month`
+
+    A `last_month` earlier in the year than `first_month` rolls over into
+    the following year, e.g. November to Februari.
+    """
+    first = MONTH_LIST.index(first_month)
+    last = MONTH_LIST.index(last_month or first_month)
+    if last < first:
+        last += 12
+    end_year, end_month = divmod(last + 1, 12)
+    return datetime.date(year, first + 1, 1), datetime.date(year + end_year, end_month + 1, 1)
+
+def format_rupiah(value: str | pl.Expr) -> pl.Expr:
+    """Render amounts as `Rp 1.234.567,00`, vectorized over a column"""
+    amount = pl.col(value) if isinstance(value, str) else value
+    digits = amount.abs().round(0).cast(pl.Int64).cast(pl.Utf8)
+    # Group thousands from the right: reverse, dot after every three digits, reverse back
+    grouped = digits.str.reverse().str.replace_all(r'(\d{3})', '$1.').str.reverse().str.strip_chars_start('.')
+    sign = pl.when(amount < 0).then(pl.lit('Rp -')).otherwise(pl.lit('Rp '))
+    return (sign + grouped + pl.lit(',00')).name.keep()
+
+def rupiah(value: float) -> str:
+    """Single-value form of `format_rupiah`, for metrics and messages"""
+    return pl.DataFrame({'value': [value]}, schema={'value': pl.Float64}).select(format_rupiah('value')).item()
@@ -1,4 +1,86 @@
+import functools
+import hashlib
+import threading
+from collections import OrderedDict
+import polars as pl
+from utility.utils import format_rupiah
 
+# ---------------------------
+# Spec memoization
+# ---------------------------
+SPEC_CACHE_SIZE = 128
+_spec_cache = OrderedDict()
+_spec_cache_lock = threading.Lock()
+
+def content_key(value):
+    """Hashable stand-in for a builder argument; frames are keyed by a digest of their schema and rows"""
+    if isinstance(value, pl.DataFrame):
+        digest = hashlib.blake2b(repr(value.schema).encode(), digest_size=16)
+        digest.update(value.hash_rows(seed=0).to_numpy().tobytes())
+        return ('frame', value.height, digest.hexdigest())
+    return value
+
+def memoized_spec(builder):
+    """Reuse the finished spec while the builder's inputs are unchanged
+
+    Most reruns render the same data, so the spec comes from the cache after a
+    frame digest. Callers share the returned dict and must not modify it.
+    """
+    @functools.wraps(builder)
+    def wrapper(*args, **kwargs):
+        key = (
+            builder.__name__,
+            tuple(content_key(arg) for arg in args),
+            tuple(sorted((name, content_key(value)) for name, value in kwargs.items())),
+        )
+        with _spec_cache_lock:
+            if key in _spec_cache:
+                _spec_cache.move_to_end(key)
+                return _spec_cache[key]
+        spec = builder(*args, **kwargs)
+        with _spec_cache_lock:
+            _spec_cache[key] = spec
+            while len(_spec_cache) > SPEC_CACHE_SIZE:
+                _spec_cache.popitem(last=False)
+        return spec
+    return wrapper
+
+def series_data(column: pl.Series) -> list:
+    """Chart values from a column, converted in one pass over its Arrow buffer"""
+    return column.to_numpy().tolist()
+
+# ---------------------------
+# Spec builders
+# ---------------------------
+
+REMARK_COLORS = {
+    "green": "#2e7d32",
+    "red": "#c62828",
+}
+
+def budget_remarks(unallocated) -> list[pl.Expr]:
+    """Remark text and color for every category row; `Diff` is Actual - Plan"""
+    money = format_rupiah(pl.col('Difference').abs())
+    flow = pl.col('Cash Flow Type')
+    more, less = pl.col('Diff') > 0, pl.col('Diff') < 0
+    expense_state = 'remain to be used!' if unallocated != 0 else 'less than planned!'
+
+    remarks = [
+        # (condition, text, color)
+        (flow.eq('Income') & more, pl.format('You received {} more income than planned!', money), "green"),
+        (flow.eq('Income') & less, pl.format('You received {} less income than planned!', money), "red"),
+        (flow.eq('Expense') & more, pl.format('You overspent {} more than planned!', money), "red"),
+        (flow.eq('Expense') & less, pl.format('You have {} {}', money, pl.lit(expense_state)), "green"),
+        (flow.eq('Savings') & more, pl.format('You saved {} more than planned!', money), "green"),
+        (flow.eq('Savings') & less, pl.format('You saved {} less than planned!', money), "red"),
+    ]
+    text, color = pl.lit(''), pl.lit(None, dtype=pl.Utf8)
+    for condition, remark, remark_color in reversed(remarks):
+        text = pl.when(condition).then(remark).otherwise(text)
+        color = pl.when(condition).then(pl.lit(REMARK_COLORS[remark_color])).otherwise(color)
+    return [text.alias('Remark'), color.alias('Remark Color')]
+
+@memoized_spec
 def create_horizontal_bar_chart(planned, actual):
     return {
     "tooltip": {
@@ -54,3 +136,101 @@ def create_horizontal_bar_chart(planned, actual):
         "containLabel": True
     }
 }
+
+@memoized_spec
+def create_stacked_bar_chart(item_activity: pl.DataFrame):
+    """Stacked bars from a wide frame: `Transaction Date` plus one amount column per budget item"""
+    items = [col for col in item_activity.columns if col != 'Transaction Date']
+    return {
+        "tooltip": {"trigger": "axis"},
+        "legend": {"data": items},
+        "xAxis": {"type": "category", "data": series_data(item_activity['Transaction Date'])},
+        "yAxis": {"type": "value"},
+        "series": [
+            {
+                "name": col,
+                "type": "bar",
+                "stack": "total",
+                "emphasis": {"focus": "series"},
+                "data": series_data(item_activity[col]),
+            } for col in items
+        ]
+    }
+
+@memoized_spec
+def create_budget_breakdown_chart(breakdown: pl.DataFrame, row_height: int = 110) -> dict:
+    """Planned vs actual bars for every category in one spec, one grid per category
+
+    `breakdown` holds `Budget Category`, `Planned`, `Actual`, `Remark` and
+    `Remark Color`; each category gets its name and remark as a title above
+    its grid, so the whole section renders in a single component. Every
+    part is built as a struct column, like the remarks, not row by row.
+    """
+    index = pl.int_range(pl.len(), dtype=pl.Int64)
+    top = index * row_height
+
+    def bar(column: str, color: str) -> pl.Expr:
+        return pl.struct(pl.col(column).alias('value'), pl.struct(pl.lit(color).alias('color')).alias('itemStyle'))
+
+    parts = breakdown.select(
+        pl.struct(
+            pl.format('📦 {}', 'Budget Category').alias('text'),
+            pl.col('Remark').alias('subtext'),
+            top.alias('top'),
+            pl.lit('1%').alias('left'),
+            pl.struct(pl.lit(14).alias('fontSize')).alias('textStyle'),
+            pl.struct(
+                pl.col('Remark Color').alias('color'), pl.lit(500).alias('fontWeight'), pl.lit(12).alias('fontSize')
+            ).alias('subtextStyle'),
+        ).alias('title'),
+        pl.struct(
+            pl.lit('3%').alias('left'),
+            pl.lit('12%').alias('right'),
+            (top + 48).alias('top'),
+            pl.lit(row_height - 58).alias('height'),
+            pl.lit(True).alias('containLabel'),
+        ).alias('grid'),
+        pl.struct(pl.lit('value').alias('type'), pl.lit(False).alias('show'), index.alias('gridIndex')).alias('xAxis'),
+        pl.struct(
+            pl.lit('category').alias('type'),
+            index.alias('gridIndex'),
+            pl.concat_list(pl.lit('Planned'), pl.lit('Actual')).alias('data'),
+            pl.struct(pl.lit(8).alias('margin'), pl.lit(10).alias('fontSize')).alias('axisLabel'),
+            pl.struct(pl.lit(False).alias('show')).alias('axisLine'),
+            pl.struct(pl.lit(False).alias('show')).alias('axisTick'),
+        ).alias('yAxis'),
+        pl.struct(
+            pl.lit('bar').alias('type'),
+            index.alias('xAxisIndex'),
+            index.alias('yAxisIndex'),
+            pl.concat_list(bar('Planned', '#5400C6'), bar('Actual', '#FF6B6B')).alias('data'),
+            pl.struct(
+                pl.lit(True).alias('show'),
+                pl.lit('insideLeft').alias('position'),
+                pl.lit('{c}').alias('formatter'),
+                pl.lit(10).alias('fontSize'),
+            ).alias('label'),
+        ).alias('series'),
+    )
+    return {
+        "tooltip": {"trigger": "axis", "axisPointer": {"type": "shadow"}},
+        **{key: parts[key].to_list() for key in parts.columns},
+    }
+
+@memoized_spec
+def create_trend_chart(spend: pl.DataFrame) -> dict:
+    """One line per budget category over `year`/`month`, from `dm.category_spend_by_month`"""
+    wide = spend.with_columns(
+        pl.format('{}-{}', 'year', pl.col('month').cast(pl.Utf8).str.zfill(2)).alias('Period')
+    ).pivot(on='Budget Category', index='Period', values='Amount', aggregate_function='sum', sort_columns=True).sort('Period')
+    categories = [col for col in wide.columns if col != 'Period']
+    return {
+        "tooltip": {"trigger": "axis"},
+        "legend": {"data": categories, "type": "scroll"},
+        "xAxis": {"type": "category", "data": series_data(wide['Period'])},
+        "yAxis": {"type": "value"},
+        "series": [
+            {"name": col, "type": "line", "connectNulls": True, "data": series_data(wide[col])}
+            for col in categories
+        ],
+    }